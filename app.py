@@ -1,63 +1,134 @@
 import atexit
-from flask import Flask, request, jsonify
+import os
+import threading
+from flask import Flask, request, jsonify, url_for
 from processor import process_new_meetings
-from models import (
-    EmployeeSkills,
-    SkillRecommendation,
-    TaskRecommendation,
-    RollingSentiment,
-    SessionLocal
-)
-from utils import get_sentiment_and_recommendations
+from modules.admission import AdmissionRejected, admission_snapshot, get_controller
+from models import init_db
+from modules.db.session import SessionLocal
+from modules.analytics import declining_employees, overdue_tasks_by_manager, team_sentiment_trend
+from modules.bulk_ingest import iter_ndjson_meetings, iter_zip_meetings
+from modules.export import EXPORT_DIR, EXPORT_TABLES, export_running, load_watermarks, run_export
+from modules.jobs import JOB_RESUME_INTERVAL, get_job, resume_pending_jobs, submit_bulk_job, submit_transcript_job
+from modules.timeseries import downsample, get_rolling_series
+from modules.transcript_parser import iter_lines, split_by_speaker
+from modules.llm import get_router
+from modules.llm_budget import INTERACTIVE, llm_priority
+from modules.utils.nltk_utils import ensure_nltk_data, sent_tokenize
+from modules.utils.profiling import init_flask_profiling, profiled
+from sentiment import get_analyzer
+from utils import analyze_uploaded_transcript, store_transcript_analysis
+from datetime import datetime
 import json
-import re
 
 app = Flask(__name__)
-# import nltk
-# nltk.download('punkt')
+init_flask_profiling(app)
 
+# "lazy" defers NLTK data, LLM clients and table creation until first use; "eager" loads them at import
+STARTUP_MODE = os.getenv("APP_STARTUP_MODE", "lazy")
+# "auto" runs the scheduler only in the process that grabs the lock file first; "on"/"off" force it
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "auto")
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/full_integration_scheduler.lock")
+# Rolling series in upload responses are downsampled to this many points (0 keeps them whole)
+ROLLING_RESPONSE_POINTS = int(os.getenv("ROLLING_RESPONSE_POINTS", "200"))
 
+scheduler = None
+_scheduler_lock_handle = None
 
-import nltk
-from nltk.data import load
 
-# Add the monkey patch here
-_original_load = load
-def patched_load(resource_name, *args, **kwargs):
-    if 'punkt_tab' in resource_name:
-        return _original_load('tokenizers/punkt/english.pickle')
-    return _original_load(resource_name, *args, **kwargs)
+def warm_up():
+    """
+    Loads every heavy resource up front. Call it from a server post-fork hook,
+    or set APP_STARTUP_MODE=eager to run it at import time.
+    """
+    init_db()
+    ensure_nltk_data()
+    sent_tokenize("Warm up.")
+    get_analyzer()
+    get_router()
 
-nltk.data.load = patched_load
 
-# Download punkt
-nltk.download('punkt')
-
-from apscheduler.schedulers.background import BackgroundScheduler
-from processor import * 
+@profiled("scheduler.process_new_meetings")
 def scheduled_processing():
     with app.app_context():
+        init_db()
         process_new_meetings()
 
-# Schedule to run every 5 minutes
-scheduler = BackgroundScheduler()
-scheduler.add_job(func=scheduled_processing, trigger="interval", minutes=1)
-scheduler.start()
 
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
+def resume_jobs():
+    init_db()
+    resume_pending_jobs()
+
+
+def _is_scheduler_process():
+    global _scheduler_lock_handle
+    if SCHEDULER_MODE in ("on", "off"):
+        return SCHEDULER_MODE == "on"
+
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock on this platform; behave like a single process
+
+    handle = open(SCHEDULER_LOCK_FILE, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _scheduler_lock_handle = handle  # Held for the lifetime of this process
+    return True
+
+
+def start_scheduler():
+    """Starts the background scheduler if this is the designated process."""
+    global scheduler
+    if scheduler is not None or not _is_scheduler_process():
+        return scheduler
+
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    # Schedule to run every minute
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(func=scheduled_processing, trigger="interval", minutes=1)
+    scheduler.start()
+
+    # Shut down the scheduler when exiting the app
+    atexit.register(lambda: scheduler.shutdown())
+
+    # Pick up async uploads orphaned by a previous (or crashed sibling) process, now and periodically
+    scheduler.add_job(func=resume_jobs, trigger="interval", seconds=JOB_RESUME_INTERVAL, next_run_time=datetime.now())
+    print(f"Scheduler started in process {os.getpid()}")
+    return scheduler
+
+
+@app.before_request
+def ensure_db():
+    init_db()  # Cached; only the first request of each process creates tables
+
+
+if STARTUP_MODE == "eager":
+    warm_up()
 
+start_scheduler()
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    response = jsonify({"error": "Server busy, retry later", "reason": e.reason})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, e.status
+
+
+def _wants_async():
+    flag = request.args.get("async") or request.form.get("async") or ""
+    return flag.lower() in ("1", "true", "yes") or "respond-async" in request.headers.get("Prefer", "")
 
-from transformers import pipeline
-from sentiment import * 
-# Load sentiment analysis model
-sentiment_pipeline = pipeline("sentiment-analysis")
 
 @app.route("/upload_transcript", methods=["POST"])
 def upload_transcript():
     meeting_id = request.form.get("meeting_id")
     people_info = request.form.get("people_info")
-    file = request.files["transcript"]
+    file = request.files.get("transcript")
 
     if not all([meeting_id, people_info, file]):
         return jsonify({"error": "Missing input"}), 400
@@ -67,102 +138,177 @@ def upload_transcript():
     except Exception:
         return jsonify({"error": "Invalid JSON format for people_info"}), 400
 
-    transcript = file.read().decode("utf-8")
-    db = SessionLocal()
-    responses = []
-
-    for person in people:
-        name = person["name"]
-        role = person["role"]
-
-        pattern = re.compile(rf"{name}\s*:\s*(.*)", re.IGNORECASE)
-        person_lines = "\n".join([m.group(0) for m in pattern.finditer(transcript)])
-
-        if not person_lines:
-            responses.append({ "name": name, "error": "No dialogue found" })
-            continue
-        print(f"Person Line : {person} : {name} : {person_lines} ")
-        print(f"Responses : {responses}")
-        sentiment, skills, tasks = get_sentiment_and_recommendations(person_lines, name)
-
-        rolling_data = get_rolling_sentiment_from_transcript(person_lines, name)
-        # Sentiment_performance_score = rolling_data['Rolling Sentiment'].avg()
-        rolling_sentiments = [entry['Rolling Sentiment'] for entry in rolling_data]  # Extract all the sentiment values
-        print("Rolling sentiment : ",rolling_sentiments)
-        # Then calculate the average
-        average_sentiment = sum(rolling_sentiments) / len(rolling_sentiments) if rolling_sentiments else 0
-        average_sentiment = round(average_sentiment,2)
-
-
-        db.add(EmployeeSkills(
-            meeting_id=meeting_id,
-            overall_sentiment_score=average_sentiment,
-            role=role,
-            employee_name=name
-        ))
-
-        skill_responses = []
-        if skills:
-            for skill in skills[:3]:  # Ensure max 3 skills
-                db.add(SkillRecommendation(
-                    meeting_id=meeting_id,
-                    skill_recommendation=skill,
-                    name=name
-                ))
-                skill_responses.append(skill)
-
-
-        task_responses = []
-        if tasks:
-            for task in tasks:
-                db.add(TaskRecommendation(
-                    meeting_id=meeting_id,
-                    task=task["task"],
-                    assigned_by=task["assigned_by"] or name,
-                    assigned_to=task["assigned_to"] or name,
-                    deadline=task["deadline"] or "N/A",
-                    status=task["status"] or "Pending"
-                ))
-                task_responses.append({
-                    "task": task["task"],
-                    "assigned_by": task["assigned_by"],
-                    "assigned_to": task["assigned_to"],
-                    "deadline": task["deadline"],
-                    "status": task["status"]
-                })
-
-        if rolling_data:
-            db.add(RollingSentiment(
-                meeting_id=meeting_id,
-                name=name,
-                role=role,
-                rolling_sentiment=json.dumps(rolling_data)  # 🔥 Now in clean format
-            ))
-
-        responses.append({
-            "name": name,
-            "role": role,
-            "sentiment_score": average_sentiment,
-            "skill": skill_responses,
-            "tasks": task_responses,
-            "rolling_sentiment": rolling_data
-        })
-
-    db.commit()
-    db.close()
+    if not isinstance(people, list) or not all(isinstance(p, dict) and p.get("name") and p.get("role") for p in people):
+        return jsonify({"error": "people_info must be a list of objects with name and role"}), 400
+
+    if _wants_async():
+        # Persist the raw transcript and let the worker pool do the analysis
+        transcript = "\n".join(iter_lines(file.stream))
+        job_id = submit_transcript_job(meeting_id, people, transcript)
+        status_url = url_for("job_status", job_id=job_id)
+        response = jsonify({"job_id": job_id, "status": "queued", "status_url": status_url})
+        response.headers["Location"] = status_url
+        return response, 202
+
+    # Bounded concurrency: beyond the limit and a short queue the request is shed with 429/503
+    with get_controller("upload_transcript").admit():
+        # One streaming pass over the upload splits it into per-speaker buckets
+        buckets = split_by_speaker(iter_lines(file.stream), [person["name"] for person in people])
+        # The caller is waiting on this response, so it goes ahead of background LLM work
+        with llm_priority(INTERACTIVE):
+            responses = analyze_uploaded_transcript(people, buckets)
+
+        db = SessionLocal()
+        try:
+            store_transcript_analysis(db, meeting_id, responses)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # The full series is stored; the response only carries a downsampled preview
+    for response in responses:
+        if response.get("rolling_sentiment"):
+            response["rolling_sentiment"] = downsample(response["rolling_sentiment"], ROLLING_RESPONSE_POINTS)
 
     return jsonify({
         "message": "Processed all users successfully.",
         "data": responses
     })
 
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route("/bulk_upload", methods=["POST"])
+def bulk_upload():
+    """
+    Backfills many meetings per request. Send either an NDJSON body
+    (Content-Type: application/x-ndjson, one meeting per line) or a multipart
+    upload with a zip "archive" or an NDJSON "ndjson" file. The upload is parsed and
+    queued as one background job (202); poll its status URL for the per-meeting report.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        records = iter_ndjson_meetings(request.stream)
+    elif "archive" in request.files:
+        records = iter_zip_meetings(request.files["archive"].stream)
+    elif "ndjson" in request.files:
+        records = iter_ndjson_meetings(request.files["ndjson"].stream)
+    else:
+        return jsonify({"error": "Send NDJSON or a zip archive"}), 400
+
+    try:
+        job_id = submit_bulk_job(records)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    status_url = url_for("job_status", job_id=job_id)
+    response = jsonify({"job_id": job_id, "status": "queued", "status_url": status_url})
+    response.headers["Location"] = status_url
+    return response, 202
+
+
+@app.route("/sentiment/<name>/rolling", methods=["GET"])
+def rolling_sentiment_series(name):
+    """
+    Query parameters: meeting_id, start and end (ISO dates), points (max points per
+    series), method ("lttb" or "mean") and concat (join meetings into one series).
+    """
+    try:
+        start = datetime.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = datetime.fromisoformat(request.args["end"]) if request.args.get("end") else None
+        points = request.args.get("points", type=int)
+        method = request.args.get("method", "lttb")
+        if method not in ("lttb", "mean"):
+            raise ValueError("method must be 'lttb' or 'mean'")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    series = get_rolling_series(
+        name,
+        meeting_id=request.args.get("meeting_id"),
+        start=start,
+        end=end,
+        max_points=points,
+        method=method,
+        concat=request.args.get("concat", "").lower() in ("1", "true", "yes")
+    )
+    return jsonify(series), 200
+
+
+@app.route("/analytics/team_sentiment", methods=["GET"])
+def analytics_team_sentiment():
+    days = request.args.get("days", 90, type=int)
+    window = request.args.get("window", 4, type=int)
+    return jsonify({"data": team_sentiment_trend(days, window)}), 200
+
+
+@app.route("/analytics/declining_employees", methods=["GET"])
+def analytics_declining_employees():
+    days = request.args.get("days", 90, type=int)
+    min_days = request.args.get("min_days", 3, type=int)
+    limit = request.args.get("limit", 20, type=int)
+    return jsonify({"data": declining_employees(days, min_days, limit)}), 200
+
+
+@app.route("/analytics/overdue_tasks", methods=["GET"])
+def analytics_overdue_tasks():
+    default_due_days = request.args.get("default_due_days", 7, type=int)
+    return jsonify({"data": overdue_tasks_by_manager(default_due_days)}), 200
+
+
+@app.route("/export", methods=["POST"])
+def start_export():
+    """
+    Starts an incremental Parquet export in the background (see modules.export).
+    Optional repeated `table` query parameter limits it to some tables.
+    """
+    tables = request.args.getlist("table") or None
+    unknown = set(tables or []) - set(EXPORT_TABLES)
+    if unknown:
+        return jsonify({"error": f"Unknown table(s): {', '.join(sorted(unknown))}"}), 400
+    if export_running():
+        return jsonify({"error": "An export is already running"}), 409
+
+    def export():
+        try:
+            run_export(tables)
+        except Exception as e:
+            app.logger.error(f"Export failed: {e}")
+
+    threading.Thread(target=export, name="parquet-export", daemon=True).start()
+    return jsonify({"status": "started", "status_url": url_for("export_status")}), 202
+
+
+@app.route("/export", methods=["GET"])
+def export_status():
+    return jsonify({"running": export_running(), "watermarks": load_watermarks(EXPORT_DIR)}), 200
+
+
 @app.route("/")
 def home():
     return "Server is up!"
 
 
+@app.route("/admission", methods=["GET"])
+def admission_status():
+    return jsonify(admission_snapshot()), 200
+
+
 @app.route("/process_unprocessed", methods=["POST"])
 def process_unprocessed():
+    # Outside the try below, so a shed request gets its 429/503 rather than a 500
+    with get_controller("process_unprocessed").admit():
+        return _process_unprocessed()
+
+
+def _process_unprocessed():
     try:
         result = process_new_meetings()
         if "error" in result:
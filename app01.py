@@ -1,18 +1,16 @@
 
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import Base, Employee, EmployeeSkills, SkillRecommendation, TaskRecommendation, RollingSentiment
+from models import init_db, Employee
+from modules.db.session import ReadOnlySessionLocal as SessionLocal
+from modules.dashboard.cache import (
+    current_data_version,
+    load_employee_meetings,
+    load_employees,
+    load_employee_trend,
+    load_meeting_bundle,
+    load_org_overview
+)
 import pandas as pd
-import json
-import os
-
-from dotenv import load_dotenv
-load_dotenv()
-# Database setup
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Initialize session state
 for key in ['authenticated', 'user_role', 'user_name', 'user_email']:
@@ -27,51 +25,8 @@ def get_employee_by_email(email):
     with SessionLocal() as db:
         return db.query(Employee).filter(Employee.email == email).first()
 
-def get_skills_for_employee(name, meeting_id=None):
-    with SessionLocal() as db:
-        query = db.query(SkillRecommendation).filter(SkillRecommendation.name == name)
-        if meeting_id:
-            query = query.filter(SkillRecommendation.meeting_id == meeting_id)
-        return [{"skill": s.skill_recommendation, "meeting_id": s.meeting_id} for s in query.all()]
-
-def get_tasks_for_employee(name, meeting_id=None):
-    with SessionLocal() as db:
-        query = db.query(TaskRecommendation).filter(
-            (TaskRecommendation.assigned_to == name) | 
-            (TaskRecommendation.assigned_by == name)
-        )
-        if meeting_id:
-            query = query.filter(TaskRecommendation.meeting_id == meeting_id)
-        return query.all()
-
-def get_sentiment_data(name, meeting_id=None):
-    with SessionLocal() as db:
-        query = db.query(EmployeeSkills).filter(EmployeeSkills.employee_name == name)
-        if meeting_id:
-            query = query.filter(EmployeeSkills.meeting_id == meeting_id)
-        return query.all()
-
-def get_rolling_sentiment(name, meeting_id=None):
-    with SessionLocal() as db:
-        query = db.query(RollingSentiment).filter(RollingSentiment.name == name)
-        if meeting_id:
-            query = query.filter(RollingSentiment.meeting_id == meeting_id)
-        rolling = query.first()
-        return json.loads(rolling.rolling_sentiment) if rolling else None
-
 def get_all_employees(role_filter=None):
-    with SessionLocal() as db:
-        query = db.query(Employee)
-        if role_filter:
-            query = query.filter(Employee.role == role_filter)
-        return query.all()
-
-def get_employee_meetings(name):
-    with SessionLocal() as db:
-        meetings = db.query(EmployeeSkills.meeting_id).filter(
-            EmployeeSkills.employee_name == name).distinct().order_by(
-            EmployeeSkills.meeting_id.desc()).all()
-        return [m[0] for m in meetings]
+    return load_employees(role_filter)
 
 # -------------------- UI Pages --------------------
 
@@ -91,19 +46,21 @@ def login_page():
                 st.error("🚫 Invalid email or employee not found")
 
 def display_meeting_data(name, meeting_id=None):
-    meetings = get_employee_meetings(name)
+    version = current_data_version()
+    meetings = load_employee_meetings(name, version)
     if not meetings:
         st.warning("No meeting data available for this employee.")
         return
 
     st.markdown("### 📅 Select a Meeting")
     selected_meeting = st.selectbox("Meeting List", options=meetings, format_func=lambda x: f"📝 Meeting {x}")
+    data = load_meeting_bundle(name, selected_meeting, version)
 
     col1, col2 = st.columns(2)
 
     with col1:
         with st.expander("📚 Skill Recommendations", expanded=True):
-            skills = get_skills_for_employee(name, selected_meeting)
+            skills = data["skills"]
             if skills:
                 for skill in skills:
                     st.success(f"✅ {skill['skill']} (Meeting {skill['meeting_id']})")
@@ -112,29 +69,49 @@ def display_meeting_data(name, meeting_id=None):
 
     with col2:
         with st.expander("🛠️ Task Recommendations", expanded=True):
-            tasks = get_tasks_for_employee(name, selected_meeting)
+            tasks = data["tasks"]
             if tasks:
                 for task in tasks:
-                    status = "✅" if task.status.lower() == "completed" else "⏳"
-                    st.markdown(f"**{status} {task.task}**  \nAssigned by: `{task.assigned_by}` | Deadline: `{task.deadline}`")
+                    status = "✅" if (task["status"] or "").lower() == "completed" else "⏳"
+                    st.markdown(f"**{status} {task['task']}**  \nAssigned by: `{task['assigned_by']}` | Deadline: `{task['deadline']}`")
             else:
                 st.info("No tasks found for this meeting.")
 
     st.markdown("### 📊 Sentiment Analysis")
-    sentiments = get_sentiment_data(name, selected_meeting)
+    sentiments = data["sentiments"]
     if sentiments:
-        for data in sentiments:
+        rolling = data["rolling"]
+        for score in sentiments:
             col1, col2 = st.columns([1, 3])
             with col1:
-                st.metric("Overall Sentiment", f"{data.overall_sentiment_score:.2f}")
+                st.metric("Overall Sentiment", f"{score:.2f}")
             with col2:
-                rolling = get_rolling_sentiment(name, selected_meeting)
-                if rolling:
+                if rolling and rolling["scores"]:
                     df = pd.DataFrame(rolling['scores']).set_index('Index')
                     st.line_chart(df)
     else:
         st.warning("No sentiment data found for this meeting.")
 
+    display_trends(name, version)
+
+def display_trends(name, version, days=30):
+    st.markdown(f"### 📈 Last {days} Days")
+    granularity = st.radio("Group by", ["day", "week"], horizontal=True, key=f"trend_granularity_{name}")
+    data = load_employee_trend(name, days, granularity, version)
+    if not data["trend"]:
+        st.info("No activity in this period.")
+        return
+
+    df = pd.DataFrame(data["trend"]).set_index("bucket")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.line_chart(df[["mean_sentiment"]])
+        st.bar_chart(df[["meetings", "open_tasks"]])
+    with col2:
+        st.markdown("**Top skills**")
+        for skill in data["top_skills"]:
+            st.write(f"• {skill['skill']} ({skill['times']}×)")
+
 def employee_dashboard():
     st.markdown(f"## 👋 Welcome, **{st.session_state.user_name}** ({st.session_state.user_role})")
     st.divider()
@@ -149,7 +126,10 @@ def manager_dashboard():
     display_meeting_data(st.session_state.user_name)
 
     st.markdown("### 👥 Team Overview")
-    employee_names = [e.name for e in get_all_employees(role_filter="Employee")]
+    team = load_org_overview(30, "Employee", current_data_version())["employees"]
+    if team:
+        st.dataframe(pd.DataFrame(team).set_index("name"), use_container_width=True)
+    employee_names = [e["name"] for e in get_all_employees(role_filter="Employee")]
     selected = st.selectbox("🔍 Select an employee", employee_names)
     if selected:
         display_meeting_data(selected)
@@ -164,25 +144,29 @@ def hr_dashboard():
 
     st.markdown("### 🧑‍💼 View Employee/Manager Data")
     all_emps = get_all_employees()
-    names = [emp.name for emp in all_emps if emp.role != 'HR']
+    names = [emp["name"] for emp in all_emps if emp["role"] != 'HR']
     selected = st.selectbox("🔍 Select a member", names)
     if selected:
         display_meeting_data(selected)
 
     st.markdown("### 🌐 Organization Overview")
-    total_emps = sum(1 for e in all_emps if e.role == 'Employee')
-    total_mgrs = sum(1 for e in all_emps if e.role == 'Manager')
-    total_hr = sum(1 for e in all_emps if e.role == 'HR')
+    overview = load_org_overview(30, None, current_data_version())
+    role_counts = overview["role_counts"]
 
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("👨‍💼 Employees", total_emps)
-    col2.metric("👩‍💼 Managers", total_mgrs)
-    col3.metric("🧑‍💼 HRs", total_hr)
-    col4.metric("🌐 Total Users", len(all_emps))
+    col1.metric("👨‍💼 Employees", role_counts.get('Employee', 0))
+    col2.metric("👩‍💼 Managers", role_counts.get('Manager', 0))
+    col3.metric("🧑‍💼 HRs", role_counts.get('HR', 0))
+    col4.metric("🌐 Total Users", sum(role_counts.values()))
+
+    if overview["employees"]:
+        st.markdown("#### Last 30 Days by Member")
+        st.dataframe(pd.DataFrame(overview["employees"]).set_index("name"), use_container_width=True)
 
 # -------------------- Main App --------------------
 
 def main():
+    init_db()
     if not st.session_state.authenticated:
         login_page()
     else:
@@ -0,0 +1,165 @@
+"""
+Accuracy-vs-speed report for the Whisper inference backends in modules/pipelines/asr_backends.py.
+
+The fixture is a JSONL manifest of 16 kHz mono WAV clips with reference transcripts:
+    {"audio": "standup_01.wav", "text": "morning everyone let's start with the release"}
+Audio paths are relative to the manifest. Keep the fixture fixed so reports stay comparable;
+benchmarks/fetch_asr_fixture.py builds the default one from a checksum-pinned LibriSpeech
+subset. Note the machine (CPU, cores, memory) with any report you keep.
+
+    python benchmarks/asr_backends.py --manifest benchmarks/fixtures/asr/manifest.jsonl \\
+        --model medium --backend torch --backend torch-int8 --backend ctranslate2 --threads 4 \\
+        --output asr_report.md
+
+Each backend runs in a fresh interpreter so thread pools and peak memory do not leak
+between runs. Reported per backend: load time, real-time factor (transcription time /
+audio duration, lower is faster), word error rate against the references, peak RSS.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MANIFEST = os.path.join(ROOT, "benchmarks", "fixtures", "asr", "manifest.jsonl")
+
+PROBE = """
+import json, resource, sys, time
+import torchaudio
+from modules.pipelines.asr_backends import SAMPLE_RATE, load_backend
+
+model, backend, threads, manifest = sys.argv[1], sys.argv[2], int(sys.argv[3]), json.loads(sys.argv[4])
+t0 = time.perf_counter()
+asr = load_backend(model, backend, threads)
+load_seconds = time.perf_counter() - t0
+
+clips = []
+for clip in manifest:
+    waveform, sr = torchaudio.load(clip["audio"])
+    if sr != SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(waveform, sr, SAMPLE_RATE)
+    clips.append((clip, waveform.mean(dim=0).numpy()))
+
+asr.transcribe(clips[0][1][:SAMPLE_RATE])  # Warm-up, not timed
+results = []
+for clip, audio in clips:
+    t0 = time.perf_counter()
+    text = asr.transcribe(audio)
+    results.append({"audio": clip["audio"], "reference": clip["text"], "hypothesis": text,
+                    "audio_seconds": len(audio) / SAMPLE_RATE, "seconds": time.perf_counter() - t0})
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"load_seconds": load_seconds, "max_rss_mb": rss_mb, "clips": results}))
+"""
+
+
+def normalise_words(text: str):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str):
+    """Word-level Levenshtein distance and reference length."""
+    ref, hyp = normalise_words(reference), normalise_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, start=1):
+            current.append(min(
+                previous[j] + 1,  # Deletion
+                current[j - 1] + 1,  # Insertion
+                previous[j - 1] + (ref_word != hyp_word)  # Substitution
+            ))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_manifest(path: str):
+    base = os.path.dirname(os.path.abspath(path))
+    clips = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                clip = json.loads(line)
+                clip["audio"] = os.path.join(base, clip["audio"])
+                clips.append(clip)
+    if not clips:
+        raise SystemExit(f"No clips in {path}")
+    return clips
+
+
+def measure(model: str, backend: str, threads: int, clips) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, model, backend, str(threads), json.dumps(clips)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if out.returncode != 0:
+        return {"error": (out.stderr.strip().splitlines() or ["failed"])[-1]}
+    run = json.loads(out.stdout.strip().splitlines()[-1])
+
+    errors = words = 0
+    for clip in run["clips"]:
+        clip_errors, clip_words = word_errors(clip["reference"], clip["hypothesis"])
+        errors, words = errors + clip_errors, words + clip_words
+    audio_seconds = sum(c["audio_seconds"] for c in run["clips"])
+    seconds = sum(c["seconds"] for c in run["clips"])
+    return {
+        "load_seconds": round(run["load_seconds"], 2),
+        "audio_seconds": round(audio_seconds, 1),
+        "transcribe_seconds": round(seconds, 2),
+        "real_time_factor": round(seconds / audio_seconds, 3) if audio_seconds else None,
+        "wer": round(errors / words, 4) if words else None,
+        "max_rss_mb": round(run["max_rss_mb"]),
+        "clips": run["clips"],
+    }
+
+
+def markdown(report: dict, model: str, manifest: str) -> str:
+    lines = [
+        f"# Whisper {model} backends on {os.path.relpath(manifest, ROOT)}",
+        "",
+        "| backend | threads | load s | RTF | WER | peak RSS MB |",
+        "|---|---|---|---|---|---|",
+    ]
+    for key, row in report.items():
+        backend, threads = key.rsplit("@", 1)
+        if "error" in row:
+            lines.append(f"| {backend} | {threads} | failed: {row['error']} | | | |")
+            continue
+        lines.append(f"| {backend} | {threads} | {row['load_seconds']} | {row['real_time_factor']} | "
+                     f"{row['wer']:.2%} | {row['max_rss_mb']} |")
+    lines += ["", "RTF below 1.0 is faster than real time. WER is over all fixture words."]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--model", default="medium")
+    parser.add_argument("--backend", action="append", help="Backend(s) to compare (default: all)")
+    parser.add_argument("--threads", type=int, action="append", help="Thread count(s) to try (default: 0 = library default)")
+    parser.add_argument("--output", help="Report file; .md gets a table, anything else JSON")
+    args = parser.parse_args()
+
+    clips = load_manifest(args.manifest)
+    report = {}
+    for backend in args.backend or ["torch", "torch-int8", "ctranslate2", "onnx"]:
+        for threads in args.threads or [0]:
+            row = measure(args.model, backend, threads, clips)
+            report[f"{backend}@{threads}"] = row
+            if "error" in row:
+                print(f"{backend:>12} x{threads}: failed ({row['error']})")
+            else:
+                print(f"{backend:>12} x{threads}: RTF {row['real_time_factor']}, WER {row['wer']:.2%}, "
+                      f"load {row['load_seconds']}s, RSS {row['max_rss_mb']} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            if args.output.endswith(".md"):
+                f.write(markdown(report, args.model, args.manifest))
+            else:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
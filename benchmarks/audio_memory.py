@@ -0,0 +1,98 @@
+"""
+Peak memory of segment extraction against recording length.
+
+    python benchmarks/audio_memory.py --minutes 10 --minutes 60 --minutes 180 --sample-rate 44100 --channels 2
+
+Writes synthetic WAVs of each duration (into --workdir, removed afterwards), then in a
+fresh interpreter per run walks the file in --segment-seconds windows the way
+_transcribe_segments does, with either:
+    full    torchaudio.load of the whole file, resample and downmix (the previous behaviour)
+    reader  modules.pipelines.wav_reader.WavSegmentReader, one positioned read per segment
+Reports peak RSS and its growth over the interpreter's RSS after imports.
+"""
+import os
+import sys
+import json
+import wave
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys
+method, path, segment_seconds = sys.argv[1], sys.argv[2], float(sys.argv[3])
+import numpy, torch, torchaudio
+from modules.pipelines.wav_reader import SAMPLE_RATE, WavSegmentReader
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+baseline = rss_mb()
+reader = WavSegmentReader(path)
+duration, checksum, start = reader.duration, 0.0, 0.0
+if method == "full":
+    waveform, sr = torchaudio.load(path)
+    if sr != SAMPLE_RATE:
+        waveform = torchaudio.functional.resample(waveform, sr, SAMPLE_RATE)
+    audio = waveform.mean(dim=0).numpy()
+    read = lambda s, e: audio[int(s * SAMPLE_RATE):int(e * SAMPLE_RATE)]
+else:
+    read = reader.read
+while start < duration:
+    checksum += float(read(start, start + segment_seconds).sum())
+    start += segment_seconds
+print(json.dumps({"baseline_mb": baseline, "peak_mb": rss_mb()}))
+"""
+
+
+def write_wav(path: str, minutes: float, sample_rate: int, channels: int):
+    """Noise WAV written in one-second blocks, so generating it needs no memory either."""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        for _ in range(int(minutes * 60)):
+            f.writeframes(os.urandom(sample_rate * channels * 2))
+
+
+def measure(method: str, path: str, segment_seconds: float) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, method, path, str(segment_seconds)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    run = json.loads(out.stdout.strip().splitlines()[-1])
+    return {"peak_rss_mb": round(run["peak_mb"]), "growth_mb": round(run["peak_mb"] - run["baseline_mb"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, action="append", help="Durations to test (default: 10, 60, 180)")
+    parser.add_argument("--method", action="append", choices=["full", "reader"])
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--segment-seconds", type=float, default=10.0)
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    report = {}
+    for minutes in args.minutes or [10, 60, 180]:
+        path = os.path.join(args.workdir, f"audio_memory_{int(minutes)}m.wav")
+        write_wav(path, minutes, args.sample_rate, args.channels)
+        try:
+            for method in args.method or ["full", "reader"]:
+                row = measure(method, path, args.segment_seconds)
+                report[f"{method}@{minutes:g}m"] = row
+                print(f"{method:>6} {minutes:>6g} min: peak RSS {row['peak_rss_mb']} MB (+{row['growth_mb']} MB)")
+        finally:
+            os.remove(path)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
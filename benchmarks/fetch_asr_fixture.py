@@ -0,0 +1,115 @@
+"""
+Fetches the pinned ASR benchmark fixture used by benchmarks/asr_backends.py.
+
+    python benchmarks/fetch_asr_fixture.py                      # -> benchmarks/fixtures/asr/
+    python benchmarks/fetch_asr_fixture.py --clips-per-speaker 5
+    python benchmarks/asr_backends.py --output asr_report.md
+
+The clips come from LibriSpeech test-clean (CC BY 4.0), whose archive is checked
+against the SHA-256 torchaudio pins for it, so every machine benchmarks the same
+audio. From each of its 40 speakers the first --clips-per-speaker utterances (by
+utterance id) are decoded with ffmpeg to 16 kHz mono WAV and listed with their
+reference transcripts in manifest.jsonl. The archive (~350 MB) is cached and only
+downloaded once; the fixture itself is not committed.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tarfile
+import argparse
+import subprocess
+import urllib.request
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUT = os.path.join(ROOT, "benchmarks", "fixtures", "asr")
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "asr-fixture")
+
+ARCHIVE_URL = "https://www.openslr.org/resources/12/test-clean.tar.gz"
+ARCHIVE_SHA256 = "39fde525e59672dc6d1551919b1478f724438a95aa55f874b576be21967e6c23"
+
+
+def sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fetch_archive(url: str, cache_dir: str) -> str:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, os.path.basename(url))
+    if os.path.exists(path) and sha256(path) == ARCHIVE_SHA256:
+        return path
+
+    print(f"Downloading {url}...", file=sys.stderr)
+    with urllib.request.urlopen(url) as response, open(f"{path}.part", "wb") as f:
+        shutil.copyfileobj(response, f, 1 << 20)
+    actual = sha256(f"{path}.part")
+    if actual != ARCHIVE_SHA256:
+        os.remove(f"{path}.part")
+        raise SystemExit(f"Checksum mismatch for {url}: {actual}, expected {ARCHIVE_SHA256}")
+    os.replace(f"{path}.part", path)
+    return path
+
+
+def select_clips(archive_path: str, clips_per_speaker: int):
+    """Reference transcripts of the chosen utterances: {utterance_id: text}."""
+    transcripts = {}
+    with tarfile.open(archive_path) as archive:
+        for member in archive:
+            if member.isfile() and member.name.endswith(".trans.txt"):
+                for line in archive.extractfile(member).read().decode("utf-8").splitlines():
+                    utterance_id, _, text = line.partition(" ")
+                    transcripts[utterance_id] = text.lower()
+
+    by_speaker = defaultdict(list)
+    for utterance_id in sorted(transcripts):
+        by_speaker[utterance_id.split("-")[0]].append(utterance_id)
+    return {u: transcripts[u] for ids in by_speaker.values() for u in ids[:clips_per_speaker]}
+
+
+def build_fixture(archive_path: str, out_dir: str, clips_per_speaker: int) -> int:
+    chosen = select_clips(archive_path, clips_per_speaker)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    with tarfile.open(archive_path) as archive:
+        for member in archive:
+            utterance_id = os.path.basename(member.name)[:-len(".flac")]
+            if not member.name.endswith(".flac") or utterance_id not in chosen:
+                continue
+            wav = f"{utterance_id}.wav"
+            subprocess.run(
+                ["ffmpeg", "-loglevel", "error", "-y", "-i", "pipe:0", "-ar", "16000", "-ac", "1",
+                 "-c:a", "pcm_s16le", os.path.join(out_dir, wav)],
+                input=archive.extractfile(member).read(), check=True
+            )
+            manifest.append({"audio": wav, "text": chosen[utterance_id]})
+
+    manifest.sort(key=lambda clip: clip["audio"])
+    with open(os.path.join(out_dir, "manifest.jsonl"), "w") as f:
+        for clip in manifest:
+            f.write(json.dumps(clip) + "\n")
+    return len(manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Fixture directory (manifest.jsonl + WAVs)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="Where the downloaded archive is kept")
+    parser.add_argument("--url", default=ARCHIVE_URL, help="Archive URL or mirror; the checksum still applies")
+    parser.add_argument("--clips-per-speaker", type=int, default=2)
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        raise SystemExit("ffmpeg is required to decode the FLAC clips")
+    archive_path = fetch_archive(args.url, args.cache)
+    count = build_fixture(archive_path, args.out, args.clips_per_speaker)
+    print(f"Wrote {count} clips and manifest.jsonl to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
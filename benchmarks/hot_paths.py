@@ -0,0 +1,250 @@
+"""
+Micro-benchmarks for the text-analytics hot paths, with stored baselines.
+
+    python benchmarks/hot_paths.py                                  # default grid, compare with baseline
+    python benchmarks/hot_paths.py --sentences 1000 --speakers 10 --bench get_sentiment
+    python benchmarks/hot_paths.py --save-baseline                  # record the current numbers
+
+Transcripts come from loadtest.transcripts (deterministic for a given size and seed);
+LLM output is the fake server's canned analysis, so nothing leaves the machine.
+Reported per benchmark and transcript size:
+    ops_per_sec   whole-transcript operations per second (best of --repeat timed rounds)
+    items_per_sec the same in sentences (or responses) per second
+    peak_kib      peak traced Python memory during one operation (tracemalloc)
+    alloc_blocks  memory blocks allocated by one operation and still live when it returns
+                  (its result included)
+A run is a regression when ops/sec drops, or peak memory grows, by more than
+--tolerance against benchmarks/baselines/hot_paths.json; the script then exits 1.
+Baselines are machine specific: record them on the machine that compares against them.
+The baseline file notes the machine it was recorded on under "_machine", and a run on a
+different machine says so before comparing.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loadtest.fake_llm_server import DEFAULT_ANALYSIS
+from loadtest.transcripts import generate_lines, make_people
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "hot_paths.json")
+# (sentences, speakers)
+DEFAULT_CASES = [(10, 2), (1000, 10), (10000, 20), (100000, 50)]
+
+
+def canned_response(name: str) -> str:
+    """LLM reply as the models actually send it: prose around a fenced JSON object."""
+    analysis = dict(DEFAULT_ANALYSIS, tasks=[dict(t, assigned_to=name) for t in DEFAULT_ANALYSIS["tasks"]] * 3)
+    return f"Here is the analysis for {name}:\n```json\n{json.dumps(analysis, indent=2)}\n```\nLet me know if you need more."
+
+
+def build_case(sentences: int, speakers: int) -> dict:
+    people = make_people(speakers)
+    lines = generate_lines(sentences, people)
+    speaker_ids = {p["name"]: f"Speaker_{i}" for i, p in enumerate(people)}
+    return {
+        "people": people,
+        "texts": [line["text"] for line in lines],
+        "transcript": "\n".join(f"{line['speaker']}: {line['text']}" for line in lines),
+        # Diarized form, as SpeakerRoleInferencePipeline sees it
+        "entries": [{"speaker": speaker_ids[line["speaker"]], "text": line["text"]} for line in lines],
+        "role_mapping": {sid: p["role"] for p, sid in zip(people, speaker_ids.values())},
+        "responses": [canned_response(p["name"]) for p in people],
+    }
+
+
+def _clean_text(case):
+    from sentiment import clean_text
+    texts = case["texts"]
+    return lambda: [clean_text(t) for t in texts], len(texts)
+
+
+def _get_sentiment(case):
+    from sentiment import get_analyzer, get_sentiment
+    get_analyzer()  # Lexicon load is a one-off, not part of the hot path
+    texts = case["texts"]
+    return lambda: [get_sentiment(t) for t in texts], len(texts)
+
+
+def _rolling(module_name):
+    def setup(case):
+        module = __import__(module_name)
+        transcript, name = case["transcript"], case["people"][0]["name"]
+        return lambda: module.get_rolling_sentiment_from_transcript(transcript, name), len(case["texts"])
+    return setup
+
+
+def _parse_response(case):
+    from utils import parse_response
+    responses = case["responses"]
+    return lambda: [parse_response(r) for r in responses], len(responses)
+
+
+def _compact_turns(case):
+    from modules.utils.prompt_compaction import compact_turns
+    transcript = case["transcript"]
+    return lambda: compact_turns(transcript, 4000), len(case["texts"])
+
+
+def _role_pipeline():
+    from modules.pipelines.speaker_role_inference import SpeakerRoleInferencePipeline
+    return SpeakerRoleInferencePipeline("benchmark.wav")
+
+
+def _sample_utterances(case):
+    pipeline, entries = _role_pipeline(), case["entries"]
+    return lambda: pipeline.sample_utterances(entries), len(entries)
+
+
+def _label_full_transcript(case):
+    pipeline, entries, mapping = _role_pipeline(), case["entries"], case["role_mapping"]
+    return lambda: pipeline.label_full_transcript(entries, mapping), len(entries)
+
+
+BENCHMARKS = {
+    "clean_text": _clean_text,
+    "get_sentiment": _get_sentiment,
+    "rolling_sentiment.utils": _rolling("utils"),
+    "rolling_sentiment.processor": _rolling("processor"),
+    "parse_response": _parse_response,
+    "compact_turns": _compact_turns,
+    "sample_utterances": _sample_utterances,
+    "label_full_transcript": _label_full_transcript,
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    # Several hot paths print per sentence; keep that out of the report (but in the timing)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(op, items: int, min_time: float, repeat: int) -> dict:
+    with quiet():
+        op()  # Warm caches and imports
+
+        # Enough calls per round to last min_time, then keep the best round
+        t0 = time.perf_counter()
+        op()
+        single = max(time.perf_counter() - t0, 1e-9)
+        number = max(1, int(min_time / single))
+        best = float("inf")
+        for _ in range(repeat):
+            gc.collect()
+            t0 = time.perf_counter()
+            for _ in range(number):
+                op()
+            best = min(best, (time.perf_counter() - t0) / number)
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = op()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        del result
+
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "ops_per_sec": round(1 / best, 3),
+        "items_per_sec": round(items / best, 1),
+        "peak_kib": round(peak / 1024, 1),
+        "alloc_blocks": retained,
+    }
+
+
+def machine_info() -> dict:
+    cpu = platform.processor() or platform.machine()
+    memory_mb = None
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+        with open("/proc/meminfo") as f:
+            memory_mb = next((int(line.split()[1]) // 1024 for line in f if line.startswith("MemTotal:")), None)
+    except OSError:
+        pass
+    return {"cpu": cpu, "cores": os.cpu_count(), "memory_mb": memory_mb,
+            "platform": platform.platform(), "python": platform.python_version()}
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for key, row in report.items():
+        base = baseline.get(key)
+        if not isinstance(base, dict) or "ops_per_sec" not in base:
+            continue  # Not measured yet, or metadata such as "_machine"
+        if row["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: {row['ops_per_sec']} ops/s vs baseline {base['ops_per_sec']}")
+        if row["peak_kib"] > base["peak_kib"] * (1 + tolerance) + 64:  # Small absolute slack for noise
+            regressions.append(f"{key}: peak {row['peak_kib']} KiB vs baseline {base['peak_kib']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bench", action="append", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sentences", type=int, action="append", help="Transcript sizes (with --speakers)")
+    parser.add_argument("--speakers", type=int, action="append", help="Speaker counts (with --sentences)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds per timed round")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Merge these results into the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    if args.sentences or args.speakers:
+        cases = [(n, s) for n in args.sentences or [1000] for s in args.speakers or [10]]
+    else:
+        cases = DEFAULT_CASES
+
+    report = {}
+    for sentences, speakers in cases:
+        case = build_case(sentences, speakers)
+        for name in args.bench or BENCHMARKS:
+            op, items = BENCHMARKS[name](case)
+            row = measure(op, items, args.min_time, args.repeat)
+            key = f"{name}@{sentences}x{speakers}"
+            report[key] = row
+            print(f"{key:<44} {row['ops_per_sec']:>12.3f} ops/s {row['items_per_sec']:>12.1f} items/s "
+                  f"peak {row['peak_kib']:>10.1f} KiB  blocks {row['alloc_blocks']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **report, "_machine": machine_info()}, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    recorded_on, here = baseline.get("_machine"), machine_info()
+    if recorded_on and any(recorded_on.get(k) != here[k] for k in ("cpu", "cores", "memory_mb")):
+        print(f"Baseline was recorded on a different machine ({recorded_on}); expect noise")
+    regressions = compare(report, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
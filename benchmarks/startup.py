@@ -0,0 +1,59 @@
+"""
+Measures how long `import app` takes and how much memory the process holds afterwards.
+
+Each measurement runs in a fresh interpreter so module caches do not leak between runs:
+    python benchmarks/startup.py --runs 5 --mode lazy --mode eager
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, time
+t0 = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t0
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import_seconds": elapsed, "max_rss_mb": rss_kb / 1024}))
+"""
+
+
+def measure(mode: str) -> dict:
+    env = dict(os.environ, APP_STARTUP_MODE=mode, SCHEDULER_MODE="off")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", action="append", help="APP_STARTUP_MODE value(s) to compare")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.mode or ["lazy", "eager"]:
+        runs = [measure(mode) for _ in range(args.runs)]
+        report[mode] = {
+            "import_seconds_median": statistics.median(r["import_seconds"] for r in runs),
+            "max_rss_mb_median": statistics.median(r["max_rss_mb"] for r in runs),
+            "runs": runs,
+        }
+        print(f"{mode:>6}: import {report[mode]['import_seconds_median']:.2f}s, "
+              f"RSS {report[mode]['max_rss_mb_median']:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
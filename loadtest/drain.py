@@ -0,0 +1,77 @@
+"""
+Measures how fast the scheduler drains a backlog of unprocessed meetings.
+
+    python -m loadtest.drain --meetings 200 --speakers 4 --sentences 100 --latency-ms 600
+
+Seeds the backlog with loadtest.seed, starts an in-process fake LLM server (unless
+--llm-url is given), then calls processor.process_new_meetings() the way the scheduler
+does until nothing is left, recording meetings and transcript rows drained per second.
+"""
+import os
+import time
+import argparse
+
+from loadtest.results import latency_summary, write_result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=50)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--sentences", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-url", help="Use an already running fake server instead of starting one")
+    parser.add_argument("--max-ticks", type=int, default=1000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    server = None
+    if not args.llm_url:
+        from loadtest.fake_llm_server import serve
+        server = serve(port=0, latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, error_rate=args.error_rate)
+        args.llm_url = f"http://127.0.0.1:{server.server_address[1]}"
+    # Must be set before the Groq client is first built
+    os.environ["GROQ_BASE_URL"] = args.llm_url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+
+    from loadtest.seed import seed_meetings
+    from models import MeetingTranscript
+    from modules.db.session import ReadOnlySessionLocal
+    from processor import process_new_meetings
+
+    def backlog():
+        with ReadOnlySessionLocal() as db:
+            return db.query(MeetingTranscript).filter(MeetingTranscript.processed == False).count()
+
+    seed_meetings(args.meetings, args.speakers, args.sentences)
+    initial = backlog()
+
+    tick_latencies = []
+    started = time.perf_counter()
+    for _ in range(args.max_ticks):
+        if backlog() == 0:
+            break
+        tick_started = time.perf_counter()
+        process_new_meetings()
+        tick_latencies.append(time.perf_counter() - tick_started)
+    elapsed = time.perf_counter() - started
+    remaining = backlog()
+
+    if server:
+        server.shutdown()
+
+    drained = initial - remaining
+    write_result("drain", {k: v for k, v in vars(args).items() if k != "output"}, {
+        "elapsed_s": round(elapsed, 2),
+        "transcript_rows_drained": drained,
+        "transcript_rows_remaining": remaining,
+        "rows_per_second": round(drained / elapsed, 2) if elapsed else 0.0,
+        "meetings_per_second": round(args.meetings * drained / max(initial, 1) / elapsed, 3) if elapsed else 0.0,
+        "ticks": len(tick_latencies),
+        "tick_latency": latency_summary(tick_latencies),
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
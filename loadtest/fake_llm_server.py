@@ -0,0 +1,188 @@
+"""
+Local stand-in for the Groq/OpenAI chat completions API, for load tests without network.
+
+    python -m loadtest.fake_llm_server --port 8089 --latency-ms 800 --jitter-ms 300 --error-rate 0.02
+
+Point the app at it with:
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=fake
+
+Answers POST /openai/v1/chat/completions (Groq's path) and /v1/chat/completions, with
+or without "stream": true. Role-classification prompts get a speaker->role mapping;
+every other prompt gets the canned analysis JSON (override with --canned file.json).
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANALYSIS = {
+    "sentiment_score": 0.72,
+    "skills": ["Stakeholder communication", "Sprint planning", "Data analysis"],
+    "tasks": [
+        {
+            "task": "Prepare the weekly report",
+            "assigned_by": "Manager",
+            "assigned_to": "Employee",
+            "deadline": "Friday",
+            "status": "Pending"
+        }
+    ]
+}
+
+SPEAKER = re.compile(r"\b(Speaker_\d+)\b")
+
+
+class FakeLLMState:
+    def __init__(self, latency_ms, jitter_ms, error_rate, canned, chunk_chars):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.canned = canned
+        self.chunk_chars = chunk_chars
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def delay(self) -> float:
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+
+    def content_for(self, prompt: str) -> str:
+        speakers = sorted(set(SPEAKER.findall(prompt)))
+        if "role classifier" in prompt and speakers:
+            return json.dumps({speaker: random.choice(["Product Manager", "Technical Engineer", "Client Lead"])
+                               for speaker in speakers})
+        return json.dumps(self.canned)
+
+
+def make_handler(state: FakeLLMState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    return self._json(200, {"requests": state.requests, "errors": state.errors,
+                                            "cancelled": state.cancelled})
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._json(404, {"error": {"message": "not found"}})
+
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+
+            with state.lock:
+                state.requests += 1
+                failed = random.random() < state.error_rate
+                if failed:
+                    state.errors += 1
+
+            time.sleep(state.delay())
+            if failed:
+                return self._json(random.choice([429, 500, 503]), {"error": {"message": "injected failure"}})
+
+            content = state.content_for(prompt)
+            usage = {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(prompt) + len(content)) // 4,
+            }
+            model = payload.get("model", "fake-model")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+            if not payload.get("stream"):
+                return self._json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": usage,
+                })
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            step = state.chunk_chars
+            self.close_connection = True
+            try:
+                for i in range(0, len(content), step):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Client hung up early, e.g. it already had every field it needed
+                with state.lock:
+                    state.cancelled += 1
+
+    return Handler
+
+
+def serve(port=8089, latency_ms=500.0, jitter_ms=150.0, error_rate=0.0, canned=None, chunk_chars=8,
+          host="127.0.0.1"):
+    """Starts the fake server on a background thread and returns it; call .shutdown() to stop."""
+    state = FakeLLMState(latency_ms, jitter_ms, error_rate, canned or DEFAULT_ANALYSIS, chunk_chars)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-chars", type=int, default=8, help="Characters per streamed delta")
+    parser.add_argument("--canned", help="JSON file returned as the analysis response")
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with open(args.canned) as f:
+            canned = json.load(f)
+
+    server = serve(args.port, args.latency_ms, args.jitter_ms, args.error_rate, canned, args.chunk_chars, args.host)
+    print(f"Fake LLM server listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Shared helpers for writing comparable load-test results."""
+import os
+import json
+import time
+import platform
+import subprocess
+from typing import Dict, List
+
+RESULTS_DIR = os.getenv("LOADTEST_RESULTS_DIR", os.path.join(os.path.dirname(__file__), "results"))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower, upper = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 50), 1),
+        "p95_ms": round(1000 * percentile(latencies, 95), 1),
+        "p99_ms": round(1000 * percentile(latencies, 99), 1),
+        "max_ms": round(1000 * max(latencies), 1) if latencies else 0.0,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def write_result(name: str, config: Dict, metrics: Dict, output: str = None) -> str:
+    """Writes one run as JSON, tagged with the git revision so runs can be compared."""
+    path = output or os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "name": name,
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": {"python": platform.python_version(), "cpus": os.cpu_count()},
+            "config": config,
+            "metrics": metrics,
+        }, f, indent=2)
+    print(json.dumps(metrics, indent=2))
+    print(f"Results written to {path}")
+    return path
@@ -0,0 +1,68 @@
+"""
+Fills a local Postgres with synthetic meetings whose transcripts are still unprocessed.
+
+    DATABASE_URL=postgresql://localhost/loadtest python -m loadtest.seed --meetings 500 --speakers 5 --sentences 200
+
+Never point this at a production database: it inserts employees and meetings.
+"""
+import time
+import argparse
+from uuid import uuid4
+from typing import List
+
+from models import Employee, Meeting, MeetingTranscript, init_db
+from modules.db.session import session_scope
+from loadtest.transcripts import generate_lines, make_people
+
+
+def seed_employees(num_speakers: int):
+    people = make_people(num_speakers)
+    with session_scope() as db:
+        existing = {name for (name,) in db.query(Employee.name)}
+        for person in people:
+            if person["name"] not in existing:
+                db.add(Employee(
+                    name=person["name"],
+                    email=f"{person['name'].lower()}@example.com",
+                    role=person["role"],
+                    status="active"
+                ))
+    return people
+
+
+def seed_meetings(num_meetings: int, num_speakers: int, num_sentences: int,
+                  batch_size: int = 50, seed: int = 0) -> List[str]:
+    """Inserts meetings with one MeetingTranscript row per utterance; returns the meeting ids."""
+    init_db()
+    people = seed_employees(num_speakers)
+    meeting_ids = []
+
+    for start in range(0, num_meetings, batch_size):
+        with session_scope() as db:
+            for i in range(start, min(start + batch_size, num_meetings)):
+                meeting_id = f"loadtest-{uuid4()}"
+                db.add(Meeting(id=meeting_id, title=f"Load test meeting {i}"))
+                db.flush()
+                db.add_all(
+                    MeetingTranscript(meeting_id=meeting_id, name=line["speaker"], text=line["text"], processed=False)
+                    for line in generate_lines(num_sentences, people, seed + i)
+                )
+                meeting_ids.append(meeting_id)
+    return meeting_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=100)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--sentences", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ids = seed_meetings(args.meetings, args.speakers, args.sentences, seed=args.seed)
+    print(f"Seeded {len(ids)} meetings in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Deterministic synthetic meeting transcripts for load tests and benchmarks."""
+import random
+from typing import Dict, List
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "Dan", "Erin", "Farah", "Gita", "Hugo", "Ivan", "Jia",
+               "Kofi", "Lena", "Mo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tariq"]
+ROLES = ["Manager", "Employee", "Employee", "Employee", "HR"]
+
+OPENERS = ["I think", "Honestly", "Great news,", "Unfortunately", "Just to confirm,", "So", "Okay,"]
+SUBJECTS = ["the release", "the client demo", "the weekly report", "the migration", "the budget",
+            "our onboarding flow", "the API latency", "the hiring plan", "the quarterly review"]
+VERBS = ["is on track", "slipped a few days", "needs another review", "went really well",
+         "is blocked on legal", "looks risky", "is almost done", "needs more testing"]
+ASKS = ["Can you prepare the weekly report by Friday?", "Please update the roadmap before Monday.",
+        "I'll handle the client meeting next week.", "Let's sync again tomorrow.",
+        "Could you review the pull request today?", ""]
+FILLERS = ["Hello, can you hear me?", "Yeah.", "Okay.", "Um, right.", "Sorry, you were on mute."]
+
+
+def make_people(num_speakers: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    people = []
+    for i in range(num_speakers):
+        name = FIRST_NAMES[i % len(FIRST_NAMES)] + ("" if i < len(FIRST_NAMES) else str(i // len(FIRST_NAMES)))
+        people.append({"name": name, "role": "Manager" if i == 0 else rng.choice(ROLES)})
+    return people
+
+
+def sentence(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return rng.choice(FILLERS)
+    text = f"{rng.choice(OPENERS)} {rng.choice(SUBJECTS)} {rng.choice(VERBS)}."
+    ask = rng.choice(ASKS)
+    return f"{text} {ask}".strip()
+
+
+def generate_lines(num_sentences: int, people: List[Dict[str, str]], seed: int = 0) -> List[Dict[str, str]]:
+    """Returns [{"speaker": name, "text": sentence}], with speakers taking turns at random."""
+    rng = random.Random(seed)
+    return [{"speaker": rng.choice(people)["name"], "text": sentence(rng)} for _ in range(num_sentences)]
+
+
+def generate_transcript(num_sentences: int, num_speakers: int, seed: int = 0):
+    """Returns (people, transcript text in "Name: sentence" lines)."""
+    people = make_people(num_speakers, seed)
+    lines = generate_lines(num_sentences, people, seed)
+    return people, "\n".join(f"{line['speaker']}: {line['text']}" for line in lines)
@@ -0,0 +1,100 @@
+"""
+Measures /upload_transcript throughput and tail latency under concurrency.
+
+Start the fake LLM server and the app against it first, e.g.
+    python -m loadtest.fake_llm_server --latency-ms 600 &
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=fake SCHEDULER_MODE=off python app.py &
+then
+    python -m loadtest.upload_driver --url http://127.0.0.1:5000 --requests 200 --concurrency 16
+
+Each request uploads a fresh synthetic meeting; pass --async to measure the 202 path.
+"""
+import time
+import json
+import uuid
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest.results import latency_summary, write_result
+from loadtest.transcripts import generate_transcript
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: text/plain\r\n\r\n'.encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def upload(url: str, index: int, sentences: int, speakers: int, use_async: bool, timeout: float):
+    people, transcript = generate_transcript(sentences, speakers, seed=index)
+    fields = {"meeting_id": f"loadtest-{uuid.uuid4()}", "people_info": json.dumps(people)}
+    if use_async:
+        fields["async"] = "1"
+    body, content_type = multipart(fields, {"transcript": ("transcript.txt", transcript.encode())})
+    request = urllib.request.Request(f"{url}/upload_transcript", data=body, headers={"Content-Type": content_type})
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0  # Connection error or client timeout
+    return status, time.perf_counter() - started
+
+
+def run(url, requests, concurrency, sentences, speakers, use_async=False, timeout=300.0):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda i: upload(url, i, sentences, speakers, use_async, timeout), range(requests)
+        ))
+    elapsed = time.perf_counter() - started
+
+    ok = [latency for status, latency in results if 200 <= status < 300]
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "success_rate": round(len(ok) / len(results), 4) if results else 0.0,
+        "statuses": statuses,
+        "latency": latency_summary(ok),
+        "latency_all": latency_summary([latency for _, latency in results]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sentences", type=int, default=100)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--output", help="Result file (default: loadtest/results/upload-<time>.json)")
+    args = parser.parse_args()
+
+    config = {k: v for k, v in vars(args).items() if k != "output"}
+    metrics = run(args.url, args.requests, args.concurrency, args.sentences, args.speakers,
+                  args.use_async, args.timeout)
+    write_result("upload", config, metrics, args.output)
+
+
+if __name__ == "__main__":
+    main()
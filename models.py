@@ -5,26 +5,23 @@ from sqlalchemy import (
     Integer,
     String,
     Float,
-    create_engine,
     ForeignKey,
     DateTime,
+    Date,
     UniqueConstraint,
-    Text
+    Index,
+    Text,
+    func
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship
 from datetime import datetime
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from functools import lru_cache
+# SessionLocal is re-exported so existing `from models import SessionLocal` callers keep working
+from modules.db.session import SessionLocal, get_engine  # noqa: F401
 
 Base = declarative_base()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-
 
 class Meeting(Base):
     __tablename__ = "meeting"
@@ -117,8 +114,122 @@ class TaskRecommendation(Base):
     status = Column(String)
 
 
-# Base.metadata.drop_all(bind=engine)  # Uncomment to reset tables
-Base.metadata.create_all(bind=engine)
+class EmployeeDailyStats(Base):
+    """Per-employee, per-day rollup maintained incrementally by modules.aggregates."""
+    __tablename__ = "employee_daily_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    employee_name = Column(String, nullable=False, index=True)
+    day = Column(Date, nullable=False, index=True)
+    role = Column(String)
+
+    meeting_count = Column(Integer, default=0, nullable=False)
+    sentiment_sum = Column(Float, default=0.0, nullable=False)
+    sentiment_count = Column(Integer, default=0, nullable=False)
+    open_task_count = Column(Integer, default=0, nullable=False)
+    skill_counts = Column(JSON, default=dict)  # {"skill": times recommended}
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("employee_name", "day", name="_unique_employee_day"),
+    )
+
+
+class AnalysisJob(Base):
+    """Work accepted by /upload_transcript in async mode or by /bulk_upload, run by modules.jobs."""
+    __tablename__ = "analysis_job"
+    id = Column(String, primary_key=True, index=True)  # UUID as String
+    kind = Column(String, nullable=False, default="transcript")  # transcript | bulk
+    meeting_id = Column(String, index=True)  # None for bulk jobs, which cover many meetings
+    status = Column(String, nullable=False, default="queued", index=True)  # queued | running | succeeded | failed
+    people_info = Column(JSON)
+    transcript = Column(Text)  # Raw upload (bulk: spooled records), kept so a job can be retried
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EmployeeVoiceprint(Base):
+    """A speaker embedding enrolled for an employee; see modules.voiceprints."""
+    __tablename__ = "employee_voiceprint"
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey("employee.id", ondelete="CASCADE"), nullable=False, index=True)
+    model_name = Column(String, nullable=False, default="titanet_large")
+    embedding = Column(JSON, nullable=False)  # L2-normalised float list
+    source = Column(String)  # Enrollment clip or meeting the sample came from
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    employee = relationship("Employee", backref="voiceprints")
+
+
+class TaskSignature(Base):
+    """MinHash signature of a canonical task, for near-duplicate lookup; see modules.task_dedup."""
+    __tablename__ = "task_signature"
+    task_id = Column(Integer, ForeignKey("task_recommendation.id", ondelete="CASCADE"), primary_key=True)
+    assignee = Column(String, nullable=False, index=True)  # Normalised assigned_to
+    minhash = Column(JSON, nullable=False)
+
+
+class TaskLSHBand(Base):
+    """One LSH band hash of a task signature; tasks sharing a band with a new task are its candidates."""
+    __tablename__ = "task_lsh_band"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, ForeignKey("task_recommendation.id", ondelete="CASCADE"), nullable=False, index=True)
+    assignee = Column(String, nullable=False)
+    band = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_task_lsh_band_lookup", "assignee", "band"),
+    )
+
+
+class TaskMention(Base):
+    """A meeting in which a (possibly deduplicated) task came up, with what was said about it then."""
+    __tablename__ = "task_mention"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, ForeignKey("task_recommendation.id", ondelete="CASCADE"), nullable=False, index=True)
+    meeting_id = Column(String, ForeignKey("meeting.id", ondelete="CASCADE"), nullable=False, index=True)
+    task = Column(String)  # Wording used in this meeting
+    deadline = Column(String)
+    status = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LLMBudget(Base):
+    """Shared LLM rate-limit bucket state when LLM_BUDGET_STORE=postgres; see modules.llm_budget."""
+    __tablename__ = "llm_budget"
+    key = Column(String, primary_key=True)
+    state = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Indexes added after the tables first shipped. create_all only builds indexes with new
+# tables, so init_db also creates these one by one on existing databases.
+SECONDARY_INDEXES = [
+    Index("ix_employee_skills_meeting_id", EmployeeSkills.meeting_id),
+    Index("ix_employee_skills_employee_name", EmployeeSkills.employee_name),
+    Index("ix_skill_recommendation_name_meeting", SkillRecommendation.name, SkillRecommendation.meeting_id),
+    Index("ix_task_recommendation_meeting_id", TaskRecommendation.meeting_id),
+    Index("ix_task_recommendation_assigned_by", TaskRecommendation.assigned_by),
+    Index("ix_task_recommendation_assigned_to", TaskRecommendation.assigned_to),
+    # Open task counts (modules.aggregates) match names case-insensitively
+    Index("ix_task_recommendation_lower_assigned_to", func.lower(TaskRecommendation.assigned_to)),
+    Index("ix_employee_daily_stats_lower_name_day",
+          func.lower(EmployeeDailyStats.employee_name), EmployeeDailyStats.day),
+    Index("ix_rolling_sentiment_name", RollingSentiment.name),
+    Index("ix_meeting_created_at", Meeting.created_at),
+]
+
+
+@lru_cache(maxsize=1)
+def init_db():
+    """Creates missing tables once per process, on first use rather than at import."""
+    engine = get_engine()
+    # Base.metadata.drop_all(bind=engine)  # Uncomment to reset tables
+    Base.metadata.create_all(bind=engine)
+    for index in SECONDARY_INDEXES:
+        index.create(bind=engine, checkfirst=True)
+    return True
 
 
 # Optional utility to insert rolling sentiment
@@ -0,0 +1,196 @@
+"""
+Admission control for the endpoints that wait on the LLM.
+
+Each guarded endpoint lets at most `limit` requests run at once and parks up to
+`max_queue` more for at most `queue_timeout` seconds; anything beyond that is
+turned away straight away instead of tying up another server thread:
+
+    429  the queue is full                        (this client should slow down)
+    503  queued too long, or every LLM provider's breaker is open   (we are overloaded)
+
+both with a Retry-After estimated from how long requests here have been taking.
+The limit follows the LLM: it shrinks towards `min_in_flight` as the router's p95
+latency rises above ADMISSION_TARGET_LATENCY and grows back to `max_in_flight` as
+it recovers. Limits are per process; size them per worker.
+
+    ADMISSION_UPLOAD_TRANSCRIPT_MAX_IN_FLIGHT=8 ADMISSION_UPLOAD_TRANSCRIPT_QUEUE=16
+"""
+import os
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# p95 LLM latency (seconds) the in-flight limits are sized for
+ADMISSION_TARGET_LATENCY = float(os.getenv("ADMISSION_TARGET_LATENCY", "10"))
+# How often limits are re-derived from router latency
+ADMISSION_ADAPT_INTERVAL = float(os.getenv("ADMISSION_ADAPT_INTERVAL", "5"))
+MAX_RETRY_AFTER = 120
+
+# endpoint: (max_in_flight, max_queue, queue_timeout seconds)
+DEFAULT_LIMITS = {
+    "upload_transcript": (8, 16, 5.0),
+    "process_unprocessed": (1, 0, 0.0),
+}
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of admitting a request; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, endpoint: str, status: int, retry_after: int, reason: str):
+        super().__init__(f"{endpoint}: {reason}")
+        self.endpoint = endpoint
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def _router_health():
+    """(p95 latency or None, whether any provider is usable); (None, True) when the router is unavailable."""
+    try:
+        from modules.llm import get_router
+        router = get_router()
+        healthy = any(p.breaker.state != "open" for p in router.providers)
+        return router.latency_percentile(95), healthy
+    except Exception as e:
+        logger.debug(f"Admission control cannot read router health: {e}")
+        return None, True
+
+
+class AdmissionController:
+    """Bounded in-flight count plus a short, bounded wait queue for one endpoint."""
+
+    def __init__(self, endpoint: str, max_in_flight: int, max_queue: int, queue_timeout: float,
+                 min_in_flight: int = 1, health=_router_health):
+        self.endpoint = endpoint
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_in_flight = max(1, min(min_in_flight, self.max_in_flight))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.health = health
+        self.limit = self.max_in_flight
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = {429: 0, 503: 0}
+        self.healthy = True
+        self.duration = None  # EWMA of admitted request durations, seconds
+        self._adapted_at = 0.0
+        self._cond = threading.Condition()
+
+    def _adapt(self):
+        """Moves the limit halfway towards what the current LLM latency supports."""
+        with self._cond:
+            now = time.monotonic()
+            if now - self._adapted_at < ADMISSION_ADAPT_INTERVAL:
+                return
+            self._adapted_at = now
+        p95, healthy = self.health()  # Outside the lock: the first call may build the router
+        if p95 is None:
+            target = self.max_in_flight
+        else:
+            target = self.max_in_flight * min(1.0, ADMISSION_TARGET_LATENCY / max(p95, 1e-3))
+        target = min(self.max_in_flight, max(self.min_in_flight, target))
+
+        with self._cond:
+            self.healthy = healthy
+            halfway = (self.limit + target) / 2
+            limit = math.floor(halfway) if target < self.limit else math.ceil(halfway)
+            if limit != self.limit:
+                logger.info(f"Admission limit for {self.endpoint}: {self.limit} -> {limit} (LLM p95 {p95 or 0:.1f}s)")
+                self.limit = limit
+                self._cond.notify_all()
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a newcomer behind the current queue."""
+        per_request = self.duration or ADMISSION_TARGET_LATENCY
+        estimate = per_request * (self.waiting + 1) / max(self.limit, 1)
+        return int(min(MAX_RETRY_AFTER, max(1, math.ceil(estimate))))
+
+    def _reject(self, status: int, reason: str):
+        self.rejected[status] += 1
+        raise AdmissionRejected(self.endpoint, status, self.retry_after(), reason)
+
+    def acquire(self):
+        self._adapt()
+        with self._cond:
+            if not self.healthy:
+                self._reject(503, "no LLM provider is available")
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return
+            if self.waiting >= self.max_queue:
+                self._reject(429, "too many requests in flight")
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject(503, "timed out waiting for capacity")
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self, duration: float):
+        with self._cond:
+            self.in_flight -= 1
+            self.duration = duration if self.duration is None else 0.8 * self.duration + 0.2 * duration
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self):
+        """Runs the block once admitted; raises AdmissionRejected if the request is shed."""
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "max_queue": self.max_queue,
+                "rejected": dict(self.rejected),
+                "avg_duration_s": round(self.duration, 2) if self.duration is not None else None,
+            }
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(endpoint: str) -> AdmissionController:
+    """Controller for `endpoint`, configured from ADMISSION_<ENDPOINT>_MAX_IN_FLIGHT / _QUEUE / _QUEUE_TIMEOUT / _MIN_IN_FLIGHT."""
+    with _controllers_lock:
+        if endpoint not in _controllers:
+            in_flight, queue, timeout = DEFAULT_LIMITS.get(endpoint, (4, 8, 5.0))
+            prefix = f"ADMISSION_{endpoint.upper()}"
+            _controllers[endpoint] = AdmissionController(
+                endpoint,
+                max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", str(in_flight))),
+                max_queue=int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+                queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", str(timeout))),
+                min_in_flight=int(os.getenv(f"{prefix}_MIN_IN_FLIGHT", "1")),
+            )
+        return _controllers[endpoint]
+
+
+def admission_snapshot() -> Dict[str, Dict]:
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {c.endpoint: c.snapshot() for c in controllers}
@@ -0,0 +1,159 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models import EmployeeDailyStats, Meeting, init_db
+from modules.db.session import LOCK_DAILY_STATS, advisory_xact_locks, session_scope
+
+logger = logging.getLogger(__name__)
+
+
+def is_open_task(task: Dict) -> bool:
+    return (task.get("status") or "Pending").strip().lower() != "completed"
+
+
+def meeting_day(db, meeting_id: str) -> date:
+    """Aggregates are bucketed by the meeting's creation date."""
+    created_at = db.query(Meeting.created_at).filter(Meeting.id == meeting_id).scalar()
+    return (created_at or datetime.utcnow()).date()
+
+
+def lock_daily_stats(db, keys: Iterable[Tuple[str, date]]):
+    """
+    Locks the (name, day) aggregates a transaction is about to write, all up front and in
+    one fixed order, so meetings sharing participants queue instead of deadlocking. Take
+    it after the task dedup locks (modules.task_dedup.lock_assignees), never before.
+    """
+    advisory_xact_locks(db, LOCK_DAILY_STATS, (f"{name.lower()}|{day.isoformat()}" for name, day in keys))
+
+
+def _locked_row(db, name: str, day: date) -> EmployeeDailyStats:
+    # Insert-if-missing, then lock, so concurrent writers for the same day add up correctly
+    db.execute(
+        pg_insert(EmployeeDailyStats.__table__)
+        .values(employee_name=name, day=day, meeting_count=0, sentiment_sum=0.0,
+                sentiment_count=0, open_task_count=0, skill_counts={})
+        .on_conflict_do_nothing(index_elements=["employee_name", "day"])
+    )
+    return db.query(EmployeeDailyStats).filter(
+        EmployeeDailyStats.employee_name == name,
+        EmployeeDailyStats.day == day
+    ).with_for_update().one()
+
+
+def record_employee_day(db, name: str, role: Optional[str], day: date,
+                        sentiment: Optional[float], skills: Iterable[str]):
+    """
+    Adds one person's results from one meeting to their daily aggregate.
+    Runs in the caller's transaction, so the aggregate commits with the results.
+    Open task counts are derived separately (refresh_open_tasks), since tasks
+    change status or get merged after the meeting that raised them.
+    """
+    row = _locked_row(db, name, day)
+    row.role = role or row.role
+    row.meeting_count += 1
+    if sentiment is not None:
+        row.sentiment_sum += float(sentiment)
+        row.sentiment_count += 1
+
+    skill_counts = dict(row.skill_counts or {})
+    for skill in skills:
+        skill_counts[skill] = skill_counts.get(skill, 0) + 1
+    row.skill_counts = skill_counts  # Reassign so the JSON column is flagged dirty
+
+
+def record_meeting_results(db, meeting_id: str, results: List[Dict]):
+    """Folds the per-person results produced by process_meeting into the aggregates."""
+    day = meeting_day(db, meeting_id)
+    lock_daily_stats(db, [(result["name"], day) for result in results])
+    for result in results:
+        record_employee_day(
+            db, result["name"], result.get("role"), day,
+            result.get("sentiment"), result.get("skills", [])[:3]
+        )
+
+
+# Open tasks raised on a day, counted from the tasks themselves so completions and merges are reflected.
+# Names match case-insensitively (ix_task_recommendation_lower_assigned_to); the incremental
+# refresh and the rebuild share this count so they always agree
+_OPEN_TASK_COUNT = """
+            SELECT COUNT(*)
+              FROM task_recommendation t JOIN meeting m ON m.id = t.meeting_id
+             WHERE LOWER(t.assigned_to) = LOWER(s.employee_name)
+               AND CAST(m.created_at AS DATE) = s.day
+               AND LOWER(TRIM(COALESCE(t.status, ''))) <> 'completed'"""
+
+OPEN_TASKS_SQL = text(f"""
+    UPDATE employee_daily_stats s
+       SET open_task_count = ({_OPEN_TASK_COUNT})
+     WHERE LOWER(s.employee_name) = LOWER(:name) AND s.day = :day
+""")
+
+REBUILD_OPEN_TASKS_SQL = text(f"UPDATE employee_daily_stats s SET open_task_count = ({_OPEN_TASK_COUNT})")
+
+
+def open_task_keys(db, tasks: Iterable) -> List[Tuple[str, date]]:
+    """(assignee, day) aggregate keys that TaskRecommendation rows `tasks` count towards."""
+    tasks = [t for t in tasks if t.assigned_to]
+    created = dict(db.query(Meeting.id, Meeting.created_at).filter(Meeting.id.in_({t.meeting_id for t in tasks})))
+    return [(t.assigned_to, (created.get(t.meeting_id) or datetime.utcnow()).date()) for t in tasks]
+
+
+def refresh_open_tasks(db, keys: Iterable[Tuple[str, date]]):
+    """Recomputes open_task_count for the given (name, day) rows; run it in the transaction that changed the tasks."""
+    keys = sorted(set((name.lower(), day) for name, day in keys))
+    lock_daily_stats(db, keys)  # Already held when the caller locked its keys up front
+    db.flush()
+    for name, day in keys:
+        db.execute(OPEN_TASKS_SQL, {"name": name, "day": day})
+
+
+REBUILD_QUERIES = {
+    "sentiment": text("""
+        SELECT es.employee_name AS name, CAST(m.created_at AS DATE) AS day, MAX(es.role) AS role,
+               COUNT(*) AS meetings, COALESCE(SUM(es.overall_sentiment_score), 0) AS total,
+               COUNT(es.overall_sentiment_score) AS scored
+          FROM employee_skills es JOIN meeting m ON m.id = es.meeting_id
+         GROUP BY 1, 2
+    """),
+    "skills": text("""
+        SELECT s.name AS name, CAST(m.created_at AS DATE) AS day, s.skill_recommendation AS skill,
+               COUNT(*) AS times
+          FROM skill_recommendation s JOIN meeting m ON m.id = s.meeting_id
+         GROUP BY 1, 2, 3
+    """),
+}
+
+
+def rebuild_daily_stats() -> int:
+    """
+    Recomputes employee_daily_stats from the base tables. Only needed once, for
+    history processed before aggregates existed; afterwards updates are incremental.
+    """
+    init_db()
+    rows = {}
+    with session_scope() as db:
+        for r in db.execute(REBUILD_QUERIES["sentiment"]):
+            rows[(r.name, r.day)] = dict(
+                employee_name=r.name, day=r.day, role=r.role, meeting_count=r.meetings,
+                sentiment_sum=float(r.total), sentiment_count=r.scored,
+                open_task_count=0, skill_counts={}
+            )
+        for r in db.execute(REBUILD_QUERIES["skills"]):
+            if (r.name, r.day) in rows:
+                rows[(r.name, r.day)]["skill_counts"][r.skill] = r.times
+
+        db.query(EmployeeDailyStats).delete()
+        if rows:
+            db.execute(EmployeeDailyStats.__table__.insert(), list(rows.values()))
+            db.execute(REBUILD_OPEN_TASKS_SQL)
+
+    logger.info(f"Rebuilt {len(rows)} employee/day aggregate rows")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rebuild_daily_stats()
@@ -0,0 +1,205 @@
+import os
+import time
+import threading
+import logging
+from typing import Callable, Dict, List
+from sqlalchemy import text
+
+from modules.dashboard.queries import data_version
+from modules.db.session import ReadOnlySessionLocal
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+# How long the data-version probe itself is trusted before it is re-read
+ANALYTICS_VERSION_TTL = float(os.getenv("ANALYTICS_VERSION_TTL", "5"))
+ANALYTICS_CACHE_SIZE = 256
+
+# Weekly sentiment per team (Employee.role), with a moving average and week-over-week delta.
+# Reads the daily rollups rather than per-meeting rows.
+TEAM_SENTIMENT_SQL = """
+    WITH weekly AS (
+        SELECT COALESCE(e.role, s.role, 'Unknown') AS team,
+               CAST(date_trunc('week', s.day) AS DATE) AS week,
+               SUM(s.sentiment_sum) / NULLIF(SUM(s.sentiment_count), 0) AS mean_sentiment,
+               SUM(s.meeting_count) AS meetings,
+               COUNT(DISTINCT s.employee_name) AS members
+          FROM employee_daily_stats s
+          LEFT JOIN employee e ON e.name = s.employee_name
+         WHERE s.day >= CURRENT_DATE - CAST(:days AS INTEGER)
+         GROUP BY 1, 2
+    )
+    SELECT team, week, mean_sentiment, meetings, members,
+           AVG(mean_sentiment) OVER (
+               PARTITION BY team ORDER BY week
+               ROWS BETWEEN {preceding} PRECEDING AND CURRENT ROW
+           ) AS moving_avg,
+           mean_sentiment - LAG(mean_sentiment) OVER (PARTITION BY team ORDER BY week) AS delta
+      FROM weekly
+     ORDER BY team, week
+"""
+
+# Employees whose smoothed sentiment fell between the start and the end of the window,
+# ranked by the size of the drop.
+DECLINING_EMPLOYEES_SQL = text("""
+    WITH daily AS (
+        SELECT s.employee_name AS name,
+               COALESCE(e.role, s.role) AS role,
+               s.day,
+               s.sentiment_sum / s.sentiment_count AS mean_sentiment
+          FROM employee_daily_stats s
+          LEFT JOIN employee e ON e.name = s.employee_name
+         WHERE s.day >= CURRENT_DATE - CAST(:days AS INTEGER)
+           AND s.sentiment_count > 0
+    ),
+    smoothed AS (
+        SELECT name, role, day, mean_sentiment,
+               AVG(mean_sentiment) OVER (PARTITION BY name ORDER BY day
+                                         ROWS BETWEEN 2 PRECEDING AND CURRENT ROW) AS moving_avg,
+               ROW_NUMBER() OVER (PARTITION BY name ORDER BY day) AS rn_first,
+               ROW_NUMBER() OVER (PARTITION BY name ORDER BY day DESC) AS rn_last,
+               COUNT(*) OVER (PARTITION BY name) AS active_days
+          FROM daily
+    ),
+    change AS (
+        SELECT name,
+               MAX(role) AS role,
+               MAX(active_days) AS active_days,
+               MAX(moving_avg) FILTER (WHERE rn_first = LEAST(3, active_days)) AS start_avg,
+               MAX(moving_avg) FILTER (WHERE rn_last = 1) AS end_avg,
+               regr_slope(mean_sentiment, CAST(day - CURRENT_DATE AS FLOAT)) AS slope_per_day
+          FROM smoothed
+         GROUP BY name
+    )
+    SELECT name, role, active_days, start_avg, end_avg,
+           end_avg - start_avg AS delta,
+           slope_per_day,
+           RANK() OVER (ORDER BY end_avg - start_avg) AS decline_rank
+      FROM change
+     WHERE active_days >= :min_days
+       AND end_avg < start_avg
+     ORDER BY decline_rank, name
+     LIMIT :limit
+""")
+
+# Open tasks per manager. Tasks with a valid ISO deadline are due then; free-text or
+# impossible deadlines ("Friday", "N/A", "2024-02-31") are treated as due a fixed
+# number of days after the meeting. The day is checked against the month's length
+# before the cast (CASE evaluates in order), so no model output can fail the query.
+OVERDUE_TASKS_SQL = text(r"""
+    WITH tasks AS (
+        SELECT t.assigned_by, t.assigned_to, t.deadline,
+               t.deadline ~ '^[1-9]\d{3}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$' AS iso_deadline,
+               CAST(m.created_at AS DATE) + CAST(:default_due_days AS INTEGER) AS default_due
+          FROM task_recommendation t
+          JOIN meeting m ON m.id = t.meeting_id
+         WHERE LOWER(COALESCE(t.status, '')) <> 'completed'
+    ),
+    open_tasks AS (
+        SELECT assigned_by, assigned_to,
+               CASE WHEN NOT iso_deadline
+                    THEN default_due
+                    WHEN CAST(SUBSTRING(deadline FROM 9 FOR 2) AS INTEGER)
+                         <= EXTRACT(DAY FROM CAST(SUBSTRING(deadline FROM 1 FOR 7) || '-01' AS DATE)
+                                             + INTERVAL '1 month - 1 day')
+                    THEN CAST(deadline AS DATE)
+                    ELSE default_due
+               END AS due
+          FROM tasks
+    )
+    SELECT e.name AS manager,
+           COUNT(*) AS open_tasks,
+           COUNT(*) FILTER (WHERE o.due < CURRENT_DATE) AS overdue_tasks,
+           COUNT(DISTINCT o.assigned_to) FILTER (WHERE o.due < CURRENT_DATE) AS people_with_overdue,
+           MIN(o.due) FILTER (WHERE o.due < CURRENT_DATE) AS oldest_due,
+           RANK() OVER (ORDER BY COUNT(*) FILTER (WHERE o.due < CURRENT_DATE) DESC) AS overdue_rank
+      FROM open_tasks o
+      JOIN employee e ON e.name = o.assigned_by AND e.role = 'Manager'
+     GROUP BY e.name
+     ORDER BY overdue_rank, manager
+""")
+
+
+# data_version() only moves when meetings are processed. These reports also read task
+# statuses and deadlines, which change later (merges add a task_mention, completions
+# flip a status), and employee roles, so those are fingerprinted as well.
+TASKS_VERSION_SQL = text("""
+    SELECT COUNT(*), COALESCE(MAX(t.id), 0),
+           COUNT(*) FILTER (WHERE LOWER(TRIM(COALESCE(t.status, ''))) = 'completed'),
+           (SELECT COALESCE(MAX(id), 0) FROM task_mention),
+           (SELECT md5(COALESCE(string_agg(e.name || ':' || COALESCE(e.role, ''), ',' ORDER BY e.id), ''))
+              FROM employee e)
+      FROM task_recommendation t
+""")
+
+_cache = {}
+_cache_lock = threading.Lock()
+_version = {"value": None, "checked_at": 0.0}
+
+
+def _tasks_version():
+    with ReadOnlySessionLocal() as db:
+        return tuple(db.execute(TASKS_VERSION_SQL).one())
+
+
+def _current_version():
+    now = time.monotonic()
+    if _version["value"] is None or now - _version["checked_at"] > ANALYTICS_VERSION_TTL:
+        _version["value"] = (data_version(), _tasks_version())
+        _version["checked_at"] = now
+    return _version["value"]
+
+
+def _cached(key, compute: Callable[[], List[Dict]]) -> List[Dict]:
+    """
+    Memoises a result per data version: newly processed meetings, task status changes
+    and merges, and employee changes all change the version and so miss the cache.
+    Entries also expire after ANALYTICS_CACHE_TTL seconds.
+    """
+    version = _current_version()
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry["version"] == version and now - entry["at"] < ANALYTICS_CACHE_TTL:
+            return entry["value"]
+
+    value = compute()
+    with _cache_lock:
+        if len(_cache) >= ANALYTICS_CACHE_SIZE:
+            _cache.clear()
+        _cache[key] = {"version": version, "at": now, "value": value}
+    return value
+
+
+def _rows(statement, params: Dict) -> List[Dict]:
+    with ReadOnlySessionLocal() as db:
+        result = db.execute(statement, params)
+        rows = []
+        for row in result.mappings():
+            item = {}
+            for key, value in row.items():
+                if hasattr(value, "isoformat"):
+                    value = value.isoformat()
+                elif value is not None and not isinstance(value, (int, str)):
+                    value = round(float(value), 3)
+                item[key] = value
+            rows.append(item)
+        return rows
+
+
+def team_sentiment_trend(days: int = 90, window: int = 4) -> List[Dict]:
+    """Weekly mean sentiment per team with a `window`-week moving average and weekly delta."""
+    statement = text(TEAM_SENTIMENT_SQL.format(preceding=max(int(window), 1) - 1))
+    return _cached(("team_sentiment", days, window), lambda: _rows(statement, {"days": days}))
+
+
+def declining_employees(days: int = 90, min_days: int = 3, limit: int = 20) -> List[Dict]:
+    """Employees whose 3-day moving average sentiment dropped most over the window."""
+    params = {"days": days, "min_days": min_days, "limit": limit}
+    return _cached(("declining", days, min_days, limit), lambda: _rows(DECLINING_EMPLOYEES_SQL, params))
+
+
+def overdue_tasks_by_manager(default_due_days: int = 7) -> List[Dict]:
+    """Open and overdue task counts for the tasks each manager assigned, ranked by overdue count."""
+    params = {"default_due_days": default_due_days}
+    return _cached(("overdue", default_due_days), lambda: _rows(OVERDUE_TASKS_SQL, params))
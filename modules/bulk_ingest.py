@@ -0,0 +1,217 @@
+import os
+import json
+import logging
+import zipfile
+from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from modules.db.session import SessionLocal
+from modules.transcript_parser import iter_lines, split_by_speaker
+from utils import analyze_uploaded_transcript, store_transcript_analysis
+
+logger = logging.getLogger(__name__)
+
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "25"))
+
+
+def _people(value) -> List[Dict]:
+    people = json.loads(value) if isinstance(value, (str, bytes)) else value
+    if not isinstance(people, list) or not all(isinstance(p, dict) and p.get("name") and p.get("role") for p in people):
+        raise ValueError("people_info must be a list of objects with name and role")
+    return people
+
+
+def _meeting_date(value):
+    """
+    Optional created_at/date of a backfilled meeting: an ISO date or datetime. Meetings
+    are stored in naive UTC, so an offset is converted to UTC first; naive values are
+    taken as UTC already.
+    """
+    if value in (None, ""):
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"created_at must be an ISO date or datetime, got {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _record(meeting_id, people, lines, created_at=None) -> Dict:
+    if not meeting_id:
+        raise ValueError("Missing meeting_id")
+    people = _people(people)
+    created_at = _meeting_date(created_at)
+    buckets = split_by_speaker(lines, [person["name"] for person in people])
+    return {"meeting_id": meeting_id, "people": people, "buckets": buckets, "created_at": created_at}
+
+
+def iter_ndjson_meetings(stream) -> Iterator[Dict]:
+    """
+    Yields one meeting per NDJSON line:
+        {"meeting_id": "...", "people_info": [{"name": ..., "role": ...}], "transcript": "...",
+         "created_at": "2024-03-01T10:00:00"}
+    created_at (or date) is optional and dates a backfilled meeting; it defaults to now.
+    Malformed lines are yielded as {"error": ...} so they show up in the report.
+    """
+    for number, line in enumerate(iter_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            yield _record(item.get("meeting_id"), item.get("people_info"),
+                          (item.get("transcript") or "").splitlines(), item.get("created_at") or item.get("date"))
+        except Exception as e:
+            yield {"meeting_id": None, "error": f"line {number}: {e}"}
+
+
+def iter_zip_meetings(fileobj) -> Iterator[Dict]:
+    """
+    Yields one meeting per transcript in a zip archive, laid out as either
+        <meeting_id>/transcript.txt + <meeting_id>/people.json
+    or
+        <meeting_id>.txt + <meeting_id>.json
+    The JSON part is either the people_info list or an object
+        {"people_info": [...], "created_at": "2024-03-01"}
+    that also dates the meeting. Transcripts are decompressed and split line by line, never loaded whole.
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        meetings = OrderedDict()
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            directory, _, filename = info.filename.rpartition("/")
+            stem, _, ext = filename.rpartition(".")
+            if directory and filename in ("transcript.txt", "people.json"):
+                key, kind = directory.rsplit("/", 1)[-1], ext
+            elif ext in ("txt", "json"):
+                key, kind = stem, ext
+            else:
+                continue
+            meetings.setdefault(key, {})[kind] = info
+
+        for meeting_id, parts in meetings.items():
+            try:
+                if "txt" not in parts or "json" not in parts:
+                    raise ValueError("Archive entry needs both a transcript and people_info")
+                meta = json.loads(archive.read(parts["json"]).decode("utf-8"))
+                if isinstance(meta, dict):
+                    people, created_at = meta.get("people_info"), meta.get("created_at") or meta.get("date")
+                else:
+                    people, created_at = meta, None
+                with archive.open(parts["txt"]) as transcript:
+                    yield _record(meeting_id, people, iter_lines(transcript), created_at)
+            except Exception as e:
+                yield {"meeting_id": meeting_id, "error": str(e)}
+
+
+def spool_meetings(records: Iterable[Dict]) -> str:
+    """
+    Serialises parsed records, invalid ones included, as NDJSON, so a bulk job
+    (modules.jobs) can persist an upload and ingest it later.
+    """
+    lines = []
+    for record in records:
+        if record.get("created_at"):
+            record = {**record, "created_at": record["created_at"].isoformat()}
+        lines.append(json.dumps(record))
+    return "\n".join(lines)
+
+
+def iter_spooled_meetings(payload: str) -> Iterator[Dict]:
+    """Reads back the records written by spool_meetings."""
+    for line in payload.splitlines():
+        record = json.loads(line)
+        if record.get("created_at"):
+            record["created_at"] = datetime.fromisoformat(record["created_at"])
+        yield record
+
+
+def _analyze(record: Dict) -> Dict:
+    return {**record, "responses": analyze_uploaded_transcript(record["people"], record["buckets"])}
+
+
+def _status(record: Dict, status: str, error: str = None) -> Dict:
+    result = {"meeting_id": record.get("meeting_id"), "status": status}
+    if error:
+        result["error"] = error
+    if "responses" in record:
+        result["participants"] = sum(1 for r in record["responses"] if "error" not in r)
+    return result
+
+
+def _write_batch(batch: List[Dict], on_stored: Optional[Callable] = None) -> List[Dict]:
+    """
+    Stores a batch of analysed meetings in one transaction, isolating failures if it
+    aborts. `on_stored(db, statuses)` runs in each transaction just before it commits.
+    """
+    with SessionLocal() as db:
+        try:
+            for record in batch:
+                store_transcript_analysis(db, record["meeting_id"], record["responses"], record.get("created_at"))
+            statuses = [_status(record, "stored") for record in batch]
+            if on_stored:
+                on_stored(db, statuses)
+            db.commit()
+            return statuses
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Batch of {len(batch)} meetings failed ({e}); retrying one by one")
+
+    statuses = []
+    for record in batch:
+        with SessionLocal() as db:
+            try:
+                store_transcript_analysis(db, record["meeting_id"], record["responses"], record.get("created_at"))
+                status = _status(record, "stored")
+                if on_stored:
+                    on_stored(db, [status])
+                db.commit()
+                statuses.append(status)
+            except Exception as e:
+                db.rollback()
+                statuses.append(_status(record, "failed", str(e)))
+    return statuses
+
+
+def ingest_meetings(records: Iterable[Dict], concurrency: int = BULK_CONCURRENCY,
+                    batch_size: int = BULK_BATCH_SIZE, on_stored: Optional[Callable] = None) -> List[Dict]:
+    """
+    Analyses meetings concurrently, with at most `concurrency` in flight and only a
+    bounded number read ahead, and writes the results in batched transactions.
+    Returns one status entry per meeting; `on_stored` is passed to _write_batch.
+    """
+    statuses, batch, pending = [], [], {}
+
+    def drain(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            record = pending.pop(future)
+            try:
+                batch.append(future.result())
+            except Exception as e:
+                logger.error(f"Analysis failed for meeting {record['meeting_id']}: {e}")
+                statuses.append(_status(record, "failed", str(e)))
+        if len(batch) >= batch_size or (not pending and batch):
+            statuses.extend(_write_batch(batch, on_stored))
+            batch.clear()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-ingest") as pool:
+        for record in records:
+            if "error" in record:
+                statuses.append(_status(record, "invalid", record["error"]))
+                continue
+            pending[pool.submit(_analyze, record)] = record
+            if len(pending) >= concurrency:
+                drain(FIRST_COMPLETED)
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    if batch:
+        statuses.extend(_write_batch(batch, on_stored))
+    logger.info(f"Bulk ingestion finished: {len(statuses)} meetings")
+    return statuses
@@ -0,0 +1,56 @@
+import os
+from typing import Dict, List, Optional, Tuple
+import streamlit as st
+
+from modules.dashboard import queries
+from modules.timeseries import downsample
+from modules.db.session import ReadOnlySessionLocal
+from models import Employee
+
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "600"))
+# How stale the data version may be; newly processed meetings show up within this window
+DASHBOARD_VERSION_TTL = int(os.getenv("DASHBOARD_VERSION_TTL", "15"))
+EMPLOYEE_CACHE_TTL = int(os.getenv("EMPLOYEE_CACHE_TTL", "120"))
+# Charts never need more points than the screen has pixels for
+DASHBOARD_CHART_POINTS = int(os.getenv("DASHBOARD_CHART_POINTS", "400"))
+
+
+@st.cache_data(ttl=DASHBOARD_VERSION_TTL, show_spinner=False)
+def current_data_version() -> Tuple[int, int]:
+    return queries.data_version()
+
+
+# `version` is only part of the cache key: a new value invalidates older entries.
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_employee_meetings(name: str, version: Tuple[int, int]) -> List[str]:
+    return queries.fetch_employee_meetings(name)
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_meeting_bundle(name: str, meeting_id: Optional[str], version: Tuple[int, int]) -> Dict:
+    bundle = queries.fetch_meeting_bundle(name, meeting_id)
+    if bundle["rolling"]:
+        bundle["rolling"]["scores"] = downsample(bundle["rolling"]["scores"], DASHBOARD_CHART_POINTS)
+    return bundle
+
+
+@st.cache_data(ttl=EMPLOYEE_CACHE_TTL, show_spinner=False)
+def load_employees(role_filter: Optional[str] = None) -> List[Dict]:
+    with ReadOnlySessionLocal() as db:
+        query = db.query(Employee.name, Employee.email, Employee.role)
+        if role_filter:
+            query = query.filter(Employee.role == role_filter)
+        return [{"name": n, "email": e, "role": r} for n, e, r in query.all()]
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_employee_trend(name: str, days: int, granularity: str, version: Tuple[int, int]) -> Dict:
+    return {
+        "trend": queries.fetch_employee_trend(name, days, granularity),
+        "top_skills": queries.fetch_top_skills(name, days),
+    }
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL, show_spinner=False)
+def load_org_overview(days: int, role: Optional[str], version: Tuple[int, int]) -> Dict:
+    return queries.fetch_org_overview(days, role)
@@ -0,0 +1,172 @@
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+
+from modules.db.session import ReadOnlySessionLocal
+
+# One round trip for everything a (person, meeting) view needs
+MEETING_BUNDLE_SQL = text("""
+    SELECT
+        (SELECT COALESCE(json_agg(json_build_object(
+                    'skill', s.skill_recommendation,
+                    'meeting_id', s.meeting_id) ORDER BY s.id), '[]'::json)
+           FROM skill_recommendation s
+          WHERE s.name = :name
+            AND (CAST(:meeting_id AS VARCHAR) IS NULL OR s.meeting_id = :meeting_id)) AS skills,
+        (SELECT COALESCE(json_agg(json_build_object(
+                    'task', t.task,
+                    'assigned_by', t.assigned_by,
+                    'assigned_to', t.assigned_to,
+                    'deadline', t.deadline,
+                    'status', t.status) ORDER BY t.id), '[]'::json)
+           FROM task_recommendation t
+          WHERE (t.assigned_to = :name OR t.assigned_by = :name)
+            AND (CAST(:meeting_id AS VARCHAR) IS NULL OR t.meeting_id = :meeting_id
+                 -- Deduplicated tasks stay on their first meeting; later ones reach them through mentions
+                 OR EXISTS (SELECT 1 FROM task_mention tm
+                             WHERE tm.task_id = t.id AND tm.meeting_id = :meeting_id))) AS tasks,
+        (SELECT COALESCE(json_agg(e.overall_sentiment_score ORDER BY e.id), '[]'::json)
+           FROM employee_skills e
+          WHERE e.employee_name = :name
+            AND (CAST(:meeting_id AS VARCHAR) IS NULL OR e.meeting_id = :meeting_id)) AS sentiments,
+        (SELECT r.rolling_sentiment
+           FROM rolling_sentiment r
+          WHERE r.name = :name
+            AND (CAST(:meeting_id AS VARCHAR) IS NULL OR r.meeting_id = :meeting_id)
+          ORDER BY r.id
+          LIMIT 1) AS rolling
+""")
+
+EMPLOYEE_MEETINGS_SQL = text("""
+    SELECT DISTINCT meeting_id
+      FROM employee_skills
+     WHERE employee_name = :name
+     ORDER BY meeting_id DESC
+""")
+
+# Every processed meeting adds employee_skills rows in the same transaction as its
+# other results, so this pair changes whenever new results become visible.
+DATA_VERSION_SQL = text("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM employee_skills")
+
+
+def data_version() -> Tuple[int, int]:
+    """Returns a cheap fingerprint of the analysis tables, used as a cache key."""
+    with ReadOnlySessionLocal() as db:
+        max_id, count = db.execute(DATA_VERSION_SQL).one()
+        return int(max_id), int(count)
+
+
+def normalize_rolling(value) -> Optional[Dict]:
+    """
+    Rolling sentiment is stored as a JSON-encoded string, either as a bare list of
+    points (uploads) or as {"scores": [...], "average": ...} (scheduled processing).
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    if isinstance(value, list):
+        value = {"scores": value, "average": None}
+    return value
+
+
+def fetch_employee_meetings(name: str) -> List[str]:
+    with ReadOnlySessionLocal() as db:
+        return [row[0] for row in db.execute(EMPLOYEE_MEETINGS_SQL, {"name": name})]
+
+
+def fetch_meeting_bundle(name: str, meeting_id: Optional[str] = None) -> Dict:
+    """Fetches skills, tasks, sentiment scores and rolling sentiment for one person and meeting."""
+    with ReadOnlySessionLocal() as db:
+        row = db.execute(MEETING_BUNDLE_SQL, {"name": name, "meeting_id": meeting_id}).one()
+    return {
+        "skills": row.skills or [],
+        "tasks": row.tasks or [],
+        "sentiments": row.sentiments or [],
+        "rolling": normalize_rolling(row.rolling),
+    }
+
+
+# ---- Aggregate-backed views: these read employee_daily_stats only, never the base tables ----
+
+EMPLOYEE_TREND_SQL = text("""
+    SELECT CAST(date_trunc(:granularity, day) AS DATE) AS bucket,
+           SUM(meeting_count) AS meetings,
+           SUM(sentiment_sum) / NULLIF(SUM(sentiment_count), 0) AS mean_sentiment,
+           SUM(open_task_count) AS open_tasks
+      FROM employee_daily_stats
+     WHERE employee_name = :name
+       AND day >= CURRENT_DATE - CAST(:days AS INTEGER)
+     GROUP BY 1
+     ORDER BY 1
+""")
+
+EMPLOYEE_TOP_SKILLS_SQL = text("""
+    SELECT skill.key AS skill, SUM(CAST(skill.value AS INTEGER)) AS times
+      FROM employee_daily_stats s,
+           jsonb_each_text(CAST(s.skill_counts AS JSONB)) AS skill
+     WHERE s.employee_name = :name
+       AND s.day >= CURRENT_DATE - CAST(:days AS INTEGER)
+     GROUP BY 1
+     ORDER BY 2 DESC, 1
+     LIMIT :limit
+""")
+
+ORG_ROLE_COUNTS_SQL = text("""
+    SELECT COALESCE(role, 'Unknown') AS role, COUNT(*) AS total
+      FROM employee
+     GROUP BY 1
+""")
+
+ORG_EMPLOYEE_SUMMARY_SQL = text("""
+    SELECT s.employee_name AS name,
+           MAX(s.role) AS role,
+           SUM(s.meeting_count) AS meetings,
+           SUM(s.sentiment_sum) / NULLIF(SUM(s.sentiment_count), 0) AS mean_sentiment,
+           SUM(s.open_task_count) AS open_tasks
+      FROM employee_daily_stats s
+     WHERE s.day >= CURRENT_DATE - CAST(:days AS INTEGER)
+       AND (CAST(:role AS VARCHAR) IS NULL OR s.role = :role)
+     GROUP BY 1
+     ORDER BY 1
+""")
+
+
+def fetch_employee_trend(name: str, days: int = 30, granularity: str = "day") -> List[Dict]:
+    """Meeting count, mean sentiment and new open tasks per day or week for one employee."""
+    if granularity not in ("day", "week"):
+        raise ValueError("granularity must be 'day' or 'week'")
+    with ReadOnlySessionLocal() as db:
+        rows = db.execute(EMPLOYEE_TREND_SQL, {"name": name, "days": days, "granularity": granularity})
+        return [
+            {
+                "bucket": r.bucket.isoformat(),
+                "meetings": int(r.meetings),
+                "mean_sentiment": float(r.mean_sentiment) if r.mean_sentiment is not None else None,
+                "open_tasks": int(r.open_tasks),
+            }
+            for r in rows
+        ]
+
+
+def fetch_top_skills(name: str, days: int = 30, limit: int = 3) -> List[Dict]:
+    with ReadOnlySessionLocal() as db:
+        rows = db.execute(EMPLOYEE_TOP_SKILLS_SQL, {"name": name, "days": days, "limit": limit})
+        return [{"skill": r.skill, "times": int(r.times)} for r in rows]
+
+
+def fetch_org_overview(days: int = 30, role: Optional[str] = None) -> Dict:
+    """Role head-counts plus a per-employee summary over the window; O(employees x days) rows."""
+    with ReadOnlySessionLocal() as db:
+        role_counts = {r.role: int(r.total) for r in db.execute(ORG_ROLE_COUNTS_SQL)}
+        employees = [
+            {
+                "name": r.name,
+                "role": r.role,
+                "meetings": int(r.meetings),
+                "mean_sentiment": round(float(r.mean_sentiment), 2) if r.mean_sentiment is not None else None,
+                "open_tasks": int(r.open_tasks),
+            }
+            for r in db.execute(ORG_EMPLOYEE_SUMMARY_SQL, {"days": days, "role": role})
+        ]
+    return {"role_counts": role_counts, "employees": employees}
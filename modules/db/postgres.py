@@ -1,37 +1,30 @@
-import os
 import uuid
 import logging
-import psycopg2
 from contextlib import contextmanager
 from typing import List, Dict
-from dotenv import load_dotenv
 
-from models import Meeting, MeetingTranscript
-from app01 import SessionLocal
-
-load_dotenv()
+from models import Meeting, MeetingTranscript, init_db
+from modules.db.session import SessionLocal, get_engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @contextmanager
 def get_connection():
+    """Borrows a raw DBAPI connection from the shared pool."""
+    conn = None
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv("POSTGRES_DB"),
-            user=os.getenv("POSTGRES_USER"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-        )
+        conn = get_engine().raw_connection()
         yield conn
         conn.commit()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
+        if conn:
+            conn.rollback()
         raise
     finally:
         if conn:
-            conn.close()
+            conn.close()  # Returns the connection to the pool
 
 # def insert_transcript(transcript: List[Dict], meeting_id: str = None):
 #     """
@@ -70,6 +63,7 @@ from uuid import uuid4
 from sqlalchemy.exc import SQLAlchemyError
 
 def insert_transcript(transcript: List[Dict], meeting_id: str = None, title: str = None):
+    init_db()
     session = SessionLocal()
     try:
         # Step 1: Create a new meeting
@@ -0,0 +1,134 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from typing import Iterable
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Pool settings, all overridable from the environment
+DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+# Advisory lock spaces: the first key of pg_advisory_xact_lock(int, int), one per lock family
+LOCK_TASK_DEDUP = 1
+LOCK_DAILY_STATS = 2
+
+_ADVISORY_LOCKS_SQL = text("""
+    SELECT pg_advisory_xact_lock(:space, id)
+      FROM (SELECT DISTINCT hashtext(key) AS id FROM unnest(CAST(:keys AS text[])) AS key) ids
+     ORDER BY id
+""")
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+_read_only_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+@event.listens_for(_read_only_factory, "after_begin")
+def _set_read_only(session, transaction, connection):
+    """Every transaction opened by a read-only session is marked READ ONLY."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+def _build_engine(url: str):
+    kwargs = {"pool_pre_ping": True}
+    connect_args = {}
+
+    if url.startswith("postgresql"):
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    return create_engine(url, connect_args=connect_args, **kwargs)
+
+
+def get_engine():
+    """
+    Returns the process-wide engine, creating it on first use.
+    A forked child never reuses the parent's pooled connections.
+    """
+    global _engine, _engine_pid
+
+    pid = os.getpid()
+    if _engine is not None and _engine_pid == pid:
+        return _engine
+
+    with _engine_lock:
+        if _engine is not None and _engine_pid != pid:
+            # Inherited from the parent: drop the pool without closing the parent's sockets
+            _engine.dispose(close=False)
+            _engine = None
+
+        if _engine is None:
+            if not DATABASE_URL:
+                raise RuntimeError("DATABASE_URL is not set")
+            _engine = _build_engine(DATABASE_URL)
+            _engine_pid = pid
+            logger.info(
+                f"Created database engine (pool_size={DB_POOL_SIZE}, max_overflow={DB_MAX_OVERFLOW})"
+            )
+    return _engine
+
+
+def SessionLocal():
+    """Returns a new read-write session bound to the shared engine."""
+    return _session_factory(bind=get_engine())
+
+
+def ReadOnlySessionLocal():
+    """Returns a new session whose transactions are READ ONLY."""
+    return _read_only_factory(bind=get_engine())
+
+
+def advisory_xact_locks(db, space: int, keys: Iterable[str]):
+    """
+    Takes transaction-scoped advisory locks on `keys` in lock id order, in one round trip.
+    Transactions that lock overlapping sets this way queue behind each other instead of
+    deadlocking. A no-op outside Postgres.
+    """
+    keys = sorted(set(keys))
+    if keys and db.get_bind().dialect.name == "postgresql":
+        db.execute(_ADVISORY_LOCKS_SQL, {"space": space, "keys": keys})
+
+
+# Thread-local session registry for code that wants one session per thread
+ScopedSession = scoped_session(SessionLocal)
+
+
+@contextmanager
+def session_scope(read_only: bool = False):
+    """
+    Provides a transactional scope around a series of operations.
+    Usage:
+        with session_scope() as db:
+            db.add(...)
+    """
+    session = ReadOnlySessionLocal() if read_only else SessionLocal()
+    try:
+        yield session
+        if not read_only:
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,359 @@
+"""
+Incremental Parquet export of analysis results for BI.
+
+    python -m modules.export [--table employee_skills ...] [--out ./exports]
+
+Each table lands in Hive-style date partitions keyed on the meeting's date:
+    exports/task_recommendation/date=2025-04-01/part-<run>-<n>.parquet
+Rows are read through a server-side cursor in EXPORT_BATCH_ROWS batches (point
+EXPORT_DATABASE_URL at a read replica to keep this off the primary) and written as
+Arrow record batches, so memory is bounded by the batch size and the number of
+partitions open at once, not by table size. `_watermarks.json` in the export
+directory records the last exported id per table; the next run picks up after it.
+Ids below the watermark that were missing at export time (a writer still inside
+its transaction) are remembered as gaps and picked up by later runs once they
+commit, for up to EXPORT_GAP_TTL seconds; each row is exported once. On Postgres a
+gap is dropped as soon as every transaction that was running when it was seen has
+ended, since the id can then never appear (rolled back, or deleted by task
+compaction). Rows updated in place after export are not re-exported. One export
+runs at a time per export directory, across processes (flock on `.export.lock`).
+"""
+import os
+import json
+import logging
+import argparse
+import threading
+import time
+from uuid import uuid4
+from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, JSON, cast, create_engine, func, select, text
+
+from models import EmployeeSkills, Meeting, RollingSentiment, SkillRecommendation, TaskMention, TaskRecommendation
+from modules.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "./exports")
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "10000"))
+EXPORT_MAX_OPEN_PARTITIONS = int(os.getenv("EXPORT_MAX_OPEN_PARTITIONS", "16"))
+EXPORT_DATABASE_URL = os.getenv("EXPORT_DATABASE_URL")
+# Ids skipped by an export are re-checked for this long (rolled-back inserts leave permanent gaps)
+EXPORT_GAP_TTL = int(os.getenv("EXPORT_GAP_TTL", "3600"))
+# At most this many skipped ids are tracked per table and run
+EXPORT_MAX_GAPS = int(os.getenv("EXPORT_MAX_GAPS", "10000"))
+
+EXPORT_TABLES = {
+    model.__tablename__: model
+    # task_mention links deduplicated tasks to every meeting that raised them (join on task_id)
+    for model in (EmployeeSkills, SkillRecommendation, TaskRecommendation, TaskMention, RollingSentiment)
+}
+WATERMARK_FILE = "_watermarks.json"
+LOCK_FILE = ".export.lock"
+
+# Oldest transaction still running, and the first transaction id not yet started
+_SNAPSHOT_SQL = text("SELECT txid_snapshot_xmin(s), txid_snapshot_xmax(s) FROM txid_current_snapshot() s")
+
+_local_lock = threading.Lock()  # Only used where flock is unavailable
+
+
+@lru_cache(maxsize=1)
+def _export_engine():
+    if EXPORT_DATABASE_URL:
+        return create_engine(EXPORT_DATABASE_URL, pool_pre_ping=True, pool_size=1, max_overflow=1)
+    return get_engine()
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow (`pip install pyarrow`)") from e
+    return pyarrow
+
+
+def arrow_schema(model):
+    """Arrow schema for a table's columns plus the meeting timestamp used for partitioning."""
+    pa = _arrow()
+    fields = []
+    for column in model.__table__.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()  # Strings, text and JSON (serialised)
+        fields.append(pa.field(column.name, arrow_type))
+    fields.append(pa.field("meeting_created_at", pa.timestamp("us")))
+    return pa.schema(fields)
+
+
+def load_watermarks(out_dir: str) -> Dict:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out_dir: str, watermarks: Dict):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp, path)  # Atomic, so a crash never leaves a half-written watermark
+
+
+class PartitionWriters:
+    """
+    Lazily opened ParquetWriter per date partition, at most `max_open` at a time
+    (least recently used is closed first). Files are written under hidden
+    ".part-*.tmp" names, which Parquet readers skip, and only renamed into place by
+    commit() once the whole table has been written; abort() removes them all.
+    """
+
+    def __init__(self, table_dir: str, schema, run_id: str, max_open: int = EXPORT_MAX_OPEN_PARTITIONS):
+        self.table_dir = table_dir
+        self.schema = schema
+        self.run_id = run_id
+        self.max_open = max_open
+        self.open = OrderedDict()
+        self.parts = 0
+        self.files: List[str] = []
+        self.pending: List[str] = []
+
+    def write(self, partition: str, columns: Dict[str, list]):
+        pa = _arrow()
+        writer = self.open.pop(partition, None)
+        if writer is None:
+            if len(self.open) >= self.max_open:
+                self._close(*self.open.popitem(last=False))
+            directory = os.path.join(self.table_dir, f"date={partition}")
+            os.makedirs(directory, exist_ok=True)
+            self.parts += 1
+            path = os.path.join(directory, f"part-{self.run_id}-{self.parts:05d}.parquet")
+            writer = (pa.parquet.ParquetWriter(_tmp_path(path), self.schema, compression="zstd"), path)
+        self.open[partition] = writer
+        writer[0].write_batch(pa.RecordBatch.from_pydict(columns, schema=self.schema))
+
+    def _close(self, partition, writer):
+        parquet_writer, path = writer
+        parquet_writer.close()
+        self.pending.append(path)
+
+    def commit(self):
+        while self.open:
+            self._close(*self.open.popitem(last=False))
+        for path in self.pending:
+            os.replace(_tmp_path(path), path)
+            self.files.append(path)
+        self.pending.clear()
+
+    def abort(self):
+        while self.open:
+            self._close(*self.open.popitem(last=False))
+        for path in self.pending:
+            try:
+                os.remove(_tmp_path(path))
+            except OSError:
+                pass
+        self.pending.clear()
+
+
+def _tmp_path(path: str) -> str:
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.tmp")
+
+
+def _rows_query(model, *conditions):
+    return select(
+        *model.__table__.columns,
+        Meeting.created_at.label("meeting_created_at"),
+        cast(Meeting.created_at, Date).label("_partition")
+    ).join(Meeting, Meeting.id == model.meeting_id) \
+        .where(*conditions) \
+        .order_by(model.id)
+
+
+def _group_by_partition(rows: Iterable, names: List[str], json_columns: set) -> Dict[str, Dict[str, list]]:
+    groups = {}
+    for row in rows:
+        mapping = row._mapping
+        partition = mapping["_partition"].isoformat() if mapping["_partition"] else "unknown"
+        columns = groups.setdefault(partition, {name: [] for name in names})
+        for name in names:
+            value = mapping[name]
+            if name in json_columns and value is not None and not isinstance(value, str):
+                value = json.dumps(value)  # Some JSON columns already hold serialised strings
+            columns[name].append(value)
+    return groups
+
+
+def _missing_ids(expected: int, upto: int, gaps: Dict[str, str], seen_at: str):
+    for missing in range(expected, upto + 1):
+        if len(gaps) >= EXPORT_MAX_GAPS:
+            logger.warning(f"More than {EXPORT_MAX_GAPS} missing ids; not tracking beyond {missing - 1}")
+            return
+        gaps.setdefault(str(missing), seen_at)
+
+
+def export_table(name: str, out_dir: str = EXPORT_DIR, batch_rows: int = EXPORT_BATCH_ROWS) -> Dict:
+    """Exports rows of one table added since its watermark, plus earlier gaps now filled; returns a summary."""
+    model = EXPORT_TABLES[name]
+    schema = arrow_schema(model)
+    names = schema.names
+    json_columns = {c.name for c in model.__table__.columns if isinstance(c.type, JSON)}
+
+    state = load_watermarks(out_dir).get(name, {})
+    after_id = state.get("last_id", 0)
+    horizon = state.get("horizon")
+    now = datetime.utcnow()
+    # Gaps from earlier runs, minus those that have waited too long to ever be filled
+    gaps = {
+        gap_id: first_seen for gap_id, first_seen in state.get("gaps", {}).items()
+        if (now - datetime.fromisoformat(first_seen)).total_seconds() < EXPORT_GAP_TTL
+    }
+    engine = _export_engine()
+    with engine.connect() as conn:
+        oldest_running, next_horizon = _snapshot(conn)
+        # Fixed upper bound, so rows inserted during the run wait for the next one
+        upto_id = conn.execute(select(func.max(model.id))).scalar() or 0
+    # Every writer that could fill the known gaps has committed or rolled back since the last run
+    settled = horizon is not None and oldest_running is not None and oldest_running >= horizon
+    if upto_id <= after_id and not gaps:
+        return {"table": name, "rows": 0, "files": 0, "last_id": after_id}
+
+    run_id = now.strftime("%Y%m%dT%H%M%S") + "-" + uuid4().hex[:6]
+    writers = PartitionWriters(os.path.join(out_dir, name), schema, run_id)
+    exported = 0
+
+    def write(result):
+        nonlocal exported
+        for batch in result.partitions(batch_rows):
+            for partition, columns in _group_by_partition(batch, names, json_columns).items():
+                writers.write(partition, columns)
+            exported += len(batch)
+            yield from (row._mapping["id"] for row in batch)
+
+    try:
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=batch_rows) as conn:
+            gap_ids = sorted(int(gap_id) for gap_id in gaps)
+            for start in range(0, len(gap_ids), batch_rows):
+                chunk = gap_ids[start:start + batch_rows]
+                for found in write(conn.execute(_rows_query(model, model.id.in_(chunk)))):
+                    gaps.pop(str(found), None)
+            if settled:
+                gaps.clear()  # Still missing, so never coming
+
+            if upto_id > after_id:
+                expected = after_id + 1
+                for found in write(conn.execute(_rows_query(model, model.id > after_id, model.id <= upto_id))):
+                    _missing_ids(expected, found - 1, gaps, now.isoformat())
+                    expected = found + 1
+                _missing_ids(expected, upto_id, gaps, now.isoformat())
+        writers.commit()
+    except Exception:
+        writers.abort()
+        raise
+
+    watermarks = load_watermarks(out_dir)
+    watermarks[name] = {"last_id": max(upto_id, after_id), "gaps": gaps, "horizon": next_horizon,
+                        "exported_at": now.isoformat(), "rows": exported}
+    save_watermarks(out_dir, watermarks)
+    logger.info(f"Exported {exported} {name} rows into {len(writers.files)} files ({len(gaps)} ids still missing)")
+    return {"table": name, "rows": exported, "files": len(writers.files),
+            "last_id": max(upto_id, after_id), "missing_ids": len(gaps)}
+
+
+def _snapshot(conn):
+    """(oldest running transaction id, next transaction id) on Postgres, (None, None) elsewhere."""
+    if conn.dialect.name != "postgresql":
+        return None, None
+    xmin, xmax = conn.execute(_SNAPSHOT_SQL).one()
+    return int(xmin), int(xmax)
+
+
+@contextmanager
+def _export_lock(out_dir: str, exclusive: bool = True):
+    """
+    Yields whether the export lock for out_dir was taken. A run holds it exclusively;
+    export_running() only probes it with a shared lock, and since a probe releases it
+    at once a run retries briefly before giving up. Each call opens its own file, so
+    threads of one process exclude each other too.
+    """
+    try:
+        import fcntl
+    except ImportError:  # No flock on this platform; one export at a time per process
+        if not exclusive:
+            yield not _local_lock.locked()
+            return
+        acquired = _local_lock.acquire(blocking=False)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _local_lock.release()
+        return
+
+    path = os.path.join(out_dir, LOCK_FILE)
+    if not exclusive and not os.path.exists(path):
+        yield True  # No export has ever run here
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    with open(path, "a") as handle:
+        for attempt in range(5 if exclusive else 1):
+            if attempt:
+                time.sleep(0.05)
+            try:
+                fcntl.flock(handle, mode | fcntl.LOCK_NB)
+                break
+            except OSError:
+                pass
+        else:
+            yield False
+            return
+        yield True  # Closing the file releases the lock, even if the process dies
+
+
+def run_export(tables: Optional[List[str]] = None, out_dir: str = EXPORT_DIR) -> List[Dict]:
+    """Exports every (or the given) table; one export runs at a time per export directory."""
+    unknown = set(tables or []) - set(EXPORT_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown export table(s): {', '.join(sorted(unknown))}")
+    with _export_lock(out_dir) as acquired:
+        if not acquired:
+            raise RuntimeError("An export is already running")
+        return [export_table(name, out_dir) for name in tables or EXPORT_TABLES]
+
+
+def export_running(out_dir: str = EXPORT_DIR) -> bool:
+    """Whether an export, in this or any other process, currently holds out_dir's lock."""
+    with _export_lock(out_dir, exclusive=False) as free:
+        return not free
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", action="append", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--out", default=EXPORT_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for summary in run_export(args.table, args.out):
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import os
+import logging
+import threading
+from uuid import uuid4
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from models import AnalysisJob
+from modules.db.session import SessionLocal, ReadOnlySessionLocal
+from modules.bulk_ingest import ingest_meetings, iter_spooled_meetings, spool_meetings
+from modules.llm_budget import INTERACTIVE, llm_priority
+from modules.transcript_parser import split_by_speaker
+from utils import analyze_uploaded_transcript, store_transcript_analysis
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# A queued or running job not updated for this long is assumed orphaned by a dead process
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+# Running jobs refresh updated_at this often, so long analyses never look stale
+JOB_HEARTBEAT_SECONDS = max(1, JOB_STALE_SECONDS // 5)
+# How often the scheduler process looks for orphaned jobs
+JOB_RESUME_INTERVAL = int(os.getenv("JOB_RESUME_INTERVAL", "60"))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Worker pool for analysis jobs, created on first use in each process."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="analysis-job")
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def submit_transcript_job(meeting_id: str, people: List[Dict], transcript: str) -> str:
+    """Persists the raw transcript as a queued job and hands it to the worker pool."""
+    job_id = str(uuid4())
+    with SessionLocal() as db:
+        db.add(AnalysisJob(
+            id=job_id,
+            meeting_id=meeting_id,
+            status="queued",
+            people_info=people,
+            transcript=transcript
+        ))
+        db.commit()
+
+    get_executor().submit(run_transcript_job, job_id)
+    logger.info(f"Queued analysis job {job_id} for meeting {meeting_id}")
+    return job_id
+
+
+def submit_bulk_job(records: Iterable[Dict]) -> str:
+    """
+    Persists the parsed records of a bulk upload (modules.bulk_ingest) as one queued
+    job and hands it to the worker pool. Reading the upload is the only work done here.
+    """
+    job_id = str(uuid4())
+    with SessionLocal() as db:
+        db.add(AnalysisJob(id=job_id, kind="bulk", status="queued", transcript=spool_meetings(records)))
+        db.commit()
+
+    get_executor().submit(run_bulk_job, job_id)
+    logger.info(f"Queued bulk ingestion job {job_id}")
+    return job_id
+
+
+def _claim(db, job_id: str) -> bool:
+    # Conditional update so a job is only ever picked up by one worker
+    claimed = db.query(AnalysisJob).filter(
+        AnalysisJob.id == job_id,
+        AnalysisJob.status == "queued"
+    ).update({"status": "running", "updated_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def _partial_publisher(job_id: str):
+    """
+    Returns an on_task(name, task) callback that exposes tasks on the running job as
+    {"partial_tasks": [...]}, so pollers see results before the whole analysis ends.
+    """
+    partial, lock = [], threading.Lock()
+
+    def publish(name, task):
+        with lock:
+            partial.append({"name": name, **task})
+            snapshot = list(partial)
+            with SessionLocal() as db:
+                db.query(AnalysisJob).filter(
+                    AnalysisJob.id == job_id,
+                    AnalysisJob.status == "running"
+                ).update({"result": {"partial_tasks": snapshot}, "updated_at": datetime.utcnow()},
+                         synchronize_session=False)
+                db.commit()
+    return publish
+
+
+@contextmanager
+def _heartbeat(job_id: str):
+    """Refreshes the running job's updated_at until the block exits."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                with SessionLocal() as db:
+                    db.query(AnalysisJob).filter(
+                        AnalysisJob.id == job_id,
+                        AnalysisJob.status == "running"
+                    ).update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+                    db.commit()
+            except Exception as e:
+                logger.warning(f"Heartbeat for analysis job {job_id} failed: {e}")
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_transcript_job(job_id: str):
+    """
+    Claims and loads the job, analyses it with no database session open (the LLM
+    calls take minutes), then stores the results and marks it done in one short
+    transaction. A job taken over in the meantime (resumed as stale) is not stored twice.
+    """
+    try:
+        with SessionLocal() as db:
+            if not _claim(db, job_id):
+                return
+            job = db.get(AnalysisJob, job_id)
+            meeting_id, people, transcript = job.meeting_id, job.people_info, job.transcript
+
+        buckets = split_by_speaker(transcript.splitlines(), [person["name"] for person in people])
+        # Async uploads still have someone polling for them
+        with _heartbeat(job_id), llm_priority(INTERACTIVE):
+            responses = analyze_uploaded_transcript(people, buckets, on_task=_partial_publisher(job_id))
+
+        with SessionLocal() as db:
+            finished = db.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == "running"
+            ).update({"status": "succeeded", "result": responses, "updated_at": datetime.utcnow()},
+                     synchronize_session=False)
+            if not finished:
+                db.rollback()
+                logger.warning(f"Analysis job {job_id} is no longer running here; results discarded")
+                return
+            store_transcript_analysis(db, meeting_id, responses)
+            db.commit()
+        logger.info(f"Analysis job {job_id} succeeded")
+    except Exception as e:
+        _fail(job_id, e)
+
+
+def _bulk_result(results: List[Dict]) -> Dict:
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"summary": summary, "results": results}
+
+
+def _record_stored(job_id: str):
+    """
+    Returns an on_stored(db, statuses) callback that appends stored meetings to the job
+    in the same transaction as their results, so progress and data commit together.
+    """
+    def record(db, statuses):
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).with_for_update().one()
+        job.result = _bulk_result((job.result or {}).get("results", []) + statuses)
+        job.updated_at = datetime.utcnow()
+    return record
+
+
+def run_bulk_job(job_id: str):
+    """
+    Ingests a bulk upload in the background, heartbeating like a transcript job. A job
+    resumed after its process died skips the meetings it already stored, as recorded
+    by the batches that committed them, so no meeting is stored twice.
+    """
+    try:
+        with SessionLocal() as db:
+            if not _claim(db, job_id):
+                return
+            job = db.get(AnalysisJob, job_id)
+            payload = job.transcript
+            stored = [r for r in (job.result or {}).get("results", []) if r["status"] == "stored"]
+
+        done = {r["meeting_id"] for r in stored}
+        records = (r for r in iter_spooled_meetings(payload) if "error" in r or r["meeting_id"] not in done)
+        if done:
+            logger.info(f"Bulk job {job_id} resumes after {len(done)} stored meetings")
+        with _heartbeat(job_id):
+            statuses = ingest_meetings(records, on_stored=_record_stored(job_id))
+
+        with SessionLocal() as db:
+            # Earlier runs' stored meetings plus everything this run did
+            result = _bulk_result(stored + statuses)
+            finished = db.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == "running"
+            ).update({"status": "succeeded", "result": result, "updated_at": datetime.utcnow()},
+                     synchronize_session=False)
+            db.commit()
+        if finished:
+            logger.info(f"Bulk job {job_id} succeeded: {result['summary']}")
+        else:
+            logger.warning(f"Bulk job {job_id} is no longer running here; its final report was dropped")
+    except Exception as e:
+        _fail(job_id, e)
+
+
+def _fail(job_id: str, error: Exception):
+    logger.error(f"Analysis job {job_id} failed: {error}")
+    with SessionLocal() as db:
+        db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+            {"status": "failed", "error": str(error), "updated_at": datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    with ReadOnlySessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        if job is None:
+            return None
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "meeting_id": job.meeting_id,
+            "status": job.status,
+            "result": job.result,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+        }
+
+
+def resume_pending_jobs() -> int:
+    """
+    Re-submits jobs left queued, or stuck running, by a process that exited: those
+    not updated for JOB_STALE_SECONDS (running jobs heartbeat, so live ones never
+    qualify). Meant to run every JOB_RESUME_INTERVAL in the designated scheduler process.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=JOB_STALE_SECONDS)
+    with SessionLocal() as db:
+        jobs = db.query(AnalysisJob.id, AnalysisJob.kind).filter(
+            AnalysisJob.status.in_(["queued", "running"]),
+            AnalysisJob.updated_at < stale_before
+        ).all()
+        job_ids = [job_id for job_id, _ in jobs]
+        if job_ids:
+            # Re-stamped, so the next sweep leaves them alone while they wait for a worker
+            db.query(AnalysisJob).filter(
+                AnalysisJob.id.in_(job_ids),
+                AnalysisJob.status.in_(["queued", "running"]),
+                AnalysisJob.updated_at < stale_before
+            ).update({"status": "queued", "updated_at": now}, synchronize_session=False)
+            db.commit()
+
+    for job_id, kind in jobs:
+        get_executor().submit(run_bulk_job if kind == "bulk" else run_transcript_job, job_id)
+    if job_ids:
+        logger.info(f"Resumed {len(job_ids)} pending analysis jobs")
+    return len(job_ids)
@@ -1,22 +1,56 @@
-from groq import Groq  
+from functools import lru_cache
 from dotenv import load_dotenv
 import os
 
+from modules.llm_budget import current_priority
+
 load_dotenv()
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+@lru_cache(maxsize=1)
+def get_groq_client():
+    """Builds the Groq client on first use instead of at import time."""
+    from groq import Groq
+    return Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+
+@lru_cache(maxsize=None)
+def get_gemini_model(model: str = "gemini-1.5-pro-latest"):
+    """Configures Gemini and returns a model handle on first use."""
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GENAI_API_KEY"))
+    return genai.GenerativeModel(model)
+
+
+@lru_cache(maxsize=1)
+def get_router():
+    """Provider router built from LLM_PROVIDERS and friends; see modules.llm_router."""
+    from modules.llm_router import build_router_from_env
+    return build_router_from_env()
+
+
+def get_llm_response(prompt: str, **options) -> str:
+    """
+    Routes one completion to the fastest healthy provider.
+    Options: model, temperature, max_tokens, top_p, json_mode, priority. Raises ProviderError.
+    """
+    # Resolved here because the router's worker threads do not see the caller's context
+    options.setdefault("priority", current_priority())
+    return get_router().complete(prompt, **options)
+
+
+def stream_llm_response(prompt: str, **options):
+    """
+    Like get_llm_response, but yields the reply in pieces as the provider generates it.
+    Close the generator to stop generation early. Raises ProviderError.
+    """
+    options.setdefault("priority", current_priority())
+    return get_router().stream(prompt, **options)
+
 
 def get_groq_response(prompt: str, model: str = "llama3-8b-8192") -> str:
     try:
-        response = groq_client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=1,
-            max_completion_tokens=1024,
-            top_p=1,
-            stream=False,
-        )
-        return response.choices[0].message.content
+        return get_llm_response(prompt, model=model, temperature=1, max_tokens=1024, top_p=1)
     except Exception as e:
         print(f"Groq Error: {e}")
         return "{}"  # Safe fallback
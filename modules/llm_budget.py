@@ -0,0 +1,211 @@
+"""
+Shared request/token budget for rate-limited LLM providers.
+
+Every process on the host (or, with the Postgres store, every host) draws from one
+token bucket per provider, refilled at the provider's per-minute limits times
+LLM_BUDGET_HEADROOM so sustained throughput stays just under them. Calls estimate
+their tokens up front (prompt + response allowance) and wait their turn instead of
+firing and collecting 429s; a 429 that still gets through empties the bucket so
+every worker backs off together.
+
+Interactive work (uploads a user is waiting on) goes first: while an interactive
+call is waiting, background calls hold back, and background calls can never dip
+into the last LLM_BUDGET_RESERVE share of the bucket. A background call estimated
+at more than the rest of the bucket is charged that share, so it waits for a full
+background share rather than forever.
+
+    GROQ_RPM=30 GROQ_TPM=30000          # limits for the "groq" provider (kind upper-cased)
+    LLM_BUDGET_STORE=file|postgres      # file: flock'd JSON in LLM_BUDGET_DIR (default)
+"""
+import os
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from modules.utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+LLM_BUDGET_STORE = os.getenv("LLM_BUDGET_STORE", "file")
+LLM_BUDGET_DIR = os.getenv("LLM_BUDGET_DIR", "/tmp")
+LLM_BUDGET_HEADROOM = float(os.getenv("LLM_BUDGET_HEADROOM", "0.9"))
+LLM_BUDGET_RESERVE = float(os.getenv("LLM_BUDGET_RESERVE", "0.2"))
+# Expected reply size when the call does not set max_tokens
+LLM_BUDGET_RESPONSE_TOKENS = int(os.getenv("LLM_BUDGET_RESPONSE_TOKENS", "512"))
+# Longest a call waits for budget before giving up (0 waits forever)
+LLM_BUDGET_TIMEOUT = float(os.getenv("LLM_BUDGET_TIMEOUT", "300"))
+# How long a waiting interactive call keeps background calls paused without renewing
+INTERACTIVE_HOLD = 2.0
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority = contextvars.ContextVar("llm_priority", default=BACKGROUND)
+
+
+class BudgetTimeout(Exception):
+    """Raised when a call could not get budget within LLM_BUDGET_TIMEOUT."""
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Marks LLM calls made inside the block (in this thread/context) as interactive or background."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class FileBudgetStore:
+    """Bucket state in a JSON file guarded by flock; shared by every process on the host."""
+
+    def __init__(self, directory: str = LLM_BUDGET_DIR):
+        self.directory = directory
+        self.local_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self, key: str):
+        path = os.path.join(self.directory, f"llm_budget_{key}.json")
+        with self.local_lock, open(path, "a+") as handle:
+            try:
+                import fcntl
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            except ImportError:
+                pass  # No flock on this platform; the bucket is per process
+            handle.seek(0)
+            try:
+                state = json.loads(handle.read() or "{}")
+            except json.JSONDecodeError:
+                state = {}
+            yield state
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps(state))
+            handle.flush()
+
+
+class PostgresBudgetStore:
+    """Bucket state in the llm_budget table, locked with SELECT ... FOR UPDATE; shared across hosts."""
+
+    @contextmanager
+    def locked(self, key: str):
+        from sqlalchemy.dialects.postgresql import insert
+        from models import LLMBudget, init_db
+        from modules.db.session import session_scope
+
+        init_db()
+        with session_scope() as db:
+            db.execute(insert(LLMBudget).values(key=key, state={}).on_conflict_do_nothing())
+            row = db.query(LLMBudget).filter(LLMBudget.key == key).with_for_update().one()
+            state = dict(row.state or {})
+            yield state
+            row.state = state
+
+
+class TokenBucket:
+    """Requests-per-minute and tokens-per-minute bucket for one provider."""
+
+    def __init__(self, key: str, rpm: int = 0, tpm: int = 0, store=None):
+        self.key = key
+        self.request_capacity = rpm * LLM_BUDGET_HEADROOM
+        self.token_capacity = tpm * LLM_BUDGET_HEADROOM
+        self.store = store or _default_store()
+
+    def _refill(self, state: Dict, now: float):
+        elapsed = max(0.0, now - state.get("updated", now))
+        state["requests"] = min(self.request_capacity,
+                                state.get("requests", self.request_capacity) + elapsed * self.request_capacity / 60)
+        state["tokens"] = min(self.token_capacity,
+                              state.get("tokens", self.token_capacity) + elapsed * self.token_capacity / 60)
+        state["updated"] = now
+
+    def _try_take(self, tokens: float, priority: str) -> float:
+        """Takes the budget and returns 0, or returns the seconds worth waiting before retrying."""
+        with self.store.locked(self.key) as state:
+            now = time.time()
+            self._refill(state, now)
+            interactive = priority == INTERACTIVE
+            floor = 0.0 if interactive else LLM_BUDGET_RESERVE
+
+            # Never need more than a full bucket, or the call could never fit; what a
+            # call needs beyond the reserve it must leave is what it is charged
+            request_reserve = floor * self.request_capacity
+            token_reserve = floor * self.token_capacity
+            request_needed = min(1 + request_reserve, self.request_capacity)
+            token_needed = min(tokens + token_reserve, self.token_capacity)
+
+            waits = []
+            if self.request_capacity:
+                waits.append((request_needed - state["requests"]) * 60 / self.request_capacity)
+            if self.token_capacity:
+                waits.append((token_needed - state["tokens"]) * 60 / self.token_capacity)
+            if not interactive and state.get("interactive_until", 0) > now:
+                waits.append(state["interactive_until"] - now)
+
+            wait = max(waits + [0.0])
+            if wait <= 0:
+                if self.request_capacity:
+                    state["requests"] -= request_needed - request_reserve
+                if self.token_capacity:
+                    state["tokens"] -= token_needed - token_reserve
+                return 0.0
+            if interactive:
+                # Ask background callers everywhere to stand aside while this one waits
+                state["interactive_until"] = now + INTERACTIVE_HOLD
+            return wait
+
+    def acquire(self, tokens: float, priority: Optional[str] = None, timeout: float = LLM_BUDGET_TIMEOUT):
+        priority = priority or current_priority()
+        deadline = time.monotonic() + timeout if timeout else None
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens, priority)
+            if wait <= 0:
+                if waited:
+                    logger.info(f"{priority} LLM call on {self.key} waited {waited:.1f}s for budget")
+                return
+            # Short, jittered naps so waiters in different processes do not wake in lockstep
+            nap = min(wait, INTERACTIVE_HOLD / 2 if priority == INTERACTIVE else 1.0) * random.uniform(0.8, 1.2)
+            if deadline is not None and time.monotonic() + nap > deadline:
+                raise BudgetTimeout(f"No {self.key} LLM budget for {tokens:.0f} tokens within {timeout:.0f}s")
+            time.sleep(nap)
+            waited += nap
+
+    def penalise(self):
+        """The provider rejected a call for rate limiting: empty the bucket so everyone backs off."""
+        with self.store.locked(self.key) as state:
+            self._refill(state, time.time())
+            state["requests"] = 0.0
+            state["tokens"] = 0.0
+
+    def estimate(self, prompt: str, options: Dict) -> int:
+        return estimate_tokens(prompt) + (options.get("max_tokens") or LLM_BUDGET_RESPONSE_TOKENS)
+
+
+def _default_store():
+    return PostgresBudgetStore() if LLM_BUDGET_STORE == "postgres" else FileBudgetStore()
+
+
+def budget_from_env(name: str) -> Optional[TokenBucket]:
+    """Bucket for provider `name` from <NAME>_RPM / <NAME>_TPM; None when neither is set."""
+    prefix = name.upper()
+    rpm = int(os.getenv(f"{prefix}_RPM", "0"))
+    tpm = int(os.getenv(f"{prefix}_TPM", "0"))
+    if not (rpm or tpm):
+        return None
+    return TokenBucket(name, rpm, tpm)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status == 429 or "429" in str(error) or "rate limit" in str(error).lower()
@@ -0,0 +1,464 @@
+import os
+import json
+import time
+import logging
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Optional
+
+from modules.llm_budget import BudgetTimeout, budget_from_env, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+LLM_ROUTER_THREADS = int(os.getenv("LLM_ROUTER_THREADS", "32"))
+# Samples needed before a provider's latency is trusted for ranking and hedging
+MIN_SAMPLES = 5
+STATS_WINDOW = 100
+
+
+class ProviderError(Exception):
+    """Raised when a provider call fails or every provider is unavailable."""
+
+
+class ProviderStats:
+    """Rolling latency and outcome window for one provider."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency: Optional[float], ok: bool):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok and latency is not None:
+                self.latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        with self.lock:
+            return (self.outcomes.count(False) / len(self.outcomes)) if self.outcomes else 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "samples": len(self.latencies),
+            "p50_ms": round(1000 * (self.percentile(50) or 0), 1),
+            "p95_ms": round(1000 * (self.percentile(95) or 0), 1),
+            "error_rate": round(self.error_rate, 3),
+        }
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and keeps the provider out of
+    rotation for `cooldown` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Gives back a trial slot taken by allow() for a call that never reached the provider."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record(self, ok: bool):
+        with self.lock:
+            self.trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class Provider:
+    """
+    One LLM backend. Subclasses implement _complete(prompt, options) -> str and may
+    implement _stream(prompt, options) yielding text deltas.
+    """
+    kind = "base"
+
+    def __init__(self, name: str, model: str, failure_threshold: int = 5, cooldown: float = 30.0, budget=None):
+        self.name = name
+        self.model = model
+        self.stats = ProviderStats()
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.budget = budget  # Shared rate-limit bucket (modules.llm_budget), if the provider has limits
+
+    def _wait_for_budget(self, prompt: str, options: Dict):
+        if self.budget is None:
+            return
+        try:
+            self.budget.acquire(self.budget.estimate(prompt, options), options.get("priority"))
+        except BudgetTimeout as e:
+            # Not the provider's fault: no breaker penalty, but let the router try elsewhere.
+            # A half-open trial must be handed back, or the breaker would never admit another
+            self.breaker.release()
+            raise ProviderError(f"{self.name}: {e}") from e
+
+    def _record_failure(self, error: Exception, latency: Optional[float]):
+        self.stats.record(latency, ok=False)
+        self.breaker.record(ok=False)
+        if self.budget is not None and is_rate_limit_error(error):
+            self.budget.penalise()
+
+    def complete(self, prompt: str, **options) -> str:
+        self._wait_for_budget(prompt, options)
+        started = time.perf_counter()
+        try:
+            text = self._complete(prompt, options)
+        except Exception as e:
+            self._record_failure(e, time.perf_counter() - started)
+            raise ProviderError(f"{self.name}: {e}") from e
+        self.stats.record(time.perf_counter() - started, ok=True)
+        self.breaker.record(ok=True)
+        return text
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        """
+        Yields reply deltas. Closing the generator early (the caller has what it needs)
+        counts as success. The latency recorded is the whole call, as for complete(): up to
+        the last delta, or to the hang-up, which callers only do once the reply is usable.
+        """
+        self._wait_for_budget(prompt, options)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield from self._stream(prompt, options)
+        except Exception as e:
+            failed = True
+            self._record_failure(e, time.perf_counter() - started)
+            raise ProviderError(f"{self.name}: {e}") from e
+        finally:
+            if not failed:
+                self.stats.record(time.perf_counter() - started, ok=True)
+                self.breaker.record(ok=True)
+
+    def _model(self, options: Dict) -> str:
+        return options.get("model") or self.model
+
+    def _complete(self, prompt: str, options: Dict) -> str:
+        raise NotImplementedError
+
+    def _stream(self, prompt: str, options: Dict) -> Iterator[str]:
+        # Backends without streaming deliver the whole reply as one delta
+        yield self._complete(prompt, options)
+
+
+class GroqProvider(Provider):
+    kind = "groq"
+
+    def _create(self, prompt, options, stream):
+        from modules.llm import get_groq_client
+
+        kwargs = {"temperature": options.get("temperature", 1), "top_p": options.get("top_p", 1)}
+        if options.get("max_tokens"):
+            kwargs["max_completion_tokens"] = options["max_tokens"]
+        if options.get("json_mode"):
+            kwargs["response_format"] = {"type": "json_object"}
+        return get_groq_client().chat.completions.create(
+            model=self._model(options),
+            messages=[{"role": "user", "content": prompt}],
+            stream=stream,
+            **kwargs
+        )
+
+    def _complete(self, prompt, options):
+        return self._create(prompt, options, stream=False).choices[0].message.content
+
+    def _stream(self, prompt, options):
+        response = self._create(prompt, options, stream=True)
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Hanging up stops generation on Groq's side
+            response.close()
+
+
+class GeminiProvider(Provider):
+    kind = "gemini"
+
+    def _model(self, options):
+        # Model overrides name Groq/OpenAI models; Gemini keeps its own
+        return self.model
+
+    def _config(self, options):
+        config = {"temperature": options.get("temperature", 1), "top_p": options.get("top_p", 1)}
+        if options.get("max_tokens"):
+            config["max_output_tokens"] = options["max_tokens"]
+        if options.get("json_mode"):
+            config["response_mime_type"] = "application/json"
+        return config
+
+    def _complete(self, prompt, options):
+        from modules.llm import get_gemini_model
+
+        response = get_gemini_model(self.model).generate_content(prompt, generation_config=self._config(options))
+        return response.text
+
+    def _stream(self, prompt, options):
+        from modules.llm import get_gemini_model
+
+        response = get_gemini_model(self.model).generate_content(
+            prompt, generation_config=self._config(options), stream=True
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class OpenAICompatibleProvider(Provider):
+    """Any /chat/completions endpoint, including the fake server in loadtest/."""
+    kind = "openai"
+
+    def __init__(self, name, model, base_url, api_key=None, timeout=60.0, **kwargs):
+        super().__init__(name, model, **kwargs)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, prompt, options, stream):
+        payload = {
+            "model": self._model(options),
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": options.get("temperature", 1),
+            "top_p": options.get("top_p", 1),
+        }
+        if options.get("max_tokens"):
+            payload["max_tokens"] = options["max_tokens"]
+        if options.get("json_mode"):
+            payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream"] = True
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions", data=json.dumps(payload).encode(), headers=headers
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _complete(self, prompt, options):
+        with self._request(prompt, options, stream=False) as response:
+            body = json.loads(response.read())
+        return body["choices"][0]["message"]["content"]
+
+    def _stream(self, prompt, options):
+        # Server-sent events: one "data: {chunk}" line per delta, closed by "data: [DONE]"
+        with self._request(prompt, options, stream=True) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+
+class LLMRouter:
+    """
+    Sends each call to the fastest healthy provider, judged by recent p50 latency
+    inflated by error rate. With hedging on, if the first call has not returned
+    after the hedge delay (fixed, or the provider's own p95), a second call goes to
+    the next-best provider (or the same one if it is alone) and whichever succeeds
+    first wins. Failed calls fall through to the next provider immediately.
+    """
+
+    def __init__(self, providers: List[Provider], hedge: bool = False, hedge_after: Optional[float] = None,
+                 hedge_default: float = 2.0, hedge_floor: float = 0.25):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_default = hedge_default
+        self.hedge_floor = hedge_floor
+        self.executor = ThreadPoolExecutor(max_workers=LLM_ROUTER_THREADS, thread_name_prefix="llm-router")
+
+    def ranked(self) -> List[Provider]:
+        """Providers with a closed or trial-ready breaker, fastest first; configuration order breaks ties."""
+        def score(item):
+            index, provider = item
+            p50 = provider.stats.percentile(50)
+            # Unmeasured providers rank as instant so they get sampled
+            return ((p50 or 0.0) * (1 + 4 * provider.stats.error_rate), index)
+
+        ordered = [p for _, p in sorted(enumerate(self.providers), key=score)]
+        return [p for p in ordered if p.breaker.state != "open"]
+
+    def _hedge_delay(self, provider: Provider) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        p95 = provider.stats.percentile(95)
+        return max(p95, self.hedge_floor) if p95 is not None else self.hedge_default
+
+    def _next(self, candidates: List[Provider]) -> Optional[Provider]:
+        while candidates:
+            provider = candidates.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def complete(self, prompt: str, **options) -> str:
+        candidates = self.ranked()
+        pending = {}
+        last_error = None
+        hedged = False
+
+        first = self._next(candidates)
+        if first is None:
+            # Every breaker is open: fail fast rather than call a provider known to be down
+            raise ProviderError("No LLM provider available")
+        pending[self.executor.submit(first.complete, prompt, **options)] = first
+        hedge_target = first
+
+        while pending:
+            timeout = None if (hedged or not self.hedge) else self._hedge_delay(hedge_target)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Slow call: fire the hedge and keep waiting on both
+                hedged = True
+                backup = self._next(candidates) or (hedge_target if len(self.providers) == 1 else None)
+                if backup is not None:
+                    logger.info(f"Hedging slow {hedge_target.name} call with {backup.name}")
+                    pending[self.executor.submit(backup.complete, prompt, **options)] = backup
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except ProviderError as e:
+                    last_error = e
+                    logger.warning(f"LLM provider failed: {e}")
+
+            if not pending:
+                fallback = self._next(candidates)
+                if fallback is not None:
+                    pending[self.executor.submit(fallback.complete, prompt, **options)] = fallback
+                    hedge_target = fallback
+
+        raise last_error or ProviderError("No LLM provider available")
+
+    def stream(self, prompt: str, **options) -> Iterator[str]:
+        """
+        Streams from the fastest healthy provider. A provider that fails before its first
+        delta is replaced by the next one; a failure after output has started is raised,
+        as the caller has already consumed part of that reply. Streams are not hedged.
+        """
+        candidates = self.ranked()
+        provider = self._next(candidates)
+        last_error = None
+
+        while provider is not None:
+            started = False
+            deltas = provider.stream(prompt, **options)
+            try:
+                for delta in deltas:
+                    started = True
+                    yield delta
+                return
+            except ProviderError as e:
+                if started:
+                    raise
+                last_error = e
+                logger.warning(f"LLM provider failed before streaming: {e}")
+            finally:
+                deltas.close()
+            provider = self._next(candidates)
+
+        raise last_error or ProviderError("No LLM provider available")
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Best recent latency percentile across healthy providers, for callers that adapt to LLM speed."""
+        values = [p.stats.percentile(pct) for p in self.providers if p.breaker.state != "open"]
+        values = [v for v in values if v is not None]
+        return min(values) if values else None
+
+    def snapshot(self) -> Dict:
+        return {
+            p.name: {**p.stats.snapshot(), "breaker": p.breaker.state, "model": p.model}
+            for p in self.providers
+        }
+
+
+def build_providers_from_env() -> List[Provider]:
+    """
+    LLM_PROVIDERS is a comma-separated list of:
+        groq                     Groq (GROQ_MODEL, GROQ_BASE_URL honoured by the SDK)
+        gemini                   Google Gemini (GEMINI_MODEL)
+        openai=<base_url>        any OpenAI-compatible endpoint (OPENAI_MODEL, OPENAI_API_KEY)
+    <KIND>_RPM / <KIND>_TPM put a provider behind a shared token budget (modules.llm_budget).
+    """
+    failure_threshold = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    cooldown = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+    breaker = {"failure_threshold": failure_threshold, "cooldown": cooldown}
+
+    providers = []
+    for entry in filter(None, (e.strip() for e in os.getenv("LLM_PROVIDERS", "groq").split(","))):
+        kind, _, target = entry.partition("=")
+        budget = budget_from_env(kind)
+        if kind == "groq":
+            providers.append(GroqProvider("groq", os.getenv("GROQ_MODEL", "llama3-8b-8192"), budget=budget, **breaker))
+        elif kind == "gemini":
+            providers.append(GeminiProvider(
+                "gemini", os.getenv("GEMINI_MODEL", "gemini-1.5-pro-latest"), budget=budget, **breaker
+            ))
+        elif kind == "openai" and target:
+            providers.append(OpenAICompatibleProvider(
+                f"openai:{target}", os.getenv("OPENAI_MODEL", "llama3-8b-8192"), target,
+                api_key=os.getenv("OPENAI_API_KEY"), budget=budget, **breaker
+            ))
+        else:
+            raise ValueError(f"Unknown LLM provider entry '{entry}'")
+    return providers
+
+
+def build_router_from_env() -> LLMRouter:
+    hedge_after_ms = os.getenv("LLM_HEDGE_AFTER_MS")
+    return LLMRouter(
+        build_providers_from_env(),
+        hedge=os.getenv("LLM_HEDGE", "0") == "1",
+        hedge_after=float(hedge_after_ms) / 1000 if hedge_after_ms else None,
+        hedge_default=float(os.getenv("LLM_HEDGE_DEFAULT_MS", "2000")) / 1000,
+    )
@@ -0,0 +1,52 @@
+from bisect import bisect_right
+from typing import Dict, List
+
+
+def assign_words_to_turns(words: List[Dict], turns: List[Dict]) -> List[int]:
+    """
+    For each timestamped word ({"word", "start", "end"}) returns the index of the
+    speaker turn ({"speaker", "start", "end"}, sorted by start) it overlaps most.
+    Words that fall in a gap between turns go to the nearest turn; -1 if there are no turns.
+    """
+    if not turns:
+        return [-1] * len(words)
+    starts = [turn["start"] for turn in turns]
+    # Longest turn end seen so far, so overlapping turns are not missed when scanning back
+    reach, longest = [], float("-inf")
+    for turn in turns:
+        longest = max(longest, turn["end"])
+        reach.append(longest)
+
+    assigned = []
+    for word in words:
+        start, end = word["start"], max(word["end"], word["start"])
+        best, best_overlap = -1, 0.0
+        i = bisect_right(starts, end) - 1
+        while i >= 0 and reach[i] > start:
+            overlap = min(end, turns[i]["end"]) - max(start, turns[i]["start"])
+            if overlap > best_overlap or (best == -1 and overlap >= 0):
+                best, best_overlap = i, max(overlap, 0.0)
+            i -= 1
+        if best == -1:
+            midpoint = (start + end) / 2
+            best = min(range(len(turns)), key=lambda k: max(turns[k]["start"] - midpoint, midpoint - turns[k]["end"]))
+        assigned.append(best)
+    return assigned
+
+
+def align_words_to_turns(words: List[Dict], turns: List[Dict]) -> List[Dict]:
+    """
+    Builds the diarized transcript from a full-audio word transcription and RTTM turns:
+    one {"speaker", "start", "end", "text"} entry per turn that received words, in
+    turn order, matching what per-segment transcription returns.
+    """
+    turns = sorted(turns, key=lambda turn: turn["start"])
+    texts = [[] for _ in turns]
+    for word, index in zip(words, assign_words_to_turns(words, turns)):
+        if index >= 0 and word["word"].strip():
+            texts[index].append(word["word"].strip())
+
+    return [
+        {"speaker": turn["speaker"], "start": turn["start"], "end": turn["end"], "text": " ".join(text)}
+        for turn, text in zip(turns, texts) if text
+    ]
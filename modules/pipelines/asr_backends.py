@@ -0,0 +1,193 @@
+"""
+Whisper inference backends for CPU and GPU nodes.
+
+    torch        fp32 PyTorch through the transformers pipeline (the original behaviour)
+    torch-int8   the same model with its Linear layers dynamically quantized to int8
+    ctranslate2  faster-whisper (CTranslate2) with int8 weights; needs `faster-whisper`
+    onnx         ONNX Runtime export through optimum; needs `optimum[onnxruntime]`
+
+Pick one per deployment with ASR_BACKEND; benchmarks/asr_backends.py compares
+accuracy and speed on a fixed fixture. Every backend takes 16 kHz mono float32
+audio as a numpy array and returns the transcribed text, or with transcribe_words
+a list of {"word", "start", "end"} (seconds) for long-form audio.
+"""
+import os
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules.utils.output_suppression_utils import suppress_output, silence_transformers
+
+ASR_BACKEND = os.getenv("ASR_BACKEND", "torch")
+# Intra-op threads per model; 0 leaves the library default (usually every core)
+ASR_THREADS = int(os.getenv("ASR_THREADS", "0"))
+ASR_INTEROP_THREADS = int(os.getenv("ASR_INTEROP_THREADS", "0"))
+# Cached ONNX exports, so the export cost is paid once per model
+ASR_ONNX_DIR = os.getenv("ASR_ONNX_DIR", "./models/onnx")
+# Window for long-form transcription through the transformers pipeline
+ASR_CHUNK_SECONDS = int(os.getenv("ASR_CHUNK_SECONDS", "30"))
+
+BACKENDS = ("torch", "torch-int8", "ctranslate2", "onnx")
+SAMPLE_RATE = 16000
+
+
+class ASRBackend:
+    name = "base"
+
+    def __init__(self, model: str, threads: int = 0):
+        self.model = model
+        self.threads = threads
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        raise NotImplementedError
+
+    def transcribe_words(self, audio: np.ndarray) -> List[Dict]:
+        raise NotImplementedError
+
+
+def _pipeline_words(pipe, audio: np.ndarray, level) -> List[Dict]:
+    """Long-form transcription through a transformers ASR pipeline, as timestamped words or chunks."""
+    with suppress_output():
+        output = pipe(
+            {"raw": audio, "sampling_rate": SAMPLE_RATE},
+            chunk_length_s=ASR_CHUNK_SECONDS,
+            return_timestamps=level
+        )
+    words = []
+    for chunk in output.get("chunks", []):
+        start, end = chunk["timestamp"]
+        if start is None:
+            continue
+        # The final chunk can come back open-ended
+        end = end if end is not None else len(audio) / SAMPLE_RATE
+        words.append({"word": chunk["text"], "start": float(start), "end": float(end)})
+    return words
+
+
+def _set_torch_threads(threads: int, interop_threads: int = ASR_INTEROP_THREADS):
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only settable before the first parallel op in the process
+            logging.warning("ASR_INTEROP_THREADS ignored: torch inter-op pool already started")
+
+
+class TorchBackend(ASRBackend):
+    name = "torch"
+    quantize = False
+
+    def __init__(self, model, threads=0):
+        super().__init__(model, threads)
+        import torch
+        from transformers import pipeline as hf_pipeline
+
+        _set_torch_threads(threads)
+        silence_transformers()
+        self.pipe = hf_pipeline("automatic-speech-recognition", model=f"openai/whisper-{model}", device="cpu")
+        if self.quantize:
+            # Weights of every Linear layer become int8; activations are quantized on the fly
+            self.pipe.model = torch.quantization.quantize_dynamic(
+                self.pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    def transcribe(self, audio):
+        with suppress_output():
+            return self.pipe({"raw": audio, "sampling_rate": SAMPLE_RATE}).get("text", "").strip()
+
+    def transcribe_words(self, audio):
+        return _pipeline_words(self.pipe, audio, "word")
+
+
+class TorchInt8Backend(TorchBackend):
+    name = "torch-int8"
+    quantize = True
+
+
+class CTranslate2Backend(ASRBackend):
+    name = "ctranslate2"
+
+    def __init__(self, model, threads=0):
+        super().__init__(model, threads)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("ASR_BACKEND=ctranslate2 needs `pip install faster-whisper`") from e
+        # faster-whisper downloads the converted CTranslate2 weights for the size on first use
+        self.whisper = WhisperModel(
+            model, device="cpu", compute_type="int8",
+            cpu_threads=threads, num_workers=max(1, ASR_INTEROP_THREADS)
+        )
+
+    def transcribe(self, audio):
+        segments, _ = self.whisper.transcribe(audio, beam_size=1)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    def transcribe_words(self, audio):
+        segments, _ = self.whisper.transcribe(audio, beam_size=1, word_timestamps=True)
+        return [
+            {"word": word.word, "start": word.start, "end": word.end}
+            for segment in segments for word in (segment.words or [])
+        ]
+
+
+class ONNXBackend(ASRBackend):
+    name = "onnx"
+
+    def __init__(self, model, threads=0):
+        super().__init__(model, threads)
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        except ImportError as e:
+            raise ImportError("ASR_BACKEND=onnx needs `pip install optimum[onnxruntime]`") from e
+        from transformers import AutoProcessor, pipeline as hf_pipeline
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        if ASR_INTEROP_THREADS:
+            options.inter_op_num_threads = ASR_INTEROP_THREADS
+
+        model_id = f"openai/whisper-{model}"
+        export_dir = os.path.join(ASR_ONNX_DIR, f"whisper-{model}")
+        if os.path.isdir(export_dir):
+            ort_model = ORTModelForSpeechSeq2Seq.from_pretrained(export_dir, session_options=options)
+        else:
+            logging.info(f"Exporting {model_id} to ONNX in {export_dir} (one-off)...")
+            ort_model = ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True, session_options=options)
+            ort_model.save_pretrained(export_dir)
+
+        processor = AutoProcessor.from_pretrained(model_id)
+        silence_transformers()
+        self.pipe = hf_pipeline(
+            "automatic-speech-recognition", model=ort_model,
+            tokenizer=processor.tokenizer, feature_extractor=processor.feature_extractor
+        )
+
+    def transcribe(self, audio):
+        with suppress_output():
+            return self.pipe({"raw": audio, "sampling_rate": SAMPLE_RATE}).get("text", "").strip()
+
+    def transcribe_words(self, audio):
+        # Exported decoders do not return cross-attentions, so timestamps are per phrase
+        return _pipeline_words(self.pipe, audio, True)
+
+
+_BACKEND_CLASSES = {cls.name: cls for cls in (TorchBackend, TorchInt8Backend, CTranslate2Backend, ONNXBackend)}
+
+
+@lru_cache(maxsize=4)
+def load_backend(model: str = "medium", backend: Optional[str] = None, threads: Optional[int] = None) -> ASRBackend:
+    """Loads (once per process) the Whisper `model` size on the requested backend."""
+    backend = backend or ASR_BACKEND
+    if backend not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown ASR backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    logging.info(f"Loading Whisper {model} on the {backend} backend...")
+    return _BACKEND_CLASSES[backend](model, ASR_THREADS if threads is None else threads)
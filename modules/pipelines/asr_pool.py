@@ -0,0 +1,146 @@
+"""
+Sharded segment transcription: one recording's segments spread over a pool of worker
+processes, each with its own Whisper model and its own intra-op thread budget.
+
+    ASR_WORKERS=8 ASR_THREADS=4   # 8 processes x 4 threads on a 32-core box
+
+Workers load their model once and stay warm between recordings. The pool is sized
+down when free memory cannot hold that many model copies (ASR_MEMORY_FRACTION of
+MemAvailable divided by the per-worker estimate, or ASR_WORKER_MEMORY_MB), and is
+replaced at the next recording if that fit changes; there is one pool per configured
+model/backend/shape.
+"""
+import os
+import logging
+import threading
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from modules.pipelines.wav_reader import WavSegmentReader
+
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+ASR_MEMORY_FRACTION = float(os.getenv("ASR_MEMORY_FRACTION", "0.8"))
+ASR_WORKER_MEMORY_MB = int(os.getenv("ASR_WORKER_MEMORY_MB", "0"))
+
+# Rough resident size of one fp32 worker (weights + activations + runtime) per Whisper size
+MODEL_MEMORY_MB = {"tiny": 400, "base": 600, "small": 1500, "medium": 3500, "large": 7000}
+# int8 backends keep roughly this share of the fp32 footprint
+INT8_MEMORY_SHARE = 0.4
+
+_worker_backend = None
+
+
+def _init_worker(model: str, backend: Optional[str], threads: int):
+    """Pool initializer: pins the thread budget and loads the model once per worker."""
+    global _worker_backend
+    import torch
+    from modules.pipelines.asr_backends import load_backend
+
+    torch.set_num_threads(threads)
+    _worker_backend = load_backend(model, backend, threads)
+
+
+@lru_cache(maxsize=4)
+def _reader(path: str, mtime_ns: int, size: int) -> WavSegmentReader:
+    # Keyed on mtime/size too: pipelines reuse "<stem>.wav" names across recordings
+    return WavSegmentReader(path)
+
+
+def _transcribe(task: Tuple[str, int, int, float, float]) -> str:
+    """Worker side: reads only this segment's samples from the WAV, then transcribes them."""
+    path, mtime_ns, size, start, end = task
+    return _worker_backend.transcribe(_reader(path, mtime_ns, size).read(start, end))
+
+
+def available_memory_mb() -> Optional[int]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+def worker_memory_mb(model: str, backend: Optional[str]) -> int:
+    if ASR_WORKER_MEMORY_MB:
+        return ASR_WORKER_MEMORY_MB
+    size = next((mb for name, mb in MODEL_MEMORY_MB.items() if model.startswith(name)), MODEL_MEMORY_MB["large"])
+    if backend in ("torch-int8", "ctranslate2"):
+        size = int(size * INT8_MEMORY_SHARE)
+    return size
+
+
+def plan_workers(model: str, backend: Optional[str], workers: int, threads: int,
+                 reclaim_mb: int = 0) -> Tuple[int, int]:
+    """
+    Caps `workers` by free memory and fills in the per-worker thread count (0 = share
+    the cores). `reclaim_mb` is memory held by a pool this one would replace.
+    """
+    free_mb = available_memory_mb()
+    if free_mb is not None:
+        free_mb += reclaim_mb
+        fit = max(1, int(free_mb * ASR_MEMORY_FRACTION) // worker_memory_mb(model, backend))
+        if fit < workers:
+            logging.warning(f"Memory guard: {free_mb} MB free fits {fit} Whisper {model} workers, not {workers}")
+            workers = fit
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    return workers, threads
+
+
+# (model, backend, configured workers, configured threads) -> (pool, planned workers, planned threads)
+_pools: Dict[Tuple, Tuple[ProcessPoolExecutor, int, int]] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(model: str, backend: Optional[str], workers: int, threads: int) -> Tuple[ProcessPoolExecutor, int]:
+    """
+    Warm worker pool for this model/backend and configured shape, with its worker count.
+    The memory guard is re-checked on every call (counting the memory the current pool
+    holds as reclaimable); if it now allows a different size, the pool is replaced.
+    """
+    key = (model, backend, workers, threads)
+    with _pools_lock:
+        current = _pools.get(key)
+        reclaim_mb = current[1] * worker_memory_mb(model, backend) if current else 0
+        planned_workers, planned_threads = plan_workers(model, backend, workers, threads, reclaim_mb)
+        if current and current[1:] == (planned_workers, planned_threads):
+            return current[0], planned_workers
+        if current:
+            logging.info(f"Resizing ASR pool for Whisper {model}: {current[1]} -> {planned_workers} workers")
+            current[0].shutdown(wait=False)  # Work already queued on the old pool still completes
+        logging.info(f"Starting {planned_workers} ASR workers x {planned_threads} threads for Whisper {model}...")
+        pool = ProcessPoolExecutor(
+            max_workers=planned_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model, backend, planned_threads)
+        )
+        _pools[key] = (pool, planned_workers, planned_threads)
+        return pool, planned_workers
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool, _, _ in _pools.values():
+            pool.shutdown(cancel_futures=True)
+        _pools.clear()
+
+
+def transcribe_sharded(wav_file: str, segments: List[Dict], model: str, backend: Optional[str] = None,
+                       workers: int = ASR_WORKERS, threads: int = 0) -> List[str]:
+    """
+    Transcribes each {"start", "end"} segment of `wav_file` across the worker pool and
+    returns the texts in segment order. Workers read their own segments from disk, so
+    no audio crosses process boundaries. Segments are handed out a few at a time so a
+    worker that draws long segments does not hold up the rest.
+    """
+    pool, workers = get_pool(model, backend, workers, threads)
+    stat = os.stat(wav_file)
+    path = os.path.abspath(wav_file)
+    tasks = [(path, stat.st_mtime_ns, stat.st_size, seg["start"], seg["end"]) for seg in segments]
+    chunksize = max(1, len(segments) // (workers * 4))
+    return list(pool.map(_transcribe, tasks, chunksize=chunksize))
@@ -4,23 +4,33 @@ import json
 import shutil
 import logging
 import subprocess
-import tempfile
-import torchaudio
+import multiprocessing
 import urllib.request
 from tqdm import tqdm
 from pathlib import Path
 from dotenv import load_dotenv
 from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
 from omegaconf import OmegaConf
-from transformers import pipeline as hf_pipeline
 from nemo.collections.asr.models import ClusteringDiarizer
-from modules.utils.output_suppression_utils import suppress_output, silence_transformers
+from modules.utils.output_suppression_utils import suppress_output
+from modules.pipelines.asr_backends import ASR_THREADS, load_backend
+from modules.pipelines.alignment import align_words_to_turns
+from modules.pipelines.asr_pool import ASR_WORKERS, transcribe_sharded
+from modules.pipelines.wav_reader import WavSegmentReader, is_pipeline_ready
+from modules.utils.profiling import profiled
 
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.INFO)
 
+# "sequential": diarize, then transcribe each RTTM segment.
+# "concurrent": diarize in a child process while transcribing the whole file, then align.
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "sequential")
+# Torch threads for the diarization process in concurrent mode; 0 gives it half the cores
+DIARIZATION_THREADS = int(os.getenv("DIARIZATION_THREADS", "0"))
+
 class SpeechProcessingPipeline:
     """
     Modular speech processing pipeline:
@@ -28,37 +38,80 @@ class SpeechProcessingPipeline:
     2. Runs speaker diarization (NeMo)
     3. Transcribes each segment (Whisper)
     4. Returns diarized transcript
+    In concurrent mode steps 2 and 3 overlap: Whisper transcribes the whole file with
+    word timestamps while NeMo diarizes, and words are assigned to speaker turns after.
     """
 
-    def __init__(self, input_audio: str, num_speakers: int = 2, model: str = "medium"):
+    def __init__(self, input_audio: str, num_speakers: int = 2, model: str = "medium",
+                 backend: str = None, threads: int = None, mode: str = None, workers: int = None):
+        """
+        `backend` and `threads` default to ASR_BACKEND / ASR_THREADS (see asr_backends),
+        `mode` to PIPELINE_MODE and `workers` to ASR_WORKERS (see asr_pool).
+        """
         self.input_audio = Path(input_audio)
         self.num_speakers = num_speakers
         self.model = model
+        self.backend = backend
+        self.threads = threads
+        self.mode = mode or PIPELINE_MODE
+        self.workers = workers or ASR_WORKERS
         self.audio_stem = self.input_audio.stem
         self.wav_file = None
         self.rttm_file = None
         self.diarized_transcript = None
+        self.speaker_embeddings = {}  # Diarized speaker label -> titanet centroid
 
     def run_pipeline(self) -> List[Dict[str, str]]:
         self._convert_to_wav()
-        self._run_diarization()
-        self._locate_rttm()
-        transcript = self._transcribe_segments()
+        if self.mode == "concurrent":
+            transcript = self._diarize_and_transcribe_concurrently()
+        else:
+            self._run_diarization()
+            self._locate_rttm()
+            self.speaker_embeddings = self._speaker_centroids()
+            transcript = self._transcribe_segments()
         self._cleanup()
         return transcript
+
+    def _diarize_and_transcribe_concurrently(self) -> List[Dict[str, str]]:
+        """
+        Diarization runs in a child process while this process transcribes, so the
+        wall-clock cost is roughly the slower stage rather than the sum. Cores are
+        split between the two unless DIARIZATION_THREADS / ASR_THREADS are set.
+        """
+        cores = os.cpu_count() or 2
+        diarization_threads = DIARIZATION_THREADS or max(1, cores // 2)
+        asr_threads = self.threads if self.threads is not None else (ASR_THREADS or max(1, cores - diarization_threads))
+
+        # Spawn, not fork: torch and NeMo thread pools do not survive a fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            diarization = pool.submit(
+                _diarize_in_child, str(self.input_audio), self.wav_file, self.num_speakers, diarization_threads
+            )
+            words = self._transcribe_full(asr_threads)
+            diarization.result()
+
+        self._locate_rttm()
+        self.speaker_embeddings = self._speaker_centroids()
+        self.diarized_transcript = align_words_to_turns(words, self._parse_rttm())
+        return self.diarized_transcript
     
+    @profiled("pipeline.convert_to_wav")
     def _convert_to_wav(self):
         """Converts to 16kHz mono WAV if not already."""
-        if self.input_audio.suffix == ".wav":
+        if self.input_audio.suffix == ".wav" and is_pipeline_ready(str(self.input_audio)):
             self.wav_file = str(self.input_audio)
             logging.info("Input is already in WAV format.")
             return
 
-        self.wav_file = f"{self.audio_stem}.wav"
+        # Other WAVs (24-bit, stereo, 44.1 kHz...) are converted too, without overwriting the input
+        self.wav_file = f"{self.audio_stem}.16k.wav" if self.input_audio.suffix == ".wav" else f"{self.audio_stem}.wav"
         logging.info("Converting to WAV...")
         command = f"ffmpeg -i {self.input_audio} -ar 16000 -ac 1 {self.wav_file} -y"
         subprocess.run(command, shell=True, check=True)
 
+    @profiled("pipeline.diarization")
     def _run_diarization(self):
         """Runs NeMo Clustering Diarizer."""
         config_path = self._ensure_diarization_config()
@@ -81,6 +134,8 @@ class SpeechProcessingPipeline:
         config.diarizer.manifest_filepath = "manifest.json"
         config.diarizer.out_dir = "./"
         config.diarizer.speaker_embeddings.model_path = "titanet_large"
+        # Kept for voiceprint matching (modules.voiceprints), read before cleanup
+        config.diarizer.speaker_embeddings.parameters.save_embeddings = True
 
         logging.info("Running diarization...")
         with suppress_output():
@@ -95,32 +150,50 @@ class SpeechProcessingPipeline:
         self.rttm_file = matches[0]
         logging.info(f"Found RTTM: {self.rttm_file}")
 
-    def _transcribe_segments(self) -> List[Dict[str, str]]:
-        """Transcribes segments from RTTM."""
-        waveform, sr = torchaudio.load(self.wav_file)
-        segments = self._parse_rttm()
+    def _speaker_centroids(self):
+        """Per-speaker embedding centroids from the diarizer's outputs; empty if unavailable."""
+        from modules.voiceprints import cluster_centroids
+        try:
+            return cluster_centroids("speaker_outputs", self._parse_rttm())
+        except Exception as e:
+            logging.warning(f"Speaker embeddings unavailable, voiceprint matching skipped: {e}")
+            return {}
 
-        silence_transformers()
-        asr = hf_pipeline("automatic-speech-recognition", model=f"openai/whisper-{self.model}")
-        results = []
+    @profiled("pipeline.transcription_full")
+    def _transcribe_full(self, threads: int) -> List[Dict]:
+        """Transcribes the whole file in one pass with word timestamps."""
+        # Long-form decoding needs the whole signal, but only as 16 kHz mono float32
+        with WavSegmentReader(self.wav_file) as reader:
+            audio = reader.read_all()
+        asr = load_backend(self.model, self.backend, threads)
+        logging.info("Transcribing full audio with word timestamps...")
+        return asr.transcribe_words(audio)
 
-        logging.info("Transcribing segments...")
-        for seg in tqdm(segments, desc="Transcribing", unit="segment"):
-            start_sample = int(seg["start"] * sr)
-            end_sample = int(seg["end"] * sr)
-            audio_chunk = waveform[:, start_sample:end_sample]
+    @profiled("pipeline.transcription")
+    def _transcribe_segments(self) -> List[Dict[str, str]]:
+        """Transcribes segments from RTTM, reading each segment's samples only when needed."""
+        segments = self._parse_rttm()
 
-            with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
-                torchaudio.save(tmp.name, audio_chunk, sr)
-                with suppress_output():
-                    transcription = asr(tmp.name).get("text", "").strip()
+        with WavSegmentReader(self.wav_file) as reader:
+            if self.workers > 1:
+                # Sharded across warm worker processes, texts come back in segment order
+                logging.info(f"Transcribing {len(segments)} segments on up to {self.workers} workers...")
+                texts = transcribe_sharded(self.wav_file, segments, self.model, self.backend,
+                                           self.workers, self.threads or ASR_THREADS)
+            else:
+                asr = load_backend(self.model, self.backend, self.threads)
+                logging.info("Transcribing segments...")
+                texts = (asr.transcribe(reader.read(seg["start"], seg["end"]))
+                         for seg in tqdm(segments, desc="Transcribing", unit="segment"))
 
-            results.append({
-                "speaker": seg["speaker"],
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": transcription
-            })
+            results = []
+            for seg, transcription in zip(segments, texts):
+                results.append({
+                    "speaker": seg["speaker"],
+                    "start": seg["start"],
+                    "end": seg["end"],
+                    "text": transcription
+                })
 
         self.diarized_transcript = results
         return results
@@ -175,6 +248,15 @@ class SpeechProcessingPipeline:
             urllib.request.urlretrieve(url, path)
         return path
 
+def _diarize_in_child(input_audio: str, wav_file: str, num_speakers: int, threads: int):
+    """Entry point of the diarization process in concurrent mode; leaves the RTTM on disk."""
+    import torch
+    torch.set_num_threads(threads)
+    pipeline = SpeechProcessingPipeline(input_audio, num_speakers=num_speakers)
+    pipeline.wav_file = wav_file
+    pipeline._run_diarization()
+
+
 if __name__ == "__main__":
     pipeline = SpeechProcessingPipeline(input_audio="batman.mp3", num_speakers=2, model="base")
     result = pipeline.run_pipeline()
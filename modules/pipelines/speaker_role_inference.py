@@ -1,32 +1,71 @@
 # import loggin
-from modules.pipelines.speaker_diarization_based_transcription_pipeline import SpeechProcessingPipeline
 from modules.db.postgres import insert_transcript
 from modules.prompts import identify_speaker_role_prompt, format_transcript_for_roles
 from modules.llm import get_groq_response
+from modules.utils.profiling import profiled
+from modules.utils.prompt_compaction import PROMPT_COMPACTION, compact_samples
+import os
 import json
+import logging
+
+# Token budget per speaker for the lines sent to role classification
+ROLE_SAMPLE_TOKENS = int(os.getenv("ROLE_SAMPLE_TOKENS", "80"))
 
 
 class SpeakerRoleInferencePipeline:
     def __init__(self, audio_file_path: str):
         self.audio_file_path = audio_file_path
+        self.speaker_embeddings = {}
 
     def run(self):
         transcript = self.diarize_and_transcribe(self.audio_file_path)
-        samples = self.sample_utterances(transcript)
-        role_mapping = self.identify_roles(samples)
-        enriched_transcript = self.label_full_transcript(transcript, role_mapping)
+        # Enrolled voices resolve to employee names; only the rest need the LLM
+        known_speakers = self.match_known_speakers(self.speaker_embeddings)
+        unknown = [entry for entry in transcript if self._speaker_key(entry["speaker"]) not in known_speakers]
+        role_mapping = self.identify_roles(self.sample_utterances(unknown)) if unknown else {}
+        enriched_transcript = self.label_full_transcript(transcript, {**role_mapping, **known_speakers})
         self.insert_to_db(enriched_transcript)
         # print(f"enriched_transcript: {enriched_transcript}")
         return enriched_transcript
 
     def diarize_and_transcribe(self, audio_path):
-        return SpeechProcessingPipeline(audio_path).run_pipeline()
+        # Imported here so the text-only steps (sampling, labelling) load without torch/NeMo
+        from modules.pipelines.speaker_diarization_based_transcription_pipeline import SpeechProcessingPipeline
+
+        pipeline = SpeechProcessingPipeline(audio_path)
+        transcript = pipeline.run_pipeline()
+        self.speaker_embeddings = pipeline.speaker_embeddings
+        return transcript
+
+    def match_known_speakers(self, speaker_embeddings):
+        """Maps "Speaker_N" to employee names for voices enrolled in modules.voiceprints."""
+        if not speaker_embeddings:
+            return {}
+        try:
+            from modules.voiceprints import get_index
+            matches = get_index().match(speaker_embeddings)
+        except Exception as e:
+            logging.warning(f"Voiceprint matching failed, falling back to role inference: {e}")
+            return {}
+        for speaker, (name, score) in matches.items():
+            logging.info(f"{speaker} matched {name} by voiceprint (similarity {score:.2f})")
+        return {self._speaker_key(speaker): name for speaker, (name, _) in matches.items()}
+
+    @staticmethod
+    def _speaker_key(speaker):
+        return f"Speaker_{speaker.split('_')[1]}"
 
-    def sample_utterances(self, transcript, max_per_speaker=3):
+    def sample_utterances(self, transcript, max_tokens_per_speaker=ROLE_SAMPLE_TOKENS, max_per_speaker=3):
         """
-        Samples up to `max_per_speaker` utterances per speaker and returns a flat list
-        of dicts with speaker and utterance keys.
+        Samples each speaker's most informative utterances, skipping greetings and other
+        filler, up to `max_tokens_per_speaker` estimated tokens, and returns a flat list
+        of dicts with speaker and text keys. With PROMPT_COMPACTION off it takes the
+        first `max_per_speaker` utterances instead.
         """
+        if PROMPT_COMPACTION:
+            samples, _ = compact_samples(transcript, max_tokens_per_speaker)
+            return samples
+
         utterance_count = {}
         samples = []
 
@@ -44,6 +83,7 @@ class SpeakerRoleInferencePipeline:
 
         return samples
 
+    @profiled("pipeline.role_inference")
     def identify_roles(self, samples):
         # return infer_speaker_roles(samples)  # Use your Groq LLM logic
         formatted = format_transcript_for_roles(samples)
@@ -61,7 +101,7 @@ class SpeakerRoleInferencePipeline:
 
     def label_full_transcript(self, transcript, role_mapping):
         return [
-            {**entry, "speaker": role_mapping.get(f"Speaker_{entry['speaker'].split('_')[1]}", entry['speaker'])}
+            {**entry, "speaker": role_mapping.get(self._speaker_key(entry['speaker']), entry['speaker'])}
             for entry in transcript
         ]
 
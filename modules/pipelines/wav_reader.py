@@ -0,0 +1,130 @@
+import os
+import struct
+import threading
+from typing import Tuple
+
+import numpy as np
+
+# What every ASR backend expects (see asr_backends); kept here so readers stay lightweight
+SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_DTYPES = {(WAVE_FORMAT_PCM, 16): "<i2", (WAVE_FORMAT_PCM, 32): "<i4", (WAVE_FORMAT_IEEE_FLOAT, 32): "<f4"}
+
+
+def _parse_header(path: str) -> Tuple[int, int, int, int, int, int]:
+    """Returns (format, channels, sample_rate, bits_per_sample, data_offset, data_bytes) from the RIFF chunks."""
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size)
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]  # First two bytes of the sub-format GUID
+                fmt = (tag, channels, rate, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path}: data chunk before fmt chunk")
+                # ffmpeg writes 0xFFFFFFFF when streaming to a pipe; fall back to the file size
+                data_bytes = min(size, os.path.getsize(path) - f.tell())
+                return (*fmt, f.tell(), data_bytes)
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)  # Chunks are word aligned
+
+
+def is_pipeline_ready(path: str) -> bool:
+    """
+    True if `path` is a WAV the pipeline can use as is: an encoding WavSegmentReader
+    reads and already 16 kHz mono, as diarization expects. Anything else is converted.
+    """
+    try:
+        tag, channels, rate, bits, _, _ = _parse_header(path)
+    except (OSError, ValueError, struct.error):
+        return False
+    return (tag, bits) in _DTYPES and channels == 1 and rate == SAMPLE_RATE
+
+
+class WavSegmentReader:
+    """
+    Reads segments of a PCM/float WAV on demand instead of decoding the whole file.
+
+    Each read is one positioned read of exactly the segment's frames, returned as
+    16 kHz mono float32, so memory held per segment is proportional to the segment,
+    never the recording. Positioned reads (os.pread) rather than a memory map keep
+    touched pages out of the process RSS and let threads share one reader.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        tag, self.channels, self.sample_rate, bits, self.data_offset, data_bytes = _parse_header(path)
+        if (tag, bits) not in _DTYPES:
+            raise ValueError(f"{path}: unsupported WAV encoding (format {tag:#x}, {bits}-bit)")
+        self.dtype = np.dtype(_DTYPES[(tag, bits)])
+        self.frame_bytes = self.dtype.itemsize * self.channels
+        self.frames = data_bytes // self.frame_bytes
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def read(self, start: float, end: float) -> np.ndarray:
+        """Samples between `start` and `end` seconds as 16 kHz mono float32 in [-1, 1]."""
+        first = min(max(int(start * self.sample_rate), 0), self.frames)
+        last = min(max(int(end * self.sample_rate), first), self.frames)
+        raw = self._pread((last - first) * self.frame_bytes, self.data_offset + first * self.frame_bytes)
+
+        samples = np.frombuffer(raw, dtype=self.dtype).reshape(-1, self.channels)
+        audio = samples.mean(axis=1, dtype=np.float32) if self.channels > 1 else samples[:, 0].astype(np.float32)
+        if self.dtype.kind == "i":
+            audio /= float(2 ** (8 * self.dtype.itemsize - 1))
+        if self.sample_rate != SAMPLE_RATE and len(audio):
+            import torch
+            import torchaudio
+            audio = torchaudio.functional.resample(torch.from_numpy(audio), self.sample_rate, SAMPLE_RATE).numpy()
+        return audio
+
+    def read_all(self) -> np.ndarray:
+        return self.read(0, self.duration)
+
+    def _pread(self, size: int, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            chunks = []
+            while size > 0:
+                chunk = os.pread(self._fd, size, offset)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size, offset = size - len(chunk), offset + len(chunk)
+            return b"".join(chunks)
+        # Windows has no pread: serialise seek + read
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+    def close(self):
+        if getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
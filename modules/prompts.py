@@ -1,24 +1,12 @@
 from typing import List, Dict
 
 def identify_speaker_role_prompt(formatted_transcript: str) -> str:
-    return f"""
-    You are a precise and analytical meeting role classifier. Your task is to determine the most likely real-world role for each speaker solely based on their dialogue in the transcript below.
+    return f"""You are a meeting role classifier. Infer each speaker's most likely real-world role from their lines below, e.g. "Product Manager", "Client Lead", "Sales Executive", "Technical Engineer", "CTO". Give exactly one role per speaker, without slashes.
+Return only this JSON, with no other text:
+{{"Speaker_0": "<role>", "Speaker_1": "<role>"}}
 
-    Consider roles such as "Product Manager", "Client Lead", "Sales Executive", "Technical Engineer", "CTO", etc. Analyze the language and context of the conversation to infer the roles.
-
-    **IMPORTANT:** Return ONLY the JSON mapping in the exact format below. DO NOT include any additional text, explanations, or commentary.
-
-    **Return a single role for each speaker.** If multiple roles seem applicable, choose the most appropriate one, but avoid using slashes ("/") or multiple roles.
-
-    Expected JSON format:
-    {{
-    "Speaker_0": "<role>",
-    "Speaker_1": "<role>"
-    }}
-
-    Transcript:
-    {formatted_transcript}
-    """.strip()
+Transcript:
+{formatted_transcript}"""
 
 def format_transcript_for_roles(transcript: List[Dict[str, str]]) -> str:
     return "\n".join([f"{seg['speaker']}: {seg['text']}" for seg in transcript])
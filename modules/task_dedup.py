@@ -0,0 +1,283 @@
+"""
+Near-duplicate task detection with MinHash signatures and an LSH band index.
+
+The same action item tends to come up again in every meeting until it is done
+("send the Q3 deck to finance" / "send Q3 deck over to finance by Friday"). Each
+open task keeps a MinHash signature over its word shingles and one LSH band key
+per band, indexed per assignee; a new task is compared only against the open
+tasks it shares a band with, and when the estimated Jaccard similarity reaches
+TASK_DEDUP_THRESHOLD it is folded into that task (deadline and status updated, a
+TaskMention recorded) instead of inserted again.
+
+    python -m modules.task_dedup compact [--assignee NAME] [--dry-run]
+
+compacts the history written before this index existed the same way, keeping the
+earliest task of each duplicate group.
+"""
+import os
+import re
+import json
+import zlib
+import random
+import logging
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import TaskLSHBand, TaskMention, TaskRecommendation, TaskSignature, init_db
+from modules.aggregates import is_open_task, open_task_keys, refresh_open_tasks
+from modules.db.session import LOCK_TASK_DEDUP, advisory_xact_locks, session_scope
+
+logger = logging.getLogger(__name__)
+
+TASK_DEDUP = os.getenv("TASK_DEDUP", "1") == "1"
+TASK_DEDUP_THRESHOLD = float(os.getenv("TASK_DEDUP_THRESHOLD", "0.6"))
+
+# 32 bands of 2 rows: pairs at the threshold almost always share a band; the exact
+# signature comparison then weeds out the looser candidates
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240401)  # Fixed seed: stored signatures must stay comparable
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+_STOPWORDS = {
+    "a", "an", "the", "to", "of", "for", "and", "or", "on", "in", "at", "by", "with", "from",
+    "up", "over", "into", "about", "this", "that", "these", "those", "it", "its", "be", "is",
+    "are", "will", "should", "needs", "need", "please", "also", "all", "any", "some", "our", "their",
+}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalise_assignee(name: Optional[str]) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def shingles(task_text: str) -> set:
+    """Content words plus adjacent word pairs, so word order counts a little but not much."""
+    words = [w for w in _TOKEN.findall((task_text or "").lower()) if w not in _STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(task_text: str) -> List[int]:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(task_text)]
+    if not hashes:
+        return [_MERSENNE] * NUM_PERM
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_keys(signature: List[int]) -> List[str]:
+    return [
+        f"{band}:{zlib.crc32(json.dumps(signature[band * ROWS:(band + 1) * ROWS]).encode()):08x}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def lock_assignees(db, names: Iterable[str]):
+    """
+    Serialises dedup per assignee until commit, so two uploads cannot both insert the same
+    new task. Writers recording tasks for several assignees take them all up front here, in
+    one fixed order, before any other lock; record_task's own lock is then already held.
+    """
+    advisory_xact_locks(db, LOCK_TASK_DEDUP, (normalise_assignee(name) for name in names))
+
+
+def find_duplicate(db, assignee: str, signature: List[int]) -> Optional[Tuple[TaskRecommendation, float]]:
+    """Most similar open task of `assignee` at or above the threshold, with its similarity."""
+    candidates = (
+        db.query(TaskRecommendation, TaskSignature.minhash)
+        .join(TaskSignature, TaskSignature.task_id == TaskRecommendation.id)
+        .filter(TaskSignature.task_id.in_(
+            db.query(TaskLSHBand.task_id)
+            .filter(TaskLSHBand.assignee == assignee, TaskLSHBand.band.in_(band_keys(signature)))
+        ))
+        .all()
+    )
+    best = None
+    for task, other in candidates:
+        if not is_open_task({"status": task.status}):
+            continue
+        score = similarity(signature, other)
+        if score >= TASK_DEDUP_THRESHOLD and (best is None or score > best[1]):
+            best = (task, score)
+    return best
+
+
+def _index(db, task: TaskRecommendation, assignee: str, signature: List[int]):
+    db.add(TaskSignature(task_id=task.id, assignee=assignee, minhash=signature))
+    for band in band_keys(signature):
+        db.add(TaskLSHBand(task_id=task.id, assignee=assignee, band=band))
+
+
+def _merge_into(task: TaskRecommendation, deadline: Optional[str], status: Optional[str]):
+    if deadline and deadline != "N/A":
+        task.deadline = deadline
+    if status:
+        task.status = status
+
+
+def record_task(db, meeting_id: str, task: Dict, name: str) -> Tuple[TaskRecommendation, bool]:
+    """
+    Stores one parsed task from `meeting_id`, raised by `name`. Returns the task row
+    and whether it was inserted (False when it was merged into an open near-duplicate).
+    """
+    fields = {
+        "task": task["task"],
+        "assigned_by": task["assigned_by"] or name,
+        "assigned_to": task["assigned_to"] or name,
+        "deadline": task["deadline"] or "N/A",
+        "status": task["status"] or "Pending",
+    }
+    if not TASK_DEDUP or not shingles(fields["task"]):
+        row = TaskRecommendation(meeting_id=meeting_id, **fields)
+        db.add(row)
+        return row, True
+
+    assignee = normalise_assignee(fields["assigned_to"])
+    signature = minhash(fields["task"])
+    lock_assignees(db, [assignee])
+    db.flush()  # Tasks added earlier in this transaction must be visible as candidates
+
+    duplicate = find_duplicate(db, assignee, signature)
+    if duplicate:
+        row, score = duplicate
+        _merge_into(row, task["deadline"], task["status"])
+        created = False
+        logger.debug(f"Task {fields['task']!r} merged into #{row.id} ({score:.2f})")
+    else:
+        row = TaskRecommendation(meeting_id=meeting_id, **fields)
+        db.add(row)
+        db.flush()
+        _index(db, row, assignee, signature)
+        created = True
+
+    db.add(TaskMention(task_id=row.id, meeting_id=meeting_id, task=fields["task"],
+                       deadline=fields["deadline"], status=fields["status"]))
+    return row, created
+
+
+class _AssigneeIndex:
+    """In-memory LSH index over one assignee's open canonical tasks, for compaction."""
+
+    def __init__(self):
+        self.bands: Dict[str, set] = {}
+        self.signatures: Dict[int, List[int]] = {}
+
+    def add(self, task_id: int, signature: List[int]):
+        self.signatures[task_id] = signature
+        for band in band_keys(signature):
+            self.bands.setdefault(band, set()).add(task_id)
+
+    def remove(self, task_id: int):
+        signature = self.signatures.pop(task_id)
+        for band in band_keys(signature):
+            self.bands[band].discard(task_id)
+
+    def match(self, signature: List[int]) -> Optional[int]:
+        candidates = set().union(*(self.bands.get(band, ()) for band in band_keys(signature)))
+        scored = [(similarity(signature, self.signatures[c]), -c) for c in candidates]
+        best = max(scored, default=None)
+        return -best[1] if best and best[0] >= TASK_DEDUP_THRESHOLD else None
+
+
+def compact_assignee(db, assignee: str, spellings: Iterable[str], dry_run: bool = False) -> Dict:
+    """
+    Walks one assignee's unindexed tasks oldest first: each becomes canonical unless
+    it near-duplicates an open canonical task, in which case it is folded into that
+    task and deleted. Tasks already indexed seed the index, so reruns are cheap.
+    `spellings` are the raw assigned_to values that normalise to `assignee`.
+    """
+    rows = (
+        db.query(TaskRecommendation, TaskSignature.minhash)
+        .outerjoin(TaskSignature, TaskSignature.task_id == TaskRecommendation.id)
+        .filter(TaskRecommendation.assigned_to.in_(list(spellings)))
+        .order_by(TaskRecommendation.id)
+        .all()
+    )
+    index = _AssigneeIndex()
+    canonical: Dict[int, TaskRecommendation] = {}
+    merged = kept = 0
+    touched = []
+    for task, stored in rows:
+        if stored is not None:
+            if is_open_task({"status": task.status}):
+                index.add(task.id, stored)
+                canonical[task.id] = task
+            continue
+        if not shingles(task.task):
+            continue  # Nothing to compare on; left as is
+
+        signature = minhash(task.task)
+        target_id = index.match(signature)
+        if target_id is None:
+            kept += 1
+            if not dry_run:
+                _index(db, task, assignee, signature)
+                db.add(TaskMention(task_id=task.id, meeting_id=task.meeting_id, task=task.task,
+                                   deadline=task.deadline, status=task.status))
+            if is_open_task({"status": task.status}):
+                index.add(task.id, signature)
+                canonical[task.id] = task
+            continue
+
+        merged += 1
+        target = canonical[target_id]
+        if not dry_run:
+            _merge_into(target, task.deadline, task.status)
+            db.add(TaskMention(task_id=target.id, meeting_id=task.meeting_id, task=task.task,
+                               deadline=task.deadline, status=task.status))
+            db.delete(task)
+            touched.extend([target, task])
+        if not is_open_task({"status": task.status}):
+            index.remove(target_id)  # Completed now; later mentions start a new task
+            del canonical[target_id]
+    if touched:
+        refresh_open_tasks(db, open_task_keys(db, touched))  # Daily open counts drop with the duplicates
+    return {"assignee": assignee, "tasks": len(rows), "indexed": kept, "merged": merged}
+
+
+def compact_history(assignees: Optional[Iterable[str]] = None, dry_run: bool = False) -> List[Dict]:
+    """Compacts every (or the given) assignee's task history, one transaction per assignee."""
+    init_db()
+    spellings: Dict[str, set] = {}
+    with session_scope() as db:
+        for (name,) in db.query(TaskRecommendation.assigned_to).filter(TaskRecommendation.assigned_to.isnot(None)).distinct():
+            spellings.setdefault(normalise_assignee(name), set()).add(name)
+    wanted = sorted(spellings) if assignees is None else [normalise_assignee(a) for a in assignees]
+
+    summaries = []
+    for assignee in wanted:
+        with session_scope() as db:
+            lock_assignees(db, [assignee])
+            summary = compact_assignee(db, assignee, spellings.get(assignee, ()), dry_run)
+            if dry_run:
+                db.rollback()
+        logger.info(f"Compacted tasks for {assignee or '(unassigned)'}: {summary}")
+        summaries.append(summary)
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="Merge near-duplicate tasks already in the database")
+    compact.add_argument("--assignee", action="append", help="Only these assignees (default: all)")
+    compact.add_argument("--dry-run", action="store_true", help="Report what would be merged without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    merged = 0
+    for summary in compact_history(args.assignee, args.dry_run):
+        merged += summary["merged"]
+        print(json.dumps(summary))
+    print(json.dumps({"merged": merged, "dry_run": args.dry_run}))
+
+
+if __name__ == "__main__":
+    main()
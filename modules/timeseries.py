@@ -0,0 +1,132 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from models import Meeting, RollingSentiment
+from modules.dashboard.queries import normalize_rolling
+from modules.db.session import ReadOnlySessionLocal
+
+X_KEY = "Index"
+Y_KEY = "Rolling Sentiment"
+
+
+def lttb(points: List[Dict], threshold: int, x: str = X_KEY, y: str = Y_KEY) -> List[Dict]:
+    """
+    Largest-Triangle-Three-Buckets downsampling. Keeps the first and last points and,
+    for every bucket in between, the point forming the largest triangle with its
+    neighbours, so peaks and dips survive. Returns original points, not interpolated ones.
+    A threshold of 1 keeps only the first point and 2 only the first and last.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 1:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:threshold]
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0  # Index of the previously selected point
+
+    for i in range(threshold - 2):
+        # Average of the next bucket, used as the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[x] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[y] for p in next_bucket) / len(next_bucket)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a][x], points[a][y]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][y] - ay) - (ax - points[j][x]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def bucket_mean(points: List[Dict], threshold: int, x: str = X_KEY, y: str = Y_KEY) -> List[Dict]:
+    """Averages consecutive points into `threshold` equal-count buckets."""
+    n = len(points)
+    if threshold >= n or threshold < 1:
+        return list(points)
+
+    size = n / threshold
+    sampled = []
+    for i in range(threshold):
+        bucket = points[int(i * size):int((i + 1) * size)]
+        if bucket:
+            sampled.append({
+                x: round(sum(p[x] for p in bucket) / len(bucket), 2),
+                y: round(sum(p[y] for p in bucket) / len(bucket), 2),
+            })
+    return sampled
+
+
+DOWNSAMPLERS = {"lttb": lttb, "mean": bucket_mean}
+
+
+def downsample(points: List[Dict], max_points: Optional[int], method: str = "lttb") -> List[Dict]:
+    if not max_points or not points:
+        return points
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'; use one of {sorted(DOWNSAMPLERS)}")
+    return DOWNSAMPLERS[method](points, max_points)
+
+
+def get_rolling_series(name: str, meeting_id: Optional[str] = None, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, max_points: Optional[int] = None,
+                       method: str = "lttb", concat: bool = False) -> Dict:
+    """
+    Returns a person's rolling sentiment for one meeting or a date range.
+    With `concat`, meetings are joined in chronological order into one series whose
+    x values continue across meetings; `boundaries` marks where each meeting starts.
+    Every returned series holds at most `max_points` points.
+    """
+    with ReadOnlySessionLocal() as db:
+        query = db.query(RollingSentiment.meeting_id, Meeting.created_at, RollingSentiment.rolling_sentiment) \
+            .join(Meeting, Meeting.id == RollingSentiment.meeting_id) \
+            .filter(RollingSentiment.name == name)
+        if meeting_id:
+            query = query.filter(RollingSentiment.meeting_id == meeting_id)
+        if start:
+            query = query.filter(Meeting.created_at >= start)
+        if end:
+            query = query.filter(Meeting.created_at < end)
+        rows = query.order_by(Meeting.created_at, RollingSentiment.id).all()
+
+    meetings = []
+    for mid, created_at, raw in rows:
+        rolling = normalize_rolling(raw)
+        meetings.append({
+            "meeting_id": mid,
+            "created_at": created_at.isoformat() if created_at else None,
+            "points": (rolling or {}).get("scores") or [],
+        })
+
+    if not concat:
+        for meeting in meetings:
+            meeting["total_points"] = len(meeting["points"])
+            meeting["points"] = downsample(meeting["points"], max_points, method)
+        return {"name": name, "meetings": meetings}
+
+    series, boundaries, offset = [], [], 0
+    for meeting in meetings:
+        boundaries.append({"meeting_id": meeting["meeting_id"], "created_at": meeting["created_at"], "x": offset})
+        last_x = offset
+        for point in meeting["points"]:
+            last_x = offset + point[X_KEY]
+            series.append({X_KEY: last_x, Y_KEY: point[Y_KEY]})
+        offset = last_x + 1
+
+    return {
+        "name": name,
+        "total_points": len(series),
+        "points": downsample(series, max_points, method),
+        "boundaries": boundaries,
+    }
@@ -0,0 +1,72 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def format_speaker_line(name: str, text: str) -> str:
+    """Canonical "Name: text" form expected by the sentiment and LLM helpers."""
+    return f"{name}: {text}"
+
+
+class SpeakerMatcher:
+    """
+    Matches "Name: text" lines against a fixed set of participant names with a single
+    precompiled alternation. Names are regex-escaped and matched case-insensitively,
+    except names that differ from another participant's only by case ("ann" and
+    "Ann"), which must match exactly; longer names are tried first so "Ann Lee" wins
+    over "Ann".
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.all_names = list(dict.fromkeys(name for name in names if name))
+        spellings: Dict[str, List[str]] = {}
+        for name in self.all_names:
+            spellings.setdefault(name.lower(), []).append(name)
+        self.names = {lower: group[0] for lower, group in spellings.items() if len(group) == 1}
+        self.exact = {name for group in spellings.values() if len(group) > 1 for name in group}
+        self.pattern = None
+        if self.all_names:
+            alternation = "|".join(
+                re.escape(name) if name in self.exact else f"(?i:{re.escape(name)})"
+                for name in sorted(self.all_names, key=len, reverse=True)
+            )
+            self.pattern = re.compile(rf"(?<!\w)({alternation})\s*:\s*(.*)")
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        """Returns (canonical name, utterance) for a speaker line, or None."""
+        if self.pattern is None:
+            return None
+        m = self.pattern.search(line)
+        if not m:
+            return None
+        spoken = m.group(1)
+        name = spoken if spoken in self.exact else self.names[spoken.lower()]
+        return name, m.group(2).strip()
+
+
+def iter_lines(stream, encoding: str = "utf-8") -> Iterator[str]:
+    """Yields decoded lines from a binary stream without reading it all into memory."""
+    for raw in stream:
+        yield raw.decode(encoding, errors="replace").rstrip("\r\n")
+
+
+def split_by_speaker(lines: Iterable[str], names: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Splits transcript lines into per-speaker buckets in one pass.
+    Every requested name gets a bucket (possibly empty); lines keep transcript order.
+    """
+    matcher = SpeakerMatcher(names)
+    buckets = {name: [] for name in matcher.all_names}
+    for line in lines:
+        matched = matcher.match(line)
+        if matched:
+            name, text = matched
+            buckets[name].append(format_speaker_line(name, text))
+    return buckets
+
+
+def bucket_utterances(utterances: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """Groups already-attributed (name, text) pairs, e.g. MeetingTranscript rows, by speaker."""
+    buckets = {}
+    for name, text in utterances:
+        buckets.setdefault(name, []).append(format_speaker_line(name, text))
+    return buckets
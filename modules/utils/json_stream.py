@@ -0,0 +1,131 @@
+import json
+from typing import Callable, Dict, List, Optional
+
+# Prose allowed before the opening brace before the reply is treated as malformed
+MAX_PREAMBLE_CHARS = 400
+
+_CLOSERS = {"}": "{", "]": "["}
+
+
+class MalformedJSONError(ValueError):
+    """Raised as soon as a streamed reply can no longer become the expected JSON object."""
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for one top-level JSON object arriving in arbitrary pieces.
+
+    Top-level fields land in `fields` once their value is complete, and every object
+    inside the `list_key` array is decoded and passed to `on_item` the moment it
+    closes, so callers can act on tasks while the model is still generating.
+    Structural errors (mismatched brackets, undecodable values, a reply that never
+    opens an object) raise MalformedJSONError at the offending delta.
+    """
+
+    def __init__(self, list_key: str = "tasks", on_item: Optional[Callable[[Dict], None]] = None):
+        self.list_key = list_key
+        self.on_item = on_item
+        self.text = ""
+        self.fields: Dict = {}
+        self.items: List[Dict] = []
+        self.done = False
+
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._expect_key = False
+        self._key = None
+        self._value_start = None
+        self._item_start = None
+        self._started = False
+
+    def has(self, *keys) -> bool:
+        return all(key in self.fields for key in keys)
+
+    def feed(self, delta: str):
+        if self.done or not delta:
+            return
+        offset = len(self.text)
+        self.text += delta
+
+        for i, char in enumerate(delta, start=offset):
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append("{")
+                    self._expect_key = True
+                elif i >= MAX_PREAMBLE_CHARS:
+                    raise MalformedJSONError("No JSON object in the first %d characters" % MAX_PREAMBLE_CHARS)
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._expect_key:
+                        self._key = self._decode(self._string_start, i + 1)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._stack.append(char)
+                if len(self._stack) == 3 and char == "{" and self._in_list():
+                    self._item_start = i
+            elif char in "}]":
+                if not self._stack or self._stack[-1] != _CLOSERS[char]:
+                    raise MalformedJSONError(f"Unexpected '{char}' at offset {i}")
+                if len(self._stack) == 3 and char == "}" and self._item_start is not None:
+                    self._emit_item(self._decode(self._item_start, i + 1))
+                    self._item_start = None
+                self._stack.pop()
+                if len(self._stack) == 1 and self._value_start is not None:
+                    # A container value just closed: record it without waiting for the comma
+                    self._end_value(i + 1)
+                elif not self._stack:
+                    self._end_value(i)
+                    self.done = True
+                    return
+            elif len(self._stack) == 1:
+                if char == ":" and self._expect_key:
+                    if self._key is None:
+                        raise MalformedJSONError(f"Missing key before ':' at offset {i}")
+                    self._expect_key = False
+                    self._value_start = i + 1
+                elif char == ",":
+                    self._end_value(i)
+                    self._expect_key = True
+                    self._key = None
+
+    def _in_list(self) -> bool:
+        return self._stack[1] == "[" and self._key == self.list_key
+
+    def _end_value(self, end: int):
+        if self._value_start is None or self._key is None:
+            return
+        raw = self.text[self._value_start:end].strip()
+        self._value_start = None
+        if raw:
+            self.fields[self._key] = self._decode_raw(raw)
+
+    def _decode(self, start: int, end: int):
+        return self._decode_raw(self.text[start:end])
+
+    @staticmethod
+    def _decode_raw(raw: str):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise MalformedJSONError(f"Invalid JSON value {raw[:40]!r}: {e}") from e
+
+    def _emit_item(self, item):
+        if not isinstance(item, dict):
+            return
+        self.items.append(item)
+        if self.on_item:
+            self.on_item(item)
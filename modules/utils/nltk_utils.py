@@ -0,0 +1,52 @@
+import os
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Local NLTK data directory; populated once at build time, e.g.
+#   python -m nltk.downloader -d ./nltk_data punkt vader_lexicon
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(os.getcwd(), "nltk_data"))
+
+_FALLBACK_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=1)
+def ensure_nltk_data() -> str:
+    """Points NLTK at the local data directory. Never calls the downloader."""
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    return NLTK_DATA_DIR
+
+
+@lru_cache(maxsize=1)
+def _get_punkt():
+    """Loads the punkt sentence tokenizer once, or returns None if it is not available locally."""
+    import nltk
+
+    ensure_nltk_data()
+    try:
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+    except (LookupError, OSError):
+        pass
+
+    # Newer NLTK releases ship punkt as the pickle-free punkt_tab resource
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer
+        return PunktTokenizer("english")
+    except (LookupError, ImportError, OSError):
+        pass
+
+    logger.warning(f"punkt not found under {NLTK_DATA_DIR}; using regex sentence splitter")
+    return None
+
+
+def sent_tokenize(text: str):
+    """Splits text into sentences with punkt, falling back to a simple regex splitter."""
+    tokenizer = _get_punkt()
+    if tokenizer is None:
+        return _FALLBACK_SPLIT.split(text)
+    return tokenizer.tokenize(text)
@@ -0,0 +1,165 @@
+import os
+import re
+import time
+import glob
+import logging
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# Profile every wrapped request, scheduler tick and pipeline stage
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+# Allow individual Flask requests to opt in with an "X-Profile: 1" header
+PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "0") == "1"
+PROFILE_HEADER = "X-Profile"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Minimum seconds between two captures with the same label
+PROFILE_MIN_INTERVAL = float(os.getenv("PROFILE_MIN_INTERVAL", "60"))
+# Oldest captures are deleted beyond this many files
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1") == "1"
+PROFILE_TRACEMALLOC_TOP = 50
+
+_NULL = nullcontext()
+_lock = threading.Lock()
+# One capture per process: cProfile and tracemalloc are process-wide on current Pythons
+_capture_lock = threading.Lock()
+_last_capture = {}
+
+
+def _allow(label: str) -> bool:
+    now = time.monotonic()
+    with _lock:
+        last = _last_capture.get(label)
+        if last is not None and now - last < PROFILE_MIN_INTERVAL:
+            return False
+        _last_capture[label] = now
+        return True
+
+
+def _prune():
+    files = sorted(glob.glob(os.path.join(PROFILE_DIR, "*")), key=os.path.getmtime)
+    for path in files[:max(len(files) - PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _Capture:
+    """
+    Records one cProfile run plus a tracemalloc snapshot. Output per capture:
+        <label>-<timestamp>-<pid>.prof     pstats data; `flameprof x.prof > x.svg` or snakeviz
+        <label>-<timestamp>-<pid>.mem.txt  top allocation sites and peak traced memory
+    """
+
+    def __init__(self, label: str):
+        self.label = re.sub(r"[^\w.-]+", "_", label)
+        self.profiler = None
+        self.tracing = False
+        self.started_tracing = False
+
+    def __enter__(self):
+        # Another capture (any thread, or an enclosing section) is running: skip this one
+        if not _capture_lock.acquire(blocking=False):
+            return self
+        if not _allow(self.label):
+            _capture_lock.release()
+            return self
+        if PROFILE_TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self.started_tracing = True
+            self.tracing = True
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler is None:
+            return False
+        self.profiler.disable()
+        elapsed = time.perf_counter() - self.started
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            stamp = f"{time.strftime('%Y%m%dT%H%M%S')}.{time.time_ns() % 10**9:09d}"
+            stem = os.path.join(PROFILE_DIR, f"{self.label}-{stamp}-{os.getpid()}")
+            self.profiler.dump_stats(f"{stem}.prof")
+            if self.tracing:
+                self._write_memory(f"{stem}.mem.txt")
+            _prune()
+            logger.info(f"Profiled {self.label} in {elapsed:.2f}s -> {stem}.prof")
+        except Exception as e:
+            logger.error(f"Could not write profile for {self.label}: {e}")
+        finally:
+            if self.started_tracing:
+                tracemalloc.stop()
+            self.profiler = None
+            _capture_lock.release()
+        return False
+
+    @staticmethod
+    def _write_memory(path: str):
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics("lineno")
+        with open(path, "w") as f:
+            f.write(f"current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB\n")
+            for stat in stats[:PROFILE_TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+
+
+def profile_section(label: str, force: bool = False):
+    """
+    Context manager that profiles its body when profiling is enabled (or `force`d),
+    subject to rate limiting. Only one capture runs per process at a time; sections
+    entered meanwhile, nested or on other threads, run unprofiled.
+    """
+    if not (PROFILE_ENABLED or force):
+        return _NULL
+    return _Capture(label)
+
+
+def profiled(label: str):
+    """
+    Decorator form of profile_section. With PROFILE_ENABLED unset, the function
+    is returned unwrapped, so disabled profiling adds no per-call cost.
+    """
+    def decorator(func):
+        if not PROFILE_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_flask_profiling(app):
+    """
+    Profiles Flask requests, either all of them (PROFILE_ENABLED=1) or those sent
+    with an X-Profile header (PROFILE_ALLOW_HEADER=1). Registers no hooks at all otherwise.
+    """
+    if not (PROFILE_ENABLED or PROFILE_ALLOW_HEADER):
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_profile():
+        forced = PROFILE_ALLOW_HEADER and request.headers.get(PROFILE_HEADER) == "1"
+        capture = profile_section(f"request.{request.endpoint or 'unknown'}", force=forced)
+        if capture is not _NULL:
+            g._profile_capture = capture.__enter__()
+
+    @app.teardown_request
+    def _stop_request_profile(exc):
+        capture = g.pop("_profile_capture", None)
+        if capture is not None:
+            capture.__exit__(None, None, None)
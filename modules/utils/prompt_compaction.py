@@ -0,0 +1,160 @@
+"""
+Token-budgeted compaction of transcript text before it goes into a prompt.
+
+Utterances made up only of greetings, mic checks and acknowledgements from
+FILLER_PHRASES ("Hello, can you hear me?", "Yeah.", "Okay.") carry nothing the
+models use, so they are dropped, and stray disfluencies ("um,", "uh") are stripped
+from what is left; anything else, however short ("I disagree."), is kept. If a
+budget is given and the text is still over it, the most informative utterances
+are kept: those with more distinct, rarer content words, task cues (requests,
+commitments, deadlines) and numbers, judged per token. Kept utterances stay in
+their original order.
+"""
+import os
+import re
+import math
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from modules.utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Off sends transcripts and role samples exactly as before
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "1") == "1"
+
+# An utterance consisting only of these phrases is filler
+FILLER_PHRASES = [
+    "can you hear me", "can everyone hear me", "you were on mute", "you are on mute", "you're on mute",
+    "can you see my screen", "good morning", "good afternoon", "thank you", "sounds good", "got it",
+    "mm hmm", "uh huh", "no problem", "all right", "alright", "hello", "hi", "hey", "yeah", "yes", "yep",
+    "okay", "ok", "sure", "right", "sorry", "thanks", "bye", "cool", "great", "um", "uh", "hmm", "so",
+]
+_FILLER = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in sorted(FILLER_PHRASES, key=len, reverse=True)) + r")\b")
+_DISFLUENCY = re.compile(r"(?i)(?<![\w'])(?:u+m+|u+h+|e+r+m+|h+m+)(?![\w'])[,.]?\s*")
+_WORD = re.compile(r"[a-z0-9']+")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "is", "are", "was",
+    "were", "be", "it", "its", "this", "that", "i", "you", "we", "me", "my", "your", "our", "they", "he",
+    "she", "just", "like", "really", "very", "well", "oh", "there", "here", "then", "now", "again", "too",
+}
+# Requests, commitments and deadlines: what task extraction needs most
+_TASK_CUE = re.compile(
+    r"(?i)\b(?:please|could you|can you|need to|needs to|i'll|i will|we'll|let's|will you|make sure|"
+    r"by (?:monday|tuesday|wednesday|thursday|friday|tomorrow|end of|next)|deadline|due|assign|follow up|"
+    r"action item|blocked|risk)\b"
+)
+_NUMBER = re.compile(r"\d")
+TASK_CUE_WEIGHT = 3.0
+
+_totals = Counter()
+_totals_lock = threading.Lock()
+
+
+def _non_filler_words(text: str) -> List[str]:
+    return _WORD.findall(_FILLER.sub(" ", text.lower()))
+
+
+def content_words(text: str) -> List[str]:
+    return [w for w in _non_filler_words(text) if w not in _STOPWORDS]
+
+
+def is_filler(text: str) -> bool:
+    """True for utterances with no words left once FILLER_PHRASES are removed."""
+    return not _non_filler_words(text)
+
+
+def strip_disfluencies(text: str) -> str:
+    return _DISFLUENCY.sub("", text).strip()
+
+
+def select_utterances(utterances: List[str], max_tokens: int) -> List[int]:
+    """
+    Indexes of the utterances to keep, in order: fillers and repeats dropped, then the
+    best scoring per token until `max_tokens` (0 = no cap) is used up.
+    """
+    keep, seen = [], set()
+    for i, utterance in enumerate(utterances):
+        key = " ".join(_non_filler_words(utterance))
+        if key and key not in seen:  # Filler leaves an empty key; verbatim repeats share one
+            seen.add(key)
+            keep.append(i)
+
+    tokens = {i: estimate_tokens(utterances[i]) + 1 for i in keep}  # +1 for the newline
+    if not max_tokens or sum(tokens.values()) <= max_tokens:
+        return keep
+
+    # Rarer words are worth more: a topic raised once beats the tenth status update
+    words = {i: content_words(utterances[i]) for i in keep}
+    document_frequency = Counter(w for i in keep for w in set(words[i]))
+    total = len(keep)
+
+    def score(i):
+        value = sum(math.log(1 + total / document_frequency[w]) for w in set(words[i]))
+        value += TASK_CUE_WEIGHT * len(_TASK_CUE.findall(utterances[i]))
+        value += 1.0 if _NUMBER.search(utterances[i]) else 0.0
+        return value / tokens[i]
+
+    chosen, used = [], 0
+    for i in sorted(keep, key=score, reverse=True):
+        if used + tokens[i] <= max_tokens:
+            chosen.append(i)
+            used += tokens[i]
+    return sorted(chosen)
+
+
+def _record(label: str, before: int, after: int, dropped: int) -> Dict:
+    stats = {"tokens_before": before, "tokens_after": after, "tokens_saved": before - after, "dropped": dropped}
+    with _totals_lock:
+        _totals.update(stats)
+        _totals["prompts"] += 1
+    logger.info(f"Prompt compaction ({label}): {before} -> {after} tokens, "
+                f"saved {before - after}, {dropped} utterances dropped")
+    return stats
+
+
+def compact_turns(text: str, max_tokens: int = 0, label: str = "transcript") -> Tuple[str, Dict]:
+    """Compacts "Name: text" lines; returns the compacted text and its token stats."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    bodies = [line.partition(": ")[2] or line for line in lines]
+    kept = select_utterances(bodies, max_tokens)
+
+    out = []
+    for i in kept:
+        speaker, sep, body = lines[i].partition(": ")
+        out.append(f"{speaker}{sep}{strip_disfluencies(body)}" if sep else strip_disfluencies(lines[i]))
+    if not out and lines:
+        out = lines  # All filler: better to send it than to send nothing
+    compacted = "\n".join(out)
+    return compacted, _record(label, estimate_tokens(text), estimate_tokens(compacted), len(lines) - len(out))
+
+
+def compact_samples(transcript: List[Dict[str, str]], max_tokens_per_speaker: int,
+                    label: str = "role samples") -> Tuple[List[Dict[str, str]], Dict]:
+    """Picks each speaker's most informative utterances within the budget from {"speaker", "text"} entries."""
+    by_speaker: Dict[str, List[int]] = {}
+    for i, entry in enumerate(transcript):
+        by_speaker.setdefault(entry["speaker"], []).append(i)
+
+    kept = []
+    for speaker, indexes in by_speaker.items():
+        texts = [transcript[i]["text"] for i in indexes]
+        chosen = select_utterances(texts, max_tokens_per_speaker)
+        if chosen:
+            kept.extend(indexes[j] for j in chosen)
+        else:
+            kept.append(indexes[0])  # Only filler, but the speaker still needs a line to be classified
+
+    samples = [{"speaker": transcript[i]["speaker"], "text": strip_disfluencies(transcript[i]["text"])}
+               for i in sorted(kept)]
+    before = sum(estimate_tokens(f"{e['speaker']}: {e['text']}") + 1 for e in transcript)
+    after = sum(estimate_tokens(f"{e['speaker']}: {e['text']}") + 1 for e in samples)
+    return samples, _record(label, before, after, len(transcript) - len(samples))
+
+
+def compaction_totals() -> Dict[str, int]:
+    """Token counts before/after compaction summed over every prompt in this process."""
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,65 @@
+import math
+import re
+from typing import List
+
+# Llama/GPT-style tokenizers average roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, tokenizer-free token estimate; errs slightly high for English prose."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_long_turn(turn: str, max_tokens: int) -> List[str]:
+    """Splits one oversized turn on sentence boundaries, then on words, keeping its speaker prefix."""
+    speaker, sep, body = turn.partition(": ")
+    prefix = f"{speaker}: " if sep else ""
+    if not sep:
+        body = turn
+
+    pieces, current = [], ""
+    for unit in _SENTENCE_END.split(body):
+        words = [unit] if estimate_tokens(prefix + unit) <= max_tokens else unit.split()
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if current and estimate_tokens(prefix + candidate) > max_tokens:
+                pieces.append(prefix + current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        pieces.append(prefix + current)
+    return pieces
+
+
+def chunk_turns(text: str, max_tokens: int) -> List[str]:
+    """
+    Packs "Name: text" lines into chunks of at most `max_tokens` estimated tokens,
+    splitting only between speaker turns unless a single turn is itself too long.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for turn in text.splitlines():
+        if not turn.strip():
+            continue
+        tokens = estimate_tokens(turn) + 1  # Newline
+        if tokens > max_tokens:
+            pieces = _split_long_turn(turn, max_tokens)
+        else:
+            pieces = [turn]
+
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,188 @@
+"""
+Voiceprints: map diarized speakers to enrolled employees by speaker embedding.
+
+Enroll an employee from one or more clean clips of their voice:
+    python -m modules.voiceprints enroll --name "Alice" alice_1.wav alice_2.wav
+
+Diarization already computes titanet embeddings for every subsegment; the pipeline
+averages them per speaker cluster (cluster_centroids) and VoiceprintIndex matches
+those centroids against enrolled voiceprints by cosine similarity (exact search,
+fine for thousands of employees).
+"""
+import os
+import glob
+import json
+import pickle
+import logging
+import argparse
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from models import Employee, EmployeeVoiceprint, init_db
+from modules.db.session import ReadOnlySessionLocal, session_scope
+
+logger = logging.getLogger(__name__)
+
+VOICEPRINT_MODEL = os.getenv("VOICEPRINT_MODEL", "titanet_large")
+# Cosine similarity needed to accept a match; titanet same-speaker pairs typically score well above this
+VOICEPRINT_THRESHOLD = float(os.getenv("VOICEPRINT_THRESHOLD", "0.7"))
+# Required lead of the best employee over the runner-up, to avoid coin flips between similar voices
+VOICEPRINT_MARGIN = float(os.getenv("VOICEPRINT_MARGIN", "0.05"))
+
+
+def normalise(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@lru_cache(maxsize=1)
+def get_speaker_model():
+    """Titanet speaker model, loaded on first enrollment."""
+    from nemo.collections.asr.models import EncDecSpeakerLabelModel
+    return EncDecSpeakerLabelModel.from_pretrained(VOICEPRINT_MODEL).eval()
+
+
+def embed_audio(path: str) -> np.ndarray:
+    return normalise(get_speaker_model().get_embedding(path).detach().cpu().numpy())
+
+
+def enroll(employee_name: str, audio_paths: List[str]) -> int:
+    """Stores one voiceprint per clip for an existing employee; returns how many were added."""
+    init_db()
+    with session_scope() as db:
+        employee = db.query(Employee).filter(Employee.name == employee_name).one_or_none()
+        if employee is None:
+            raise ValueError(f"No employee named '{employee_name}'")
+        for path in audio_paths:
+            db.add(EmployeeVoiceprint(
+                employee_id=employee.id,
+                model_name=VOICEPRINT_MODEL,
+                embedding=embed_audio(path).tolist(),
+                source=os.path.basename(path)
+            ))
+    return len(audio_paths)
+
+
+def cluster_centroids(speaker_dir: str, segments: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Averages NeMo's saved subsegment embeddings per diarized speaker.
+
+    ClusteringDiarizer writes `subsegments_scale{i}.json` (one line per subsegment) and
+    `embeddings/subsegments_scale{i}_embeddings.pkl` ({uniq_id: tensor[n, dim]}, same
+    order) under its speaker_outputs directory. The longest-window scale (0) is used,
+    and each subsegment is credited to the RTTM turn containing its midpoint.
+    """
+    manifests = sorted(glob.glob(os.path.join(speaker_dir, "subsegments_scale*.json")))
+    if not manifests:
+        return {}
+    manifest = min(manifests, key=lambda p: int(p.rsplit("scale", 1)[1].split(".")[0]))
+    name = os.path.splitext(os.path.basename(manifest))[0]
+    with open(os.path.join(speaker_dir, "embeddings", f"{name}_embeddings.pkl"), "rb") as f:
+        embeddings = pickle.load(f)
+
+    with open(manifest) as f:
+        subsegments = [json.loads(line) for line in f if line.strip()]
+    # Single-file runs have one uniq_id; embeddings are stored in manifest order
+    vectors = np.concatenate([np.asarray(v.cpu() if hasattr(v, "cpu") else v) for v in embeddings.values()])
+
+    sums, counts = {}, {}
+    for subsegment, vector in zip(subsegments, vectors):
+        midpoint = subsegment["offset"] + subsegment["duration"] / 2
+        for seg in segments:
+            if seg["start"] <= midpoint < seg["end"]:
+                sums[seg["speaker"]] = sums.get(seg["speaker"], 0) + vector
+                counts[seg["speaker"]] = counts.get(seg["speaker"], 0) + 1
+                break
+    return {speaker: normalise(total / counts[speaker]) for speaker, total in sums.items()}
+
+
+class VoiceprintIndex:
+    """In-memory matrix of enrolled voiceprints, searched exactly with one matrix product."""
+
+    def __init__(self, names: List[str], matrix: np.ndarray):
+        self.names = names
+        self.matrix = matrix
+
+    @classmethod
+    def from_db(cls, model_name: str = VOICEPRINT_MODEL) -> "VoiceprintIndex":
+        with ReadOnlySessionLocal() as db:
+            rows = db.query(Employee.name, EmployeeVoiceprint.embedding) \
+                .join(Employee, Employee.id == EmployeeVoiceprint.employee_id) \
+                .filter(EmployeeVoiceprint.model_name == model_name) \
+                .all()
+        if not rows:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        return cls([name for name, _ in rows], np.stack([normalise(e) for _, e in rows]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def scores(self, embedding: np.ndarray) -> Dict[str, float]:
+        """Best cosine similarity per employee (employees may have several voiceprints)."""
+        best = {}
+        for name, score in zip(self.names, self.matrix @ normalise(embedding)):
+            best[name] = max(best.get(name, -1.0), float(score))
+        return best
+
+    def match(self, centroids: Dict[str, np.ndarray], threshold: float = VOICEPRINT_THRESHOLD,
+              margin: float = VOICEPRINT_MARGIN) -> Dict[str, Tuple[str, float]]:
+        """
+        Maps diarized speaker labels to (employee name, score). Assignment is greedy on
+        score, so two speakers in one meeting never resolve to the same employee.
+        """
+        if not len(self) or not centroids:
+            return {}
+        candidates = []
+        for speaker, centroid in centroids.items():
+            ranked = sorted(self.scores(centroid).items(), key=lambda item: -item[1])
+            best_name, best_score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+            if best_score >= threshold and best_score - runner_up >= margin:
+                candidates.extend((score, speaker, name) for name, score in ranked if score >= threshold)
+
+        matches, taken = {}, set()
+        for score, speaker, name in sorted(candidates, reverse=True):
+            if speaker not in matches and name not in taken:
+                matches[speaker] = (name, score)
+                taken.add(name)
+        return matches
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> VoiceprintIndex:
+    """Shared index, rebuilt only when voiceprints have been added or removed."""
+    global _index, _index_version
+    init_db()
+    with ReadOnlySessionLocal() as db:
+        version = db.query(func.count(EmployeeVoiceprint.id), func.max(EmployeeVoiceprint.id)).one()
+    with _index_lock:
+        if _index is None or version != _index_version:
+            _index = VoiceprintIndex.from_db()
+            _index_version = version
+            logger.info(f"Loaded {len(_index)} voiceprints")
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    enroll_cmd = commands.add_parser("enroll", help="Add voiceprints for an employee")
+    enroll_cmd.add_argument("--name", required=True)
+    enroll_cmd.add_argument("audio", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "enroll":
+        print(f"Enrolled {enroll(args.name, args.audio)} voiceprint(s) for {args.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,12 @@
 from sqlalchemy import and_, exists
-from models import  MeetingTranscript, SessionLocal
+from models import  MeetingTranscript
+from modules.db.session import SessionLocal
 from utils import process_meeting
 from utils import get_sentiment_and_recommendations
 # from app import get_rolling_sentiment_from_transcript
 from sentiment import * 
-import sys
-
-import nltk
-nltk.download("punkt", quiet=True)
-from nltk.tokenize import sent_tokenize
-from nltk.tokenize import sent_tokenize as original_sent_tokenize
-
-# Create our own tokenizer function that wraps the original
-def safe_sent_tokenize(text):
-    try:
-        return original_sent_tokenize(text)
-    except LookupError:
-        # If punkt_tab is not found, use a simple regex-based splitter as fallback
-        import re
-        return re.split(r'(?<=[.!?])\s+', text)
-
-# Replace the standard tokenizer with our safe version
-from nltk.tokenize import sent_tokenize
-sys.modules['nltk.tokenize'].sent_tokenize = safe_sent_tokenize
+# punkt is loaded from the local NLTK data directory, with a regex fallback
+from modules.utils.nltk_utils import sent_tokenize as safe_sent_tokenize
 
 
 def get_rolling_sentiment_from_transcript(transcript: str, name: str):
@@ -126,12 +110,11 @@ def process_new_meetings():
 
         results = []
         for meeting_id, transcripts in meetings_to_process.items():
-            # Process each meeting
+            # Process each meeting; committing each one keeps its row locks short
             meeting_results = process_meeting(meeting_id, db)
+            db.commit()
             results.extend(meeting_results)
         print("Results : ",results)
-            
-        db.commit()
         return {
             "message": f"Successfully processed {len(meetings_to_process)} meetings",
             "results": results
@@ -1,11 +1,15 @@
 import re
-from groq import Groq
-import os
-from nltk.sentiment import SentimentIntensityAnalyzer
+from functools import lru_cache
+from modules.utils.nltk_utils import ensure_nltk_data
 
 
-client = Groq(api_key=os.environ["GROQ_API_KEY"])
-sia = SentimentIntensityAnalyzer()
+@lru_cache(maxsize=1)
+def get_analyzer():
+    # VADER loads its lexicon on construction, so build it on first use only
+    from nltk.sentiment import SentimentIntensityAnalyzer
+
+    ensure_nltk_data()
+    return SentimentIntensityAnalyzer()
 
 sentiment_thresholds = {
     "Very Positive": 0.75,  # Extremely positive sentiment
@@ -46,5 +50,5 @@ def clean_text(text):
 
 
 def get_sentiment(text):
-    raw_score = sia.polarity_scores(clean_text(text))["compound"]
+    raw_score = get_analyzer().polarity_scores(clean_text(text))["compound"]
     return normalize_score(raw_score)
\ No newline at end of file
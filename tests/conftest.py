@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules the way the scripts do, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    Points the shared session module at TEST_DATABASE_URL, a throwaway Postgres the
+    tests may write to; tests using it are skipped when it is not set.
+    """
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    pytest.importorskip("sqlalchemy")
+    from models import init_db
+    from modules.db import session
+
+    monkeypatch.setattr(session, "DATABASE_URL", url)
+    monkeypatch.setattr(session, "_engine", None)
+    init_db.cache_clear()
+    init_db()
+    yield session
+    session._engine.dispose()
+    init_db.cache_clear()
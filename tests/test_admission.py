@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from modules.admission import AdmissionController, AdmissionRejected
+
+
+def controller(in_flight=1, queue=0, timeout=0.0, health=lambda: (None, True), **kwargs):
+    return AdmissionController("test", in_flight, queue, timeout, health=health, **kwargs)
+
+
+def test_admits_up_to_the_limit_then_rejects_with_429():
+    c = controller(in_flight=2)
+    c.acquire()
+    c.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        c.acquire()
+    assert rejected.value.status == 429
+    assert rejected.value.retry_after >= 1
+    assert c.snapshot()["rejected"][429] == 1
+
+
+def test_queued_request_times_out_with_503():
+    c = controller(queue=1, timeout=0.05)
+    c.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        c.acquire()
+    assert rejected.value.status == 503
+    assert c.waiting == 0
+
+
+def test_queued_request_runs_when_a_slot_frees():
+    c = controller(queue=1, timeout=2.0)
+    c.acquire()
+    admitted = threading.Event()
+
+    def waiter():
+        c.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not admitted.wait(0.05)
+    c.release(0.1)
+    assert admitted.wait(1.0)
+    thread.join()
+    assert c.in_flight == 1
+
+
+def test_unhealthy_router_rejects_with_503():
+    c = controller(in_flight=4, health=lambda: (None, False))
+    with pytest.raises(AdmissionRejected) as rejected:
+        c.acquire()
+    assert rejected.value.status == 503
+
+
+def test_limit_shrinks_with_slow_llm_and_recovers(monkeypatch):
+    monkeypatch.setattr("modules.admission.ADMISSION_ADAPT_INTERVAL", 0)
+    monkeypatch.setattr("modules.admission.ADMISSION_TARGET_LATENCY", 10)
+    p95 = [40.0]
+    c = controller(in_flight=8, queue=8, health=lambda: (p95[0], True))
+    for _ in range(10):
+        c._adapt()
+    assert c.limit == 2  # 8 * 10s / 40s
+    p95[0] = 1.0
+    for _ in range(10):
+        c._adapt()
+    assert c.limit == 8
+
+
+def test_admit_releases_on_error():
+    c = controller()
+    with pytest.raises(RuntimeError):
+        with c.admit():
+            raise RuntimeError("boom")
+    assert c.in_flight == 0
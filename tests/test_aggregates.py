@@ -0,0 +1,54 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from modules.aggregates import is_open_task, rebuild_daily_stats
+
+
+def test_only_completed_tasks_are_closed():
+    assert is_open_task({"status": "Pending"})
+    assert is_open_task({"status": None})
+    assert not is_open_task({"status": " Completed "})
+
+
+def store(session, responses, day):
+    from utils import store_transcript_analysis
+
+    created_at = datetime.combine(day, datetime.min.time())
+    with session.session_scope() as db:
+        store_transcript_analysis(db, str(uuid.uuid4()), responses, created_at=created_at)
+
+
+def response(name, tasks):
+    return {"name": name, "role": "Engineer", "sentiment_score": 70.0, "skill": ["sql"],
+            "tasks": [{"task": text, "assigned_by": name, "assigned_to": assignee, "deadline": "N/A", "status": status}
+                      for text, assignee, status in tasks],
+            "rolling_sentiment": []}
+
+
+def daily_stats(session, names):
+    from models import EmployeeDailyStats
+
+    with session.session_scope(read_only=True) as db:
+        rows = db.query(EmployeeDailyStats).filter(EmployeeDailyStats.employee_name.in_(names)).all()
+        return {(r.employee_name, r.day): (r.meeting_count, r.sentiment_count, r.open_task_count) for r in rows}
+
+
+def test_open_task_counts_ignore_name_case_and_survive_a_rebuild(database):
+    ann, bob = f"Ann {uuid.uuid4().hex[:8]}", f"Bob {uuid.uuid4().hex[:8]}"
+    day = date(2024, 3, 4)
+    store(database, [
+        response(ann, [("Draft the migration plan for billing", ann.lower(), "Pending"),
+                       ("Archive the old onboarding wiki", ann.upper(), "Completed")]),
+        response(bob, [("Benchmark the new search cluster", ann, "Pending")]),
+    ], day)
+    store(database, [response(bob, [])], day)
+
+    incremental = daily_stats(database, [ann, bob])
+    assert incremental == {(ann, day): (1, 1, 2), (bob, day): (2, 2, 0)}
+
+    rebuild_daily_stats()
+    assert daily_stats(database, [ann, bob]) == incremental
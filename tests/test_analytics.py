@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from modules import analytics
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(analytics, "_cache", {})
+    monkeypatch.setattr(analytics, "_version", {"value": None, "checked_at": 0.0})
+    monkeypatch.setattr(analytics, "ANALYTICS_VERSION_TTL", 0)
+
+
+def seed_manager(session, deadlines):
+    """A manager with one open task per deadline, raised at a meeting 30 days ago; returns (name, task ids)."""
+    from models import Employee, Meeting, TaskRecommendation
+
+    manager = f"Manager {uuid.uuid4().hex[:8]}"
+    meeting_id = str(uuid.uuid4())
+    with session.session_scope() as db:
+        db.add(Employee(name=manager, role="Manager"))
+        db.add(Meeting(id=meeting_id, created_at=datetime.utcnow() - timedelta(days=30)))
+        db.flush()
+        tasks = [TaskRecommendation(meeting_id=meeting_id, task=f"Task {i}", assigned_by=manager,
+                                    assigned_to=f"Report {i}", deadline=deadline, status="Pending")
+                 for i, deadline in enumerate(deadlines)]
+        db.add_all(tasks)
+        db.flush()
+        return manager, [t.id for t in tasks]
+
+
+def report_for(manager):
+    return next(row for row in analytics.overdue_tasks_by_manager() if row["manager"] == manager)
+
+
+def test_overdue_counts_tolerate_free_text_and_impossible_deadlines(database, fresh_cache):
+    future = (datetime.utcnow() + timedelta(days=30)).date().isoformat()
+    manager, _ = seed_manager(database, ["2024-02-31", "Friday", "N/A", "2024-02-29", future])
+    row = report_for(manager)
+    assert row["open_tasks"] == 5
+    assert row["overdue_tasks"] == 4  # All but the future ISO deadline
+
+
+def test_completing_a_task_refreshes_the_cached_report(database, fresh_cache):
+    from models import TaskRecommendation
+
+    manager, task_ids = seed_manager(database, ["2024-01-15", "2024-01-16"])
+    assert report_for(manager)["overdue_tasks"] == 2
+
+    with database.session_scope() as db:
+        db.query(TaskRecommendation).filter(TaskRecommendation.id == task_ids[0]).update({"status": "Completed"})
+    assert report_for(manager)["overdue_tasks"] == 1
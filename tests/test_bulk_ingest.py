@@ -0,0 +1,170 @@
+import io
+import json
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from modules import bulk_ingest
+from modules.bulk_ingest import _meeting_date, ingest_meetings, iter_ndjson_meetings, iter_zip_meetings
+
+PEOPLE = [{"name": "Ann", "role": "Engineer"}, {"name": "Bob", "role": "Manager"}]
+TRANSCRIPT = "Ann: I will ship the fix.\nBob: Thanks, Ann."
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-01", datetime(2024, 1, 1)),
+    ("2024-01-01T10:30:00", datetime(2024, 1, 1, 10, 30)),
+    ("2024-01-01T10:30:00Z", datetime(2024, 1, 1, 10, 30)),
+    ("2024-01-01T23:00:00-05:00", datetime(2024, 1, 2, 4, 0)),  # Next day in UTC
+    ("2024-01-02T01:00:00+02:00", datetime(2024, 1, 1, 23, 0)),
+    ("", None),
+    (None, None),
+])
+def test_meeting_date_is_naive_utc(value, expected):
+    assert _meeting_date(value) == expected
+
+
+def test_meeting_date_rejects_free_text():
+    with pytest.raises(ValueError, match="ISO date"):
+        _meeting_date("last Tuesday")
+
+
+def test_ndjson_lines_become_records_and_bad_lines_errors():
+    lines = [
+        json.dumps({"meeting_id": "m1", "people_info": PEOPLE, "transcript": TRANSCRIPT, "created_at": "2024-03-01"}),
+        "",
+        "{not json",
+        json.dumps({"meeting_id": "m2", "people_info": [{"name": "Ann"}], "transcript": TRANSCRIPT}),
+        json.dumps({"meeting_id": "m3", "people_info": PEOPLE, "transcript": TRANSCRIPT, "date": "2024-03-02"}),
+    ]
+    records = list(iter_ndjson_meetings(io.BytesIO("\n".join(lines).encode())))
+
+    assert [r["meeting_id"] for r in records] == ["m1", None, None, "m3"]
+    assert records[0]["created_at"] == datetime(2024, 3, 1)
+    assert records[0]["buckets"]["Ann"] == ["Ann: I will ship the fix."]
+    assert records[1]["error"].startswith("line 3:")
+    assert records[2]["error"].startswith("line 4:") and "name and role" in records[2]["error"]
+    assert records[3]["created_at"] == datetime(2024, 3, 2)
+
+
+def zip_of(files) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_zip_supports_both_layouts_and_dated_people_files():
+    archive = zip_of({
+        "m1/transcript.txt": TRANSCRIPT,
+        "m1/people.json": json.dumps(PEOPLE),
+        "m2.txt": TRANSCRIPT,
+        "m2.json": json.dumps({"people_info": PEOPLE, "created_at": "2024-03-01T09:00:00+01:00"}),
+        "m3.txt": TRANSCRIPT,
+        "notes.md": "ignored",
+    })
+    records = {r["meeting_id"]: r for r in iter_zip_meetings(archive)}
+
+    assert set(records) == {"m1", "m2", "m3"}
+    assert records["m1"]["created_at"] is None
+    assert records["m1"]["buckets"]["Bob"] == ["Bob: Thanks, Ann."]
+    assert records["m2"]["created_at"] == datetime(2024, 3, 1, 8, 0)
+    assert "both a transcript and people_info" in records["m3"]["error"]
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        self.log.append("commit")
+
+    def rollback(self):
+        self.log.append("rollback")
+
+
+@pytest.fixture
+def fake_store(monkeypatch):
+    """Stores nothing; fails for meeting ids starting with "bad"."""
+    log = []
+
+    def store(db, meeting_id, responses, created_at=None):
+        if meeting_id.startswith("bad"):
+            raise RuntimeError(f"cannot store {meeting_id}")
+        log.append(meeting_id)
+
+    monkeypatch.setattr(bulk_ingest, "SessionLocal", lambda: FakeSession(log))
+    monkeypatch.setattr(bulk_ingest, "store_transcript_analysis", store)
+    monkeypatch.setattr(bulk_ingest, "analyze_uploaded_transcript", lambda people, buckets: [{"name": "Ann"}])
+    return log
+
+
+def record(meeting_id):
+    return {"meeting_id": meeting_id, "people": PEOPLE, "buckets": {}, "created_at": None}
+
+
+def test_batch_is_written_in_one_transaction(fake_store):
+    statuses = bulk_ingest._write_batch([{**record(m), "responses": []} for m in ("m1", "m2")])
+    assert [s["status"] for s in statuses] == ["stored", "stored"]
+    assert fake_store == ["m1", "m2", "commit"]
+
+
+def test_failed_batch_is_retried_one_meeting_at_a_time(fake_store):
+    statuses = bulk_ingest._write_batch([{**record(m), "responses": []} for m in ("m1", "bad", "m2")])
+    assert [(s["meeting_id"], s["status"]) for s in statuses] == [("m1", "stored"), ("bad", "failed"), ("m2", "stored")]
+    assert "cannot store bad" in statuses[1]["error"]
+    assert fake_store == ["m1", "rollback", "m1", "commit", "rollback", "m2", "commit"]
+
+
+def test_ingest_reports_every_meeting(fake_store):
+    records = [record("m1"), {"meeting_id": None, "error": "line 2: bad json"}, record("bad"), record("m2")]
+    statuses = ingest_meetings(iter(records), concurrency=2, batch_size=2)
+    assert sorted((str(s["meeting_id"]), s["status"]) for s in statuses) == [
+        ("None", "invalid"), ("bad", "failed"), ("m1", "stored"), ("m2", "stored")
+    ]
+
+
+def test_spooled_records_round_trip():
+    records = [{**record("m1"), "created_at": datetime(2024, 3, 1, 8)}, {"meeting_id": None, "error": "line 2: x"}]
+    assert list(bulk_ingest.iter_spooled_meetings(bulk_ingest.spool_meetings(records))) == records
+
+
+def test_resumed_bulk_job_does_not_store_meetings_twice(database, monkeypatch):
+    import uuid
+    from types import SimpleNamespace
+    from models import AnalysisJob, EmployeeSkills
+    from modules import jobs
+    from utils import store_transcript_analysis
+
+    analysis = [{"name": "Ann", "role": "Engineer", "sentiment_score": 50.0, "skill": [], "tasks": [],
+                 "rolling_sentiment": []}]
+    monkeypatch.setattr(jobs, "get_executor", lambda: SimpleNamespace(submit=lambda *args: None))
+    monkeypatch.setattr(bulk_ingest, "analyze_uploaded_transcript", lambda people, buckets: analysis)
+
+    ids = [str(uuid.uuid4()) for _ in range(3)]
+    job_id = jobs.submit_bulk_job(iter([record(m) for m in ids] + [{"meeting_id": None, "error": "line 4: x"}]))
+    # An earlier run stored the first meeting, then its process died
+    with database.session_scope() as db:
+        store_transcript_analysis(db, ids[0], analysis)
+        db.get(AnalysisJob, job_id).result = {"results": [{"meeting_id": ids[0], "status": "stored"}]}
+
+    jobs.run_bulk_job(job_id)
+
+    job = jobs.get_job(job_id)
+    assert job["kind"] == "bulk" and job["status"] == "succeeded"
+    assert job["result"]["summary"] == {"stored": 3, "invalid": 1}
+    with database.session_scope(read_only=True) as db:
+        stored = {m: db.query(EmployeeSkills).filter(EmployeeSkills.meeting_id == m).count() for m in ids}
+    assert stored == {m: 1 for m in ids}
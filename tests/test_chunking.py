@@ -0,0 +1,42 @@
+import pytest
+
+from modules.utils.token_utils import chunk_turns, estimate_tokens
+
+TRANSCRIPT = "\n".join(f"{'Ana' if i % 2 else 'Ben'}: Point number {i} about the release plan." for i in range(40))
+
+
+def test_chunks_stay_within_budget_and_keep_every_turn():
+    chunks = chunk_turns(TRANSCRIPT, 60)
+    assert len(chunks) > 1
+    assert all(sum(estimate_tokens(line) + 1 for line in chunk.splitlines()) <= 60 for chunk in chunks)
+    assert "\n".join(chunks).splitlines() == TRANSCRIPT.splitlines()
+
+
+def test_small_transcript_is_one_chunk():
+    assert chunk_turns("Ana: Hi.\n\nBen: Hello.", 100) == ["Ana: Hi.\nBen: Hello."]
+
+
+def test_long_turn_is_split_with_its_speaker_prefix():
+    turn = "Ana: " + " ".join(f"Sentence {i} is here." for i in range(30))
+    pieces = chunk_turns(turn, 20)
+    assert len(pieces) > 1
+    assert all(piece.startswith("Ana: ") for piece in pieces)
+    assert " ".join(p[len("Ana: "):] for p in pieces) == turn[len("Ana: "):]
+
+
+def test_merge_chunk_results():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("nltk")
+    from utils import merge_chunk_results
+
+    task = {"task": "Send the deck", "assigned_by": "Ben", "assigned_to": "Ana", "deadline": "Friday",
+            "status": "Pending"}
+    results = [
+        ("x" * 300, (0.9, ["Planning", "Negotiation"], [task])),
+        ("x" * 100, (0.1, ["planning", "Design"], [dict(task, task="send the deck!")])),
+    ]
+    sentiment, skills, tasks = merge_chunk_results(results)
+    assert sentiment == pytest.approx(0.7)
+    assert skills[0] == "Planning" and len(skills) == 3
+    assert tasks == [task]
+    assert merge_chunk_results([]) == (0.0, [], [])
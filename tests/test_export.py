@@ -0,0 +1,151 @@
+import os
+import sys
+import uuid
+import subprocess
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pa = pytest.importorskip("pyarrow")
+
+from modules import export
+from modules.export import PartitionWriters, export_running, run_export
+
+
+def skill_schema():
+    return pa.schema([pa.field("id", pa.int64()), pa.field("name", pa.string())])
+
+
+def listing(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names)
+
+
+def test_partition_files_stay_hidden_until_commit(tmp_path):
+    writers = PartitionWriters(str(tmp_path), skill_schema(), "run", max_open=1)
+    writers.write("2024-03-04", {"id": [1], "name": ["Ann"]})
+    writers.write("2024-03-05", {"id": [2], "name": ["Bob"]})  # Closes the first partition
+    assert listing(tmp_path) == ["date=2024-03-04/.part-run-00001.parquet.tmp",
+                                 "date=2024-03-05/.part-run-00002.parquet.tmp"]
+
+    writers.commit()
+    assert listing(tmp_path) == ["date=2024-03-04/part-run-00001.parquet", "date=2024-03-05/part-run-00002.parquet"]
+    assert pa.parquet.read_table(tmp_path / "date=2024-03-05").to_pydict() == {"id": [2], "name": ["Bob"]}
+
+
+def test_aborted_run_leaves_no_files(tmp_path):
+    writers = PartitionWriters(str(tmp_path), skill_schema(), "run", max_open=1)
+    writers.write("2024-03-04", {"id": [1], "name": ["Ann"]})
+    writers.write("2024-03-05", {"id": [2], "name": ["Bob"]})
+    writers.abort()
+    assert listing(tmp_path) == []
+    assert writers.files == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs flock")
+def test_export_lock_is_seen_across_processes(tmp_path):
+    assert not export_running(str(tmp_path))
+    holder = subprocess.Popen(
+        [sys.executable, "-c", "import fcntl, sys, time\n"
+                               "handle = open(sys.argv[1], 'a')\n"
+                               "fcntl.flock(handle, fcntl.LOCK_EX)\n"
+                               "print('locked', flush=True)\n"
+                               "time.sleep(60)",
+         str(tmp_path / export.LOCK_FILE)],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        assert export_running(str(tmp_path))
+        with pytest.raises(RuntimeError):
+            run_export(["skill_recommendation"], str(tmp_path))
+    finally:
+        holder.kill()
+        holder.wait()
+    assert not export_running(str(tmp_path))
+
+
+@pytest.fixture
+def export_db(database):
+    export._export_engine.cache_clear()
+    yield database
+    export._export_engine.cache_clear()
+
+
+def add_skill(db, meeting_id, name):
+    from models import SkillRecommendation
+
+    row = SkillRecommendation(meeting_id=meeting_id, skill_recommendation="sql", name=name)
+    db.add(row)
+    db.flush()
+    return row.id
+
+
+def exported_names(out_dir, meeting_id):
+    table = pa.parquet.read_table(os.path.join(out_dir, "skill_recommendation"))
+    return sorted(name for name, meeting in zip(table.column("name").to_pylist(),
+                                                table.column("meeting_id").to_pylist()) if meeting == meeting_id)
+
+
+def test_export_picks_up_gaps_once_their_writer_commits(export_db, tmp_path):
+    from models import Meeting
+
+    out_dir = str(tmp_path)
+    meeting_id = str(uuid.uuid4())
+    with export_db.session_scope() as db:
+        db.add(Meeting(id=meeting_id, created_at=datetime(2024, 3, 4, 9, 30)))
+    run_export(["skill_recommendation"], out_dir)  # Everything already in the table
+
+    slow = export_db.SessionLocal()
+    try:
+        slow_id = add_skill(slow, meeting_id, "slow")  # Still inside its transaction
+        with export_db.session_scope() as db:
+            fast_id = add_skill(db, meeting_id, "fast")
+        assert fast_id > slow_id
+
+        [summary] = run_export(["skill_recommendation"], out_dir)
+        assert summary["last_id"] == fast_id
+        assert exported_names(out_dir, meeting_id) == ["fast"]
+        assert str(slow_id) in export.load_watermarks(out_dir)["skill_recommendation"]["gaps"]
+
+        [summary] = run_export(["skill_recommendation"], out_dir)  # The writer is still running
+        assert str(slow_id) in export.load_watermarks(out_dir)["skill_recommendation"]["gaps"]
+        slow.commit()
+    finally:
+        slow.close()
+
+    [summary] = run_export(["skill_recommendation"], out_dir)
+    assert summary["rows"] == 1
+    assert exported_names(out_dir, meeting_id) == ["fast", "slow"]
+    assert export.load_watermarks(out_dir)["skill_recommendation"]["gaps"] == {}
+    assert not [name for name in listing(tmp_path) if name.endswith(".tmp")]
+
+
+def test_gaps_that_can_never_fill_are_dropped_at_the_next_run(export_db, tmp_path):
+    from models import Meeting, SkillRecommendation
+
+    out_dir = str(tmp_path)
+    meeting_id = str(uuid.uuid4())
+    with export_db.session_scope() as db:
+        db.add(Meeting(id=meeting_id, created_at=datetime(2024, 3, 4, 9, 30)))
+    run_export(["skill_recommendation"], out_dir)
+
+    rolled_back = export_db.SessionLocal()
+    try:
+        rolled_back_id = add_skill(rolled_back, meeting_id, "rolled back")
+        with export_db.session_scope() as db:
+            compacted_id = add_skill(db, meeting_id, "compacted")
+        with export_db.session_scope() as db:
+            add_skill(db, meeting_id, "kept")
+            db.query(SkillRecommendation).filter(SkillRecommendation.id == compacted_id).delete()
+        run_export(["skill_recommendation"], out_dir)
+        gaps = export.load_watermarks(out_dir)["skill_recommendation"]["gaps"]
+        assert {str(rolled_back_id), str(compacted_id)} <= set(gaps)
+        rolled_back.rollback()
+    finally:
+        rolled_back.close()
+
+    run_export(["skill_recommendation"], out_dir)
+    assert export.load_watermarks(out_dir)["skill_recommendation"]["gaps"] == {}
+    assert exported_names(out_dir, meeting_id) == ["kept"]
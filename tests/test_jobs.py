@@ -0,0 +1,92 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+PEOPLE = [{"name": "Ann", "role": "Engineer"}]
+ANALYSIS = [{"name": "Ann", "role": "Engineer", "sentiment_score": 55.0, "skill": ["sql"], "tasks": [],
+             "rolling_sentiment": []}]
+
+
+@pytest.fixture
+def jobs(database, monkeypatch):
+    """modules.jobs with a recording executor instead of the worker pool."""
+    from modules import jobs
+
+    submitted = []
+    executor = SimpleNamespace(submit=lambda fn, *args: submitted.append((fn, args)))
+    monkeypatch.setattr(jobs, "get_executor", lambda: executor)
+    monkeypatch.setattr(jobs, "submitted", submitted, raising=False)
+    return jobs
+
+
+def queue_job(jobs):
+    meeting_id = str(uuid.uuid4())
+    return jobs.submit_transcript_job(meeting_id, PEOPLE, "Ann: I will finish the report."), meeting_id
+
+
+def stored_rows(database, meeting_id):
+    from models import EmployeeSkills
+
+    with database.session_scope(read_only=True) as db:
+        return db.query(EmployeeSkills).filter(EmployeeSkills.meeting_id == meeting_id).count()
+
+
+def test_a_job_is_claimed_once(jobs, database):
+    job_id, _ = queue_job(jobs)
+    assert jobs.submitted == [(jobs.run_transcript_job, (job_id,))]
+    with database.SessionLocal() as db:
+        assert jobs._claim(db, job_id)
+        assert not jobs._claim(db, job_id)
+    assert jobs.get_job(job_id)["status"] == "running"
+
+
+def test_job_stores_its_results_and_succeeds(jobs, database, monkeypatch):
+    monkeypatch.setattr(jobs, "analyze_uploaded_transcript", lambda people, buckets, on_task=None: ANALYSIS)
+    job_id, meeting_id = queue_job(jobs)
+    jobs.run_transcript_job(job_id)
+
+    job = jobs.get_job(job_id)
+    assert job["status"] == "succeeded" and job["result"] == ANALYSIS
+    assert stored_rows(database, meeting_id) == 1
+
+
+def test_job_taken_over_during_analysis_does_not_store(jobs, database, monkeypatch):
+    from models import AnalysisJob
+
+    def analyze(people, buckets, on_task=None):
+        # Meanwhile the job was declared stale and handed back to the queue
+        with database.session_scope() as db:
+            db.get(AnalysisJob, job_id).status = "queued"
+        return ANALYSIS
+
+    monkeypatch.setattr(jobs, "analyze_uploaded_transcript", analyze)
+    job_id, meeting_id = queue_job(jobs)
+    jobs.run_transcript_job(job_id)
+
+    assert jobs.get_job(job_id)["status"] == "queued"
+    assert stored_rows(database, meeting_id) == 0
+
+
+def test_stale_jobs_are_requeued_once(jobs, database):
+    from models import AnalysisJob
+
+    stale_id, _ = queue_job(jobs)
+    live_id, _ = queue_job(jobs)
+    with database.session_scope() as db:
+        stale = db.get(AnalysisJob, stale_id)
+        stale.status = "running"
+        stale.updated_at = datetime.utcnow() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+    jobs.submitted.clear()
+
+    jobs.resume_pending_jobs()
+    resumed = [args[0] for _, args in jobs.submitted]
+    assert stale_id in resumed and live_id not in resumed
+    assert jobs.get_job(stale_id)["status"] == "queued"
+
+    jobs.submitted.clear()
+    jobs.resume_pending_jobs()  # Re-stamped: not stale again until JOB_STALE_SECONDS pass
+    assert stale_id not in [args[0] for _, args in jobs.submitted]
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from modules.utils.json_stream import MalformedJSONError, StreamingJSONParser
+
+REPLY = {
+    "sentiment_score": 0.7,
+    "skills": ["Planning", "Negotiation"],
+    "tasks": [
+        {"task": "Send the deck", "assigned_to": "Ana", "deadline": "Friday"},
+        {"task": "Book the room", "assigned_to": "Ben", "deadline": "N/A"},
+    ],
+}
+
+
+def feed_in_pieces(parser, text, size):
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_fields_and_items_match_json_loads(size):
+    emitted = []
+    parser = StreamingJSONParser(on_item=emitted.append)
+    feed_in_pieces(parser, "Here you go:\n```json\n" + json.dumps(REPLY, indent=2) + "\n```", size)
+    assert parser.done
+    assert parser.fields == REPLY
+    assert emitted == REPLY["tasks"]
+
+
+def test_items_are_emitted_before_the_reply_ends():
+    emitted = []
+    parser = StreamingJSONParser(on_item=emitted.append)
+    text = json.dumps(REPLY)
+    parser.feed(text[:text.index("Book")])
+    assert emitted == REPLY["tasks"][:1]
+    assert parser.has("sentiment_score", "skills")
+    assert not parser.done
+
+
+def test_braces_inside_strings_are_ignored():
+    parser = StreamingJSONParser()
+    parser.feed('{"tasks": [{"task": "fix } and ] in \\"docs\\""}], "sentiment_score": 1}')
+    assert parser.fields["tasks"][0]["task"] == 'fix } and ] in "docs"'
+    assert parser.done
+
+
+def test_mismatched_bracket_raises():
+    parser = StreamingJSONParser()
+    with pytest.raises(MalformedJSONError):
+        parser.feed('{"skills": ["a"}')
+
+
+def test_reply_without_object_raises():
+    parser = StreamingJSONParser()
+    with pytest.raises(MalformedJSONError):
+        parser.feed("I cannot help with that. " * 40)
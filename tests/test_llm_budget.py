@@ -0,0 +1,62 @@
+import pytest
+
+from modules.llm_budget import (
+    BACKGROUND, INTERACTIVE, INTERACTIVE_HOLD, LLM_BUDGET_HEADROOM, LLM_BUDGET_RESERVE,
+    BudgetTimeout, FileBudgetStore, TokenBucket
+)
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    return TokenBucket("test", tpm=1000, store=FileBudgetStore(str(tmp_path)))
+
+
+def tokens_left(bucket) -> float:
+    with bucket.store.locked(bucket.key) as state:
+        return state["tokens"]
+
+
+def rewind(bucket, seconds: float):
+    """Pretends the bucket was last refilled `seconds` earlier."""
+    with bucket.store.locked(bucket.key) as state:
+        state["updated"] -= seconds
+
+
+def test_background_leaves_the_reserve_for_interactive(bucket):
+    capacity = 1000 * LLM_BUDGET_HEADROOM
+    reserve = LLM_BUDGET_RESERVE * capacity
+    spend = capacity - reserve - 50
+    assert bucket._try_take(spend, BACKGROUND) == 0
+    assert bucket._try_take(100, BACKGROUND) > 0  # Would dip into the reserve
+    assert bucket._try_take(100, INTERACTIVE) == 0
+    assert tokens_left(bucket) == pytest.approx(reserve - 50, abs=1)
+
+
+def test_bucket_refills_at_the_per_minute_rate(bucket):
+    capacity = 1000 * LLM_BUDGET_HEADROOM
+    assert bucket._try_take(capacity, INTERACTIVE) == 0
+    wait = bucket._try_take(capacity / 2, INTERACTIVE)
+    assert wait == pytest.approx(30, abs=0.5)
+    rewind(bucket, 30)
+    assert bucket._try_take(capacity / 2, INTERACTIVE) == 0
+
+
+def test_waiting_interactive_call_holds_background_back(bucket):
+    capacity = 1000 * LLM_BUDGET_HEADROOM
+    assert bucket._try_take(capacity, INTERACTIVE) == 0
+    assert bucket._try_take(100, INTERACTIVE) > 0  # Waits, and asks background to stand aside
+    rewind(bucket, 60)
+    assert 0 < bucket._try_take(10, BACKGROUND) <= INTERACTIVE_HOLD
+    assert bucket._try_take(100, INTERACTIVE) == 0
+
+
+def test_oversized_background_call_is_charged_the_background_share(bucket):
+    capacity = 1000 * LLM_BUDGET_HEADROOM
+    assert bucket._try_take(10 * capacity, BACKGROUND) == 0
+    assert tokens_left(bucket) == pytest.approx(LLM_BUDGET_RESERVE * capacity, abs=1)
+
+
+def test_acquire_gives_up_after_the_timeout(bucket):
+    bucket.acquire(1000 * LLM_BUDGET_HEADROOM, INTERACTIVE)
+    with pytest.raises(BudgetTimeout):
+        bucket.acquire(100, BACKGROUND, timeout=0.01)
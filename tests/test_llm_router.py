@@ -0,0 +1,153 @@
+import time
+import socket
+
+import pytest
+
+from loadtest.fake_llm_server import serve
+from modules.llm_router import CircuitBreaker, LLMRouter, OpenAICompatibleProvider, ProviderError
+
+
+@pytest.fixture
+def fake_llm():
+    servers = []
+
+    def start(latency_ms=0.0, error_rate=0.0):
+        server = serve(port=0, latency_ms=latency_ms, jitter_ms=0.0, error_rate=error_rate)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def base_url(server) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def dead_url() -> str:
+    # A port that was free a moment ago: connections are refused straight away
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def provider(name, url, **kwargs):
+    return OpenAICompatibleProvider(name, "fake-model", url, timeout=5.0, **kwargs)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record(ok=False)
+    assert breaker.state == "closed"
+    breaker.record(ok=False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_admits_one_trial_then_closes():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record(ok=False)
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one trial at a time
+    breaker.record(ok=True)
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record(ok=False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(ok=False)
+    assert breaker.state == "open"
+
+
+def test_provider_breaker_against_fake_server(fake_llm):
+    server = fake_llm()
+    flaky = provider("flaky", dead_url(), failure_threshold=2, cooldown=0.1)
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            flaky.complete("hello")
+    assert flaky.breaker.state == "open"
+
+    time.sleep(0.12)
+    flaky.base_url = base_url(server)  # The backend comes back
+    assert flaky.breaker.allow()
+    assert "sentiment_score" in flaky.complete("hello")
+    assert flaky.breaker.state == "closed"
+
+
+def test_router_fails_over_to_next_provider(fake_llm):
+    server = fake_llm()
+    router = LLMRouter([provider("down", dead_url()), provider("up", base_url(server))])
+    assert "sentiment_score" in router.complete("hello")
+    assert router.providers[0].stats.error_rate == 1.0
+    assert server.state.requests == 1
+
+
+def test_router_skips_open_breaker(fake_llm):
+    server = fake_llm()
+    down = provider("down", dead_url(), failure_threshold=1, cooldown=60)
+    down.breaker.record(ok=False)
+    router = LLMRouter([down, provider("up", base_url(server))])
+    assert [p.name for p in router.ranked()] == ["up"]
+    router.complete("hello")
+    assert down.stats.outcomes.count(False) == 0  # Never called
+
+
+def test_router_does_not_call_providers_whose_breakers_are_all_open(fake_llm):
+    server = fake_llm()
+    tripped = provider("tripped", base_url(server), failure_threshold=1, cooldown=60)
+    tripped.breaker.record(ok=False)
+    router = LLMRouter([tripped])
+    with pytest.raises(ProviderError, match="No LLM provider available"):
+        router.complete("hello")
+    with pytest.raises(ProviderError, match="No LLM provider available"):
+        "".join(router.stream("hello"))
+    assert server.state.requests == 0
+
+
+def test_stream_records_latency(fake_llm):
+    server = fake_llm(latency_ms=50)
+    streaming = provider("up", base_url(server))
+    router = LLMRouter([streaming])
+    for _ in range(5):
+        assert "sentiment_score" in "".join(router.stream("hello"))
+    assert len(streaming.stats.latencies) == 5
+    assert streaming.stats.percentile(95) >= 0.05
+    assert router.latency_percentile(95) == streaming.stats.percentile(95)
+
+
+def test_router_raises_when_every_provider_fails():
+    router = LLMRouter([provider("a", dead_url()), provider("b", dead_url())])
+    with pytest.raises(ProviderError):
+        router.complete("hello")
+
+
+def test_hedge_returns_the_faster_reply(fake_llm):
+    slow, fast = fake_llm(latency_ms=1500), fake_llm(latency_ms=0)
+    router = LLMRouter([provider("slow", base_url(slow)), provider("fast", base_url(fast))],
+                       hedge=True, hedge_after=0.1)
+    started = time.monotonic()
+    assert "sentiment_score" in router.complete("hello")
+    assert time.monotonic() - started < 1.0
+    assert slow.state.requests == 1 and fast.state.requests == 1
+
+
+def test_no_hedge_waits_for_the_first_provider(fake_llm):
+    slow, fast = fake_llm(latency_ms=300), fake_llm(latency_ms=0)
+    router = LLMRouter([provider("slow", base_url(slow)), provider("fast", base_url(fast))])
+    router.complete("hello")
+    assert fast.state.requests == 0
+
+
+def test_stream_fails_over_before_first_delta(fake_llm):
+    server = fake_llm()
+    router = LLMRouter([provider("down", dead_url()), provider("up", base_url(server))])
+    assert "sentiment_score" in "".join(router.stream("hello"))
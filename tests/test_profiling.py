@@ -0,0 +1,65 @@
+import os
+import tracemalloc
+
+import pytest
+
+from modules.utils import profiling
+
+
+@pytest.fixture
+def enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MIN_INTERVAL", 60.0)
+    monkeypatch.setattr(profiling, "_last_capture", {})
+    return tmp_path
+
+
+def captures(directory):
+    return sorted(name.split("-")[0] for name in os.listdir(directory) if name.endswith(".prof"))
+
+
+def test_disabled_profiling_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_ENABLED", False)
+
+    def work():
+        return 42
+
+    assert profiling.profile_section("stage") is profiling._NULL
+    assert profiling.profiled("stage")(work) is work
+
+
+def test_captures_are_rate_limited_per_label(enabled):
+    for _ in range(3):
+        with profiling.profile_section("stage.a"):
+            sum(range(1000))
+    with profiling.profile_section("stage.b"):
+        sum(range(1000))
+    assert captures(enabled) == ["stage.a", "stage.b"]
+
+
+def test_nested_section_runs_unprofiled(enabled):
+    with profiling.profile_section("outer"):
+        with profiling.profile_section("inner"):
+            sum(range(1000))
+    assert captures(enabled) == ["outer"]
+    with profiling.profile_section("inner"):  # Skipped, not rate limited
+        pass
+    assert captures(enabled) == ["inner", "outer"]
+
+
+def test_memory_report_written_and_tracing_stopped(enabled, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TRACEMALLOC", True)
+    assert not tracemalloc.is_tracing()
+    assert len(profiling.profiled("decorated")(lambda: [0] * 1000)()) == 1000
+    assert any(name.endswith(".mem.txt") for name in os.listdir(enabled))
+    assert not tracemalloc.is_tracing()
+
+
+def test_oldest_captures_are_pruned(enabled, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TRACEMALLOC", False)
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    for label in ("one", "two", "three"):
+        with profiling.profile_section(label):
+            pass
+    assert len(os.listdir(enabled)) == 2
@@ -0,0 +1,44 @@
+from modules.utils.prompt_compaction import compact_samples, compact_turns, is_filler, select_utterances
+
+
+def test_filler_and_disfluencies_are_dropped():
+    text = "Ana: Hello, can you hear me?\nBen: Um, I'll send the deck by Friday.\nAna: Yeah.\nBen: I disagree."
+    compacted, stats = compact_turns(text)
+    assert compacted == "Ben: I'll send the deck by Friday.\nBen: I disagree."
+    assert stats["dropped"] == 2
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+
+def test_short_content_is_not_filler():
+    assert is_filler("Okay, thanks!")
+    assert not is_filler("No.")
+    assert not is_filler("Ship it")
+
+
+def test_verbatim_repeats_are_dropped():
+    assert select_utterances(["Ship it on Monday.", "Ship it on Monday", "Ship it on Tuesday."], 0) == [0, 2]
+
+
+def test_budget_prefers_task_cues_and_keeps_order():
+    utterances = [
+        "The weather was nice on the way in today honestly.",
+        "Could you send the budget by Friday?",
+        "I was thinking about lunch places around here.",
+        "We need to fix the login bug, deadline is the 12th.",
+    ]
+    kept = select_utterances(utterances, 25)
+    assert kept == [1, 3]
+
+
+def test_all_filler_transcript_is_sent_as_is():
+    compacted, _ = compact_turns("Ana: Hi.\nBen: Hello.")
+    assert compacted == "Ana: Hi.\nBen: Hello."
+
+
+def test_every_speaker_keeps_a_sample():
+    transcript = [
+        {"speaker": "Speaker_0", "text": "Yeah."},
+        {"speaker": "Speaker_1", "text": "Let's review the API design today."},
+    ]
+    samples, _ = compact_samples(transcript, 50)
+    assert {s["speaker"] for s in samples} == {"Speaker_0", "Speaker_1"}
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from modules.task_dedup import BANDS, NUM_PERM, band_keys, minhash, shingles, similarity
+
+
+def test_minhash_is_deterministic():
+    assert minhash("Send the Q3 deck to finance") == minhash("Send the Q3 deck to finance")
+    assert len(minhash("Send the Q3 deck to finance")) == NUM_PERM
+
+
+def test_near_duplicates_score_high_and_share_a_band():
+    a = minhash("Send the Q3 deck to finance")
+    b = minhash("send Q3 deck over to finance by friday")
+    assert similarity(a, b) >= 0.4
+    assert set(band_keys(a)) & set(band_keys(b))
+
+
+def test_unrelated_tasks_score_low():
+    a = minhash("Send the Q3 deck to finance")
+    b = minhash("Book a meeting room for the offsite")
+    assert similarity(a, b) < 0.2
+
+
+def test_band_keys_cover_every_band():
+    keys = band_keys(minhash("Prepare the weekly report"))
+    assert len(keys) == BANDS
+    assert [int(k.split(":")[0]) for k in keys] == list(range(BANDS))
+
+
+def test_stopword_only_task_has_no_shingles():
+    assert shingles("to the and of") == set()
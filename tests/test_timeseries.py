@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from modules.timeseries import X_KEY, Y_KEY, bucket_mean, lttb
+
+
+def series(n):
+    return [{X_KEY: i, Y_KEY: math.sin(i / 5)} for i in range(n)]
+
+
+def test_lttb_keeps_ends_and_size():
+    points = series(500)
+    sampled = lttb(points, 50)
+    assert len(sampled) == 50
+    assert sampled[0] is points[0] and sampled[-1] is points[-1]
+    assert [p[X_KEY] for p in sampled] == sorted(p[X_KEY] for p in sampled)
+    assert all(p in points for p in sampled)
+
+
+def test_lttb_keeps_a_spike():
+    points = [{X_KEY: i, Y_KEY: 0.0} for i in range(200)]
+    points[97][Y_KEY] = 1.0
+    assert points[97] in lttb(points, 20)
+
+
+def test_lttb_returns_short_series_unchanged():
+    points = series(10)
+    assert lttb(points, 10) == points
+    assert lttb(points, 50) == points
+
+
+def test_lttb_tiny_thresholds():
+    points = series(10)
+    assert lttb(points, 1) == [points[0]]
+    assert lttb(points, 2) == [points[0], points[-1]]
+    assert lttb(points, 0) == points
+
+
+def test_bucket_mean():
+    points = [{X_KEY: i, Y_KEY: float(i)} for i in range(10)]
+    assert bucket_mean(points, 2) == [{X_KEY: 2.0, Y_KEY: 2.0}, {X_KEY: 7.0, Y_KEY: 7.0}]
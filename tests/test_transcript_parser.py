@@ -0,0 +1,26 @@
+import io
+
+from modules.transcript_parser import SpeakerMatcher, iter_lines, split_by_speaker
+
+
+def test_names_match_case_insensitively_and_longest_first():
+    matcher = SpeakerMatcher(["Ann", "Ann Lee", "Bo.b"])
+    assert matcher.match("ANN LEE: hello") == ("Ann Lee", "hello")
+    assert matcher.match("ann : hi there") == ("Ann", "hi there")
+    assert matcher.match("Bo.b: escaped") == ("Bo.b", "escaped")
+    assert matcher.match("Boxb: not a participant") is None
+    assert matcher.match("Joanne: not Ann") is None
+
+
+def test_names_differing_only_by_case_match_exactly():
+    buckets = split_by_speaker(["ann: lower", "Ann: upper", "ANN: ambiguous", "BOB: other"],
+                               ["ann", "Ann", "Bob"])
+    assert buckets == {"ann": ["ann: lower"], "Ann": ["Ann: upper"], "Bob": ["Bob: other"]}
+
+
+def test_every_name_gets_a_bucket():
+    assert split_by_speaker(["Ann: hi"], ["Ann", "Bob", "Ann"]) == {"Ann": ["Ann: hi"], "Bob": []}
+
+
+def test_iter_lines_decodes_and_strips_newlines():
+    assert list(iter_lines(io.BytesIO(b"Ann: hi\r\nBob: caf\xc3\xa9\n"))) == ["Ann: hi", "Bob: café"]
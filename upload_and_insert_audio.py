@@ -1,5 +1,6 @@
 import streamlit as st
 from modules.pipelines.speaker_role_inference import SpeakerRoleInferencePipeline
+from modules.llm_budget import INTERACTIVE, llm_priority
 import os
 
 # Create file upload widget
@@ -34,7 +35,8 @@ if audio_file is not None:
     st.write("Running speaker role inference pipeline...")
     progress.progress(50)  # Update progress to 50%
 
-    role_mapping = pipeline.run()
+    with llm_priority(INTERACTIVE):  # Someone is watching the progress bar
+        role_mapping = pipeline.run()
     
     # Step 3: Display results
     progress.progress(80)  # Update progress to 80%
@@ -1,72 +1,217 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 import re
 import json
-from groq import Groq
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from models import *
 from sentiment import *
+from modules.llm import get_llm_response, stream_llm_response
+from modules.llm_budget import current_priority, llm_priority
+from modules.aggregates import (
+    lock_daily_stats, meeting_day, open_task_keys, record_employee_day, record_meeting_results,
+    refresh_open_tasks
+)
+from modules.task_dedup import lock_assignees, record_task
+from modules.transcript_parser import bucket_utterances
+from modules.utils.nltk_utils import sent_tokenize
+from modules.utils.token_utils import chunk_turns, estimate_tokens
+from modules.utils.json_stream import MalformedJSONError, StreamingJSONParser
+from modules.utils.prompt_compaction import PROMPT_COMPACTION, compact_turns
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-genai.configure(api_key=os.getenv("GENAI_API_KEY"))
-def get_sentiment_and_recommendations(text, person_name):
-    prompt = f"""
-        Analyze the transcript and focus ONLY on statements made by **{person_name}**.
-        Analyze the following transcript and extract tasks along with the roles or names of the individuals involved:
-                - Identify who assigned the task ("assigned_by").
-                - Identify who is responsible for completing the task ("assigned_to").
-                - Extract the task description and any deadlines (if mentioned).
-        Examples of task assignments:
-                - "Manager: John, please prepare the report by Friday."
-                assigned_by: "Manager", assigned_to: "John", task: "Prepare the report", deadline: "Friday"
-                - "Employee: I'll handle the client meeting next week."
-                assigned_by: "Employee", assigned_to: "Employee", task: "Handle the client meeting", deadline: "Next week"
-
-        Respond in the following strict JSON format ONLY:
-
-{{
-  "sentiment_score": float (0 to 1),
-  "skills": [
-    "Top skill recommendation 1",
-    "Top skill recommendation 2",
-    "Top skill recommendation 3"  // Maximum 3 skills
-  ],
-  "tasks": [
-    {{
-      "task": "description",
-      "assigned_by": "Person assigning the task",
-      "assigned_to": "Person responsible for the task",
-      "deadline": "Suggested deadline",
-      "status": "Task status"
-    }}
-  ]
-}}
-
-Rules:
-1. Provide maximum 3 most important skills
-2. Skills should be concise (3-5 words each)
-3. Omit the skills array if no skills identified
+
+# llama3-8b-8192 context; prompts larger than this are split into turn-aligned chunks
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "8192"))
+LLM_RESPONSE_TOKENS = int(os.getenv("LLM_RESPONSE_TOKENS", "1024"))
+LLM_CHUNK_WORKERS = int(os.getenv("LLM_CHUNK_WORKERS", "4"))
+# Streaming is used for interactive uploads; a malformed stream is retried this many times
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+LLM_STREAM_RETRIES = int(os.getenv("LLM_STREAM_RETRIES", "1"))
+# Optional per-speaker cap on what is sent after filler is dropped. 0 (default) sends
+# everything and lets long transcripts go through chunking; a cap drops the least
+# informative utterances instead, trading recall for fewer calls
+PROMPT_SPEAKER_TOKENS = int(os.getenv("PROMPT_SPEAKER_TOKENS", "0"))
+
+REQUIRED_FIELDS = ("sentiment_score", "skills", "tasks")
+TASK_FIELDS = ("task", "assigned_by", "assigned_to", "deadline", "status")
+
+
+def build_recommendation_prompt(text, person_name):
+    return f"""Analyze only the statements made by {person_name} in the transcript below.
+Extract each task: who assigned it (assigned_by), who must do it (assigned_to), what it is, and any deadline.
+Examples:
+- "Manager: John, please prepare the report by Friday." -> assigned_by "Manager", assigned_to "John", task "Prepare the report", deadline "Friday"
+- "Employee: I'll handle the client meeting next week." -> assigned_by "Employee", assigned_to "Employee", task "Handle the client meeting", deadline "Next week"
+Reply with this JSON only:
+{{"sentiment_score": <float 0 to 1>, "skills": [<at most 3 recommended skills, 3-5 words each; [] if none>], "tasks": [{{"task": "", "assigned_by": "", "assigned_to": "", "deadline": "", "status": ""}}]}}
 
 Transcript:
-{text}
+{text}"""
+
+
+def _prompt_overhead_tokens():
+    return estimate_tokens(build_recommendation_prompt("", "")) + 16  # Room for the name
+
+
+def get_sentiment_and_recommendations(text, person_name, stream=False, on_task=None):
+    """
+    Transcripts that would not fit in the model context are split on speaker turns,
+    analysed in parallel and merged; short ones take a single call as before.
+    With `stream`, replies are parsed as they arrive and each task is handed to
+    `on_task` once, as soon as it is complete (see stream_recommendations).
+    Filler-only utterances are dropped first (see modules.utils.prompt_compaction);
+    only if PROMPT_SPEAKER_TOKENS is set is the text also cut to the most
+    informative utterances.
     """
+    if PROMPT_COMPACTION:
+        text, _ = compact_turns(text, PROMPT_SPEAKER_TOKENS, label=person_name)
+    budget = LLM_CONTEXT_TOKENS - LLM_RESPONSE_TOKENS - _prompt_overhead_tokens()
+    chunks = chunk_turns(text, budget) if estimate_tokens(text) > budget else [text]
+    on_task = _once_per_task(on_task) if on_task else None
 
-    # model = genai.GenerativeModel("gemini-1.5-pro-latest")
-    try:
-        # response = model.generate_content(prompt)
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-8b-8192",
-            response_format={"type": "json_object"},
-            temperature=0.3  # More deterministic output
+    if len(chunks) <= 1:
+        try:
+            if stream:
+                sentiment, skills, tasks = stream_recommendations(text, person_name, on_task)
+                return sentiment, skills[:3], tasks
+            return parse_response(_request_recommendations(text, person_name))
+        except Exception as e:
+            print(f"Error generating content: {e}")
+            return 0.0, [], []  # Return default values on error
+
+    # Pool threads do not inherit the caller's LLM priority
+    priority = current_priority()
+
+    def analyse(chunk):
+        try:
+            with llm_priority(priority):
+                if stream:
+                    return chunk, stream_recommendations(chunk, person_name, on_task)
+                return chunk, _parse_strict(_request_recommendations(chunk, person_name))
+        except Exception as e:
+            print(f"Error analysing transcript chunk for {person_name}: {e}")
+            return chunk, None
+
+    with ThreadPoolExecutor(max_workers=min(LLM_CHUNK_WORKERS, len(chunks))) as pool:
+        results = [(chunk, parsed) for chunk, parsed in pool.map(analyse, chunks) if parsed is not None]
+    print(f"Analysed {person_name} in {len(chunks)} chunks ({len(results)} succeeded)")
+    return merge_chunk_results(results)
+
+
+def _request_recommendations(text, person_name):
+    # Groq, Gemini or any configured provider, whichever is currently fastest
+    return get_llm_response(
+        build_recommendation_prompt(text, person_name),
+        model="llama3-8b-8192",
+        json_mode=True,
+        temperature=0.3  # More deterministic output
+    )
+
+
+def stream_recommendations(text, person_name, on_task=None):
+    """
+    Streams the analysis and parses it incrementally: tasks reach `on_task` as each
+    object closes, and the request is hung up as soon as every required field has
+    arrived. Malformed output aborts the stream mid-reply and the next attempt starts
+    straight away; a task may then be delivered again. Raises once all attempts fail.
+    """
+    prompt = build_recommendation_prompt(text, person_name)
+    last_error = None
+    for attempt in range(1 + LLM_STREAM_RETRIES):
+        parser = StreamingJSONParser(
+            list_key="tasks",
+            on_item=(lambda item: on_task(_task_fields(item))) if on_task else None
         )
-        
-        response_text = chat_completion.choices[0].message.content
-        return parse_response(response_text)
-    except Exception as e:
-        print(f"Error generating content: {e}")
-        return 0.0, [], []  # Return default values on error
+        deltas = stream_llm_response(prompt, model="llama3-8b-8192", json_mode=True, temperature=0.3)
+        try:
+            for delta in deltas:
+                parser.feed(delta)
+                if parser.done or parser.has(*REQUIRED_FIELDS):
+                    break
+            if not (parser.done or parser.has(*REQUIRED_FIELDS)):
+                raise MalformedJSONError("Reply ended before the JSON object was complete")
+        except MalformedJSONError as e:
+            last_error = e
+            print(f"Malformed LLM stream for {person_name} (attempt {attempt + 1}): {e}")
+            continue
+        finally:
+            deltas.close()
+        return _result_from_json(parser.fields)
+    raise last_error
+
+
+def _parse_strict(response_text):
+    """Like parse_response, but raises instead of returning defaults so failed chunks can be left out."""
+    json_match = re.search(r"\{[\s\S]+\}", response_text.strip())
+    if not json_match:
+        raise ValueError("No JSON found in response")
+    return _result_from_json(json.loads(json_match.group()))
+
+
+def _result_from_json(json_data):
+    sentiment = float(json_data.get("sentiment_score", 0))
+    skills = [s for s in json_data.get("skills", []) if isinstance(s, str)]
+    tasks = [_task_fields(task_data) for task_data in json_data.get("tasks", []) if isinstance(task_data, dict)]
+    return sentiment, skills, tasks
+
+
+def _task_fields(task_data):
+    return {key: task_data.get(key, "") for key in TASK_FIELDS}
+
+
+def _task_key(task):
+    return _normalise(task["task"]), _normalise(task["assigned_to"])
+
+
+def _once_per_task(on_task):
+    """Wraps a task callback so chunk overlaps and stream retries do not repeat a task."""
+    seen, lock = set(), threading.Lock()
+
+    def emit(task):
+        key = _task_key(task)
+        with lock:
+            if not key[0] or key in seen:
+                return
+            seen.add(key)
+        on_task(task)
+    return emit
+
+
+def merge_chunk_results(results):
+    """
+    Reduces per-chunk (chunk_text, (sentiment, skills, tasks)) pairs: sentiment is
+    weighted by chunk length, skills are ranked by how many chunks raised them
+    (top 3) and tasks are de-duplicated on their normalised description.
+    """
+    if not results:
+        return 0.0, [], []
+
+    total_weight = sum(len(chunk) for chunk, _ in results) or 1
+    sentiment = sum(len(chunk) * parsed[0] for chunk, parsed in results) / total_weight
+
+    skill_counts, skill_names = Counter(), {}
+    tasks, seen_tasks = [], set()
+    for order, (_, (_, skills, chunk_tasks)) in enumerate(results):
+        for skill in skills:
+            key = _normalise(skill)
+            if key:
+                skill_counts[key] += 1
+                skill_names.setdefault(key, (order, skill))
+        for task in chunk_tasks:
+            key = _task_key(task)
+            if key[0] and key not in seen_tasks:
+                seen_tasks.add(key)
+                tasks.append(task)
+
+    # Ties go to the skill mentioned earliest in the meeting
+    ranked = sorted(skill_counts, key=lambda k: (-skill_counts[k], skill_names[k][0]))
+    skills = [skill_names[key][1] for key in ranked[:3]]
+    return round(sentiment, 4), skills, tasks
+
+
+def _normalise(value):
+    return re.sub(r"[^a-z0-9 ]+", "", re.sub(r"\s+", " ", str(value or "").lower())).strip()
 
 
 def parse_response(response_text):
@@ -104,10 +249,6 @@ def parse_response(response_text):
     
 
 def get_rolling_sentiment_from_transcript(transcript: str, name: str):
-    import nltk
-    nltk.download("punkt", quiet=True)
-    from nltk.tokenize import sent_tokenize
-
     sentences = sent_tokenize(transcript)
     result_data = []
 
@@ -134,6 +275,11 @@ def get_rolling_sentiment_from_transcript(transcript: str, name: str):
 
 
 def process_meeting(meeting_id, db):
+    """
+    Analyses a meeting's unprocessed transcripts, then writes every result in one
+    short burst at the end, so row locks (daily aggregates, task dedup) are never
+    held while the LLM is working. The caller commits, once per meeting.
+    """
     try:
         # Get all unprocessed transcripts for this meeting
         transcripts = db.query(MeetingTranscript).filter(
@@ -149,15 +295,14 @@ def process_meeting(meeting_id, db):
         if not meeting:
             raise ValueError(f"Meeting with ID {meeting_id} does not exist")
 
+        buckets = bucket_utterances((t.name, t.text) for t in transcripts)
         participants = {}
-        for transcript in transcripts:
-            if transcript.name not in participants:
-                employee = db.query(Employee).filter(Employee.name == transcript.name).first()
-                participants[transcript.name] = {
-                    "role": employee.role if employee else "Participant",
-                    "texts": []
-                }
-            participants[transcript.name]["texts"].append(f"{transcript.name}: {transcript.text}")
+        for name, texts in buckets.items():
+            employee = db.query(Employee).filter(Employee.name == name).first()
+            participants[name] = {
+                "role": employee.role if employee else "Participant",
+                "texts": texts
+            }
 
         results = []
         for name, data in participants.items():
@@ -169,17 +314,34 @@ def process_meeting(meeting_id, db):
             # Calculate rolling sentiment
             rolling_data = get_rolling_sentiment_from_transcript(full_text, name)
             overall_sentiment = get_sentiment(full_text)
-            
+
+            results.append({
+                "meeting_id": meeting_id,
+                "name": name,
+                "role": data["role"],
+                "sentiment": overall_sentiment,
+                "skills": skills,
+                "tasks": tasks,
+                "rolling_sentiment": rolling_data
+            })
+
+        # Analysis done: everything below is database writes only
+        day = meeting_day(db, meeting_id)
+        lock_assignees(db, [task["assigned_to"] or r["name"] for r in results for task in r["tasks"]])
+        touched_tasks = []
+        for result in results:
+            name, role = result["name"], result["role"]
+
             # Save to EmployeeSkills
             db.add(EmployeeSkills(
                 meeting_id=meeting_id,
-                overall_sentiment_score=overall_sentiment,
-                role=data["role"],
+                overall_sentiment_score=result["sentiment"],
+                role=role,
                 employee_name=name
             ))
 
             # Save skill recommendations
-            for skill in skills[:3]:
+            for skill in result["skills"][:3]:
                 db.add(SkillRecommendation(
                     meeting_id=meeting_id,
                     skill_recommendation=skill,
@@ -187,25 +349,18 @@ def process_meeting(meeting_id, db):
                 ))
 
             # Save task recommendations
-            for task in tasks:
-                db.add(TaskRecommendation(
-                    meeting_id=meeting_id,
-                    task=task["task"],
-                    assigned_by=task["assigned_by"] or name,
-                    assigned_to=task["assigned_to"] or name,
-                    deadline=task["deadline"] or "N/A",
-                    status=task["status"] or "Pending"
-                ))
+            for task in result["tasks"]:
+                touched_tasks.append(record_task(db, meeting_id, task, name)[0])
 
             # Save rolling sentiment
-            if rolling_data:
+            if result["rolling_sentiment"]:
                 db.add(RollingSentiment(
                     meeting_id=meeting_id,
                     name=name,
-                    role=data["role"],
+                    role=role,
                     rolling_sentiment=json.dumps({
-                        "scores": rolling_data,
-                        "average": overall_sentiment
+                        "scores": result["rolling_sentiment"],
+                        "average": result["sentiment"]
                     })
                 ))
 
@@ -214,17 +369,123 @@ def process_meeting(meeting_id, db):
                 if transcript.name == name:
                     transcript.processed = True
 
-            results.append({
-                "meeting_id": meeting_id,
-                "name": name,
-                "role": data["role"],
-                "sentiment": overall_sentiment,
-                "skills": skills,
-                "tasks": tasks,
-                "rolling_sentiment": rolling_data
-            })
+        # Keep the per-employee daily rollups in step; committed together with the results.
+        # Every aggregate key is locked first, once the merged tasks' days are known
+        daily_keys = [(r["name"], day) for r in results] + open_task_keys(db, touched_tasks)
+        lock_daily_stats(db, daily_keys)
+        record_meeting_results(db, meeting_id, results)
+        refresh_open_tasks(db, daily_keys)
 
         return results
     except Exception as e:
         db.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+def analyze_participant(name, role, person_lines, on_task=None):
+    """
+    Runs the LLM and VADER analysis for one participant of an uploaded transcript.
+    `on_task(task)` is called for each task as soon as the model has produced it.
+    """
+    print(f"Person Line : {name} : {person_lines} ")
+    sentiment, skills, tasks = get_sentiment_and_recommendations(
+        person_lines, name, stream=LLM_STREAMING, on_task=on_task
+    )
+
+    rolling_data = get_rolling_sentiment_from_transcript(person_lines, name)
+    rolling_sentiments = [entry['Rolling Sentiment'] for entry in rolling_data]  # Extract all the sentiment values
+    print("Rolling sentiment : ", rolling_sentiments)
+    # Then calculate the average
+    average_sentiment = sum(rolling_sentiments) / len(rolling_sentiments) if rolling_sentiments else 0
+    average_sentiment = round(average_sentiment, 2)
+
+    task_responses = [{
+        "task": task["task"],
+        "assigned_by": task["assigned_by"],
+        "assigned_to": task["assigned_to"],
+        "deadline": task["deadline"],
+        "status": task["status"]
+    } for task in tasks or []]
+
+    return {
+        "name": name,
+        "role": role,
+        "sentiment_score": average_sentiment,
+        "skill": list(skills or [])[:3],  # Ensure max 3 skills
+        "tasks": task_responses,
+        "rolling_sentiment": rolling_data
+    }
+
+
+def analyze_uploaded_transcript(people, buckets, on_task=None):
+    """
+    Analyses every participant of an uploaded transcript. `buckets` maps each name to
+    its "Name: text" lines (see modules.transcript_parser.split_by_speaker).
+    Nothing is written to the database here. `on_task(name, task)` receives tasks
+    while the analysis is still running.
+    """
+    responses = []
+    for person in people:
+        name = person["name"]
+        person_lines = "\n".join(buckets.get(name, []))
+        if not person_lines:
+            responses.append({"name": name, "error": "No dialogue found"})
+            continue
+        emit = (lambda task, name=name: on_task(name, task)) if on_task else None
+        responses.append(analyze_participant(name, person["role"], person_lines, on_task=emit))
+    return responses
+
+
+def store_transcript_analysis(db, meeting_id, responses, created_at=None):
+    """
+    Adds the results of analyze_uploaded_transcript to the session; the caller commits.
+    `created_at` dates a new meeting (backfills); it defaults to now.
+    """
+    if db.query(Meeting.id).filter(Meeting.id == meeting_id).first() is None:
+        db.add(Meeting(id=meeting_id, created_at=created_at) if created_at else Meeting(id=meeting_id))
+        db.flush()
+    day = meeting_day(db, meeting_id)
+    lock_assignees(db, [
+        task["assigned_to"] or r["name"] for r in responses if "error" not in r for task in r["tasks"]
+    ])
+
+    recorded, touched_tasks = [], []
+    for response in responses:
+        if "error" in response:
+            continue
+        name, role = response["name"], response["role"]
+
+        db.add(EmployeeSkills(
+            meeting_id=meeting_id,
+            overall_sentiment_score=response["sentiment_score"],
+            role=role,
+            employee_name=name
+        ))
+
+        for skill in response["skill"]:
+            db.add(SkillRecommendation(
+                meeting_id=meeting_id,
+                skill_recommendation=skill,
+                name=name
+            ))
+
+        for task in response["tasks"]:
+            touched_tasks.append(record_task(db, meeting_id, task, name)[0])
+
+        if response["rolling_sentiment"]:
+            db.add(RollingSentiment(
+                meeting_id=meeting_id,
+                name=name,
+                role=role,
+                rolling_sentiment=json.dumps(response["rolling_sentiment"])
+            ))
+
+        recorded.append(response)
+
+    # Aggregates last, with every key locked first, once the merged tasks' days are known
+    daily_keys = [(r["name"], day) for r in recorded] + open_task_keys(db, touched_tasks)
+    lock_daily_stats(db, daily_keys)
+    for response in recorded:
+        record_employee_day(
+            db, response["name"], response["role"], day, response["sentiment_score"], response["skill"]
+        )
+    refresh_open_tasks(db, daily_keys)